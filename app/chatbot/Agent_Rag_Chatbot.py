@@ -1,13 +1,19 @@
-import os, re, pickle, hashlib, unicodedata
+import os, re, json, time, random, pickle, hashlib, threading, unicodedata
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import openai
+import tiktoken
 from datetime import datetime, timedelta   
 import faiss
 
 from sqlalchemy import text as sql_text
 from app.config.llm_config import client
 from app.utils.db import engine
+from app.chatbot.embedding_store import EmbeddingStore
+from app.chatbot.chunk_index import ChunkIndexHolder
+from app.chatbot.session_state import create_session_store, new_state
+from app.chatbot.response_cache import ResponseCache, bucket_key, CACHE_ENABLED
 
 # -----------------------------
 # 캐시 및 저장 설정
@@ -16,73 +22,127 @@ CACHE_DIR = Path(os.getenv("CACHE_DIR", "app/.cache"))
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 FAISS_INDEX_FILE = CACHE_DIR / "chunk_faiss.index"
 CHUNK_META_FILE = CACHE_DIR / "chunk_meta.pkl"
+CHUNK_INDEX_CHECK_SEC = float(os.getenv("CHUNK_INDEX_CHECK_SEC", "1.0"))  # 인덱스 파일 변경 확인 주기
+PROGRAM_EMB_FILE = CACHE_DIR / "program_emb.npy"         # (N, d) L2 정규화 float32 행렬
+PROGRAM_EMB_MAP_FILE = CACHE_DIR / "program_emb_map.json" # id -> row / 버전 정보
 EMBED_MODEL = "text-embedding-3-small"
-EMBED_CACHE_FILE = CACHE_DIR / "embeddings.pkl"
+EMBED_DIM = int(os.getenv("EMBED_DIM", "1536"))
+EMBED_CACHE_FILE = CACHE_DIR / "embeddings.pkl"  # 구버전 pickle 캐시 (최초 1회 이관용)
+EMBED_STORE_DIR = CACHE_DIR / "embed_store"
 
 ## 임베딩 "디스크 캐시 + 배치 호출"
+# 캐시 미스마다 전체 pickle을 다시 쓰지 않고, 새 벡터만 샤드 세그먼트 끝에 append
 
-def _load_embed_cache():
-    if EMBED_CACHE_FILE.exists():
-        try:
-            with open(EMBED_CACHE_FILE, "rb") as f:
-                return pickle.load(f)
-        except Exception:
-            return {}
-    return {}
+def _embed_key(text: str) -> str:
+    return hashlib.md5((text + "|" + EMBED_MODEL).encode("utf-8")).hexdigest()
 
-def _save_embed_cache(cache):
+def _migrate_legacy_embed_cache(store: EmbeddingStore):
+    if len(store) or not EMBED_CACHE_FILE.exists():
+        return
     try:
-        with open(EMBED_CACHE_FILE, "wb") as f:
-            pickle.dump(cache, f)
+        with open(EMBED_CACHE_FILE, "rb") as f:
+            legacy = pickle.load(f)
+        store.put_many(legacy.items())
     except Exception:
         pass
 
-# 전역 1회 로드
-_embed_cache = _load_embed_cache()
+# FAISS 인덱스 + 청크 메타 (프로세스당 1회 로드, 핫 리로드)
+_chunk_index = ChunkIndexHolder(FAISS_INDEX_FILE, CHUNK_META_FILE, CHUNK_INDEX_CHECK_SEC)
+
+# 전역 1회 로드 (mmap + 키 인덱스만 메모리에)
+_embed_store = EmbeddingStore(EMBED_STORE_DIR, EMBED_DIM)
+_migrate_legacy_embed_cache(_embed_store)
 
 def get_embedding(text: str) -> np.ndarray:
-    key = hashlib.md5((text + "|" + EMBED_MODEL).encode("utf-8")).hexdigest()
-    # 메모리 + 디스크 캐시
-    if key in _embed_cache:
-        return _embed_cache[key]
-    local_cache = getattr(get_embedding, "_cache", {})
-    if key in local_cache:
-        return local_cache[key]
+    key = _embed_key(text)
+    vec = _embed_store.get(key)
+    if vec is not None:
+        return vec
 
     res = client.embeddings.create(input=[text], model=EMBED_MODEL)
     vec = np.array(res.data[0].embedding, dtype="float32").reshape(1, -1)
-
-    local_cache[key] = vec
-    get_embedding._cache = local_cache
-    _embed_cache[key] = vec
-    _save_embed_cache(_embed_cache)
+    _embed_store.put(key, vec)
     return vec
 
-# 제목 임베딩 "배치" 버전 (initialize_indexes에서 사용)
+# -----------------------------
+# 대량 임베딩: 토큰 예산 배치 + 제한된 동시 요청 + 재시도
+# -----------------------------
+EMBED_BATCH_MAX_INPUTS = int(os.getenv("EMBED_BATCH_MAX_INPUTS", "2048"))    # 요청당 입력 개수 상한 (OpenAI 2048)
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "250000"))  # 요청당 토큰 상한 (OpenAI 300k)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))                 # 동시에 보내는 배치 수
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+_EMBED_RETRYABLE = (
+    openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError
+)
+
+try:
+    _embed_encoding = tiktoken.encoding_for_model(EMBED_MODEL)
+except Exception:
+    _embed_encoding = None
+
+def _count_tokens(text: str) -> int:
+    if _embed_encoding is not None:
+        return len(_embed_encoding.encode(text, disallowed_special=()))
+    return len(text.encode("utf-8"))  # 토크나이저가 없으면 바이트 수로 보수적으로 추정
+
+def _token_batches(items):
+    """[(text, key)] -> 입력 개수/토큰 예산을 넘지 않는 배치들"""
+    batch, tokens = [], 0
+    for text, key in items:
+        n = _count_tokens(text)
+        if batch and (len(batch) >= EMBED_BATCH_MAX_INPUTS or tokens + n > EMBED_BATCH_MAX_TOKENS):
+            yield batch
+            batch, tokens = [], 0
+        batch.append((text, key))
+        tokens += n
+    if batch:
+        yield batch
+
+def _embed_batch(batch):
+    """배치 1개 요청 (지수 백오프 재시도) 후 캐시에 배치 단위로 한 번 저장"""
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            res = client.embeddings.create(input=[t for t, _ in batch], model=EMBED_MODEL)
+            break
+        except _EMBED_RETRYABLE:
+            if attempt == EMBED_MAX_RETRIES:
+                raise
+            time.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random() / 2))
+    data = sorted(res.data, key=lambda d: d.index)
+    items = [(k, np.array(d.embedding, dtype="float32").reshape(1, -1)) for (_, k), d in zip(batch, data)]
+    _embed_store.put_many(items)
+    return items
+
+def _embed_uncached(uncached):
+    """[(text, key)] -> {key: (1, d) 벡터}"""
+    batches = list(_token_batches(uncached))
+    out = {}
+    if len(batches) == 1:
+        out.update(_embed_batch(batches[0]))
+        return out
+    with ThreadPoolExecutor(max_workers=max(1, min(EMBED_CONCURRENCY, len(batches)))) as pool:
+        for items in pool.map(_embed_batch, batches):
+            out.update(items)
+    return out
+
+# 제목/청크 임베딩 "배치" 버전 (initialize_indexes에서 사용)
 def get_embeddings_batch(texts):
-    # 캐시에 없는 것만 모아서 한 번에 요청
+    # 캐시에 없는 것만 모아서 배치로 요청
+    keys = [_embed_key(t) for t in texts]
+    found = {}
     uncached = []
-    keys = []
-    out = []
-    for t in texts:
-        k = hashlib.md5((t + "|" + EMBED_MODEL).encode("utf-8")).hexdigest()
-        keys.append(k)
-        if k not in _embed_cache:
-            uncached.append(t)
+    for t, k in zip(texts, keys):
+        if k in found:
+            continue
+        vec = _embed_store.get(k)
+        if vec is None:
+            uncached.append((t, k))
+        found[k] = vec
 
     if uncached:
-        res = client.embeddings.create(input=uncached, model=EMBED_MODEL)
-        idx = 0
-        for t in uncached:
-            vec = np.array(res.data[idx].embedding, dtype="float32").reshape(1, -1)
-            k = hashlib.md5((t + "|" + EMBED_MODEL).encode("utf-8")).hexdigest()
-            _embed_cache[k] = vec
-            idx += 1
-        _save_embed_cache(_embed_cache)
-
-    for i, t in enumerate(texts):
-        out.append(_embed_cache[keys[i]])
-    return out
+        found.update(_embed_uncached(uncached))
+
+    return [found[k] for k in keys]
 
 
 # -----------------------------
@@ -97,6 +157,8 @@ FIELD_PATTERNS = {
     "장소": r"(?:장소|위치)\s*:\s*([^\n]+)",
     "수료증": r"(?:수료증)\s*[:\-]?\s*(있음|없음)" 
 }
+# 로딩 시 1회만 쓰도록 미리 컴파일
+FIELD_REGEXES = {k: re.compile(pat) for k, pat in FIELD_PATTERNS.items()}
 
 FIELD_KEYWORD_MAP = {
     "신청기간": ["신청기간", "접수기간"],
@@ -207,7 +269,8 @@ def load_activities_from_db():
             selection_method,
             purpose,
             benefits,
-            `procedure` AS procedure_field
+            `procedure` AS procedure_field,
+            updated_at
         FROM extracurricular
         WHERE COALESCE(is_deleted, 0) = 0
         """
@@ -253,7 +316,6 @@ def load_activities_from_db():
                         kw_list = keywords_raw
                     else:
                         # sqlalchemy가 str로 줄 때 대비
-                        import json
                         kw_list = json.loads(keywords_raw)
                     if kw_list:
                         keywords_line = "키워드: " + ", ".join(map(str, kw_list))
@@ -280,6 +342,8 @@ def load_activities_from_db():
             ]
 
             text = "\n".join([ln for ln in text_lines if ln])
+            # 규칙 기반 필드는 로딩 시점에 한 번만 추출 (질의 경로에서 정규식 실행 X)
+            fields = extract_fields(text)
 
             rows.append({
                 # 내부 id는 이전 코드와의 호환을 위해 extracurricular_id 유지
@@ -287,12 +351,14 @@ def load_activities_from_db():
                 "title": title,
                 "url": url,
                 "text": text,
+                "fields": fields,
                 # [CHANGED STEP1] 관심사 매칭 강화를 위해 추가 필드 저장
                 "description": description,
                 "keywords": keywords_for_storage,
                 "purpose": purpose,
                 "act_start_dt": r.get("activity_start"),
                 "act_end_dt": r.get("activity_end"),
+                "updated_at": str(r["updated_at"]) if r.get("updated_at") else None,
             })
         return rows
 
@@ -327,49 +393,152 @@ def build_program_text(activity: dict) -> str:
         parts.append(activity["purpose"])
     return " ".join(parts)
 
-def initialize_indexes():
-    # 1) 인덱스/메타가 이미 있으면, DB는 로드하되 청크 임베딩 재계산/재인덱싱은 스킵
-    if FAISS_INDEX_FILE.exists() and CHUNK_META_FILE.exists():
-        _ = faiss.read_index(str(FAISS_INDEX_FILE))
-        with open(CHUNK_META_FILE, "rb") as f:
-            _ = pickle.load(f)
-
-        activities_local = load_activities_from_db()
-
-        # [CHANGED STEP1] 확장된 프로그램 텍스트 기반 임베딩
-        prog_texts = [build_program_text(a) for a in activities_local]
-        program_embeddings_local = get_embeddings_batch(prog_texts)
-        return activities_local, program_embeddings_local
+def _program_version(activity: dict) -> str:
+    # updated_at이 있으면 그대로 버전으로 사용 (텍스트 재구성/해시 불필요)
+    if activity.get("updated_at"):
+        return str(activity["updated_at"])
+    return _embed_key(build_program_text(activity))
 
-    # 2) 없을 때만 (처음 한 번) 빌드
-    activities_local = load_activities_from_db()
-    prog_texts = [build_program_text(a) for a in activities_local]
-    program_embeddings_local = get_embeddings_batch(prog_texts)
+def _load_program_matrix(activities_local):
+    """
+    프로그램 임베딩을 (N, d) float32 행렬로 반환 (행 i == activities_local[i], L2 정규화)
+    - program_emb.npy 를 mmap으로 열어 워커 간 OS 페이지 캐시 공유
+    - 사이드카(id -> row, version)와 비교해 바뀐 활동만 다시 임베딩
+    """
+    ids = [str(a["id"]) for a in activities_local]
+    versions = [_program_version(a) for a in activities_local]
 
-    chunk_texts, chunk_meta = [], []
-    for act in activities_local:
-        for ck in chunk_text(act["text"]):
+    old_map, old_mat = {}, None
+    if PROGRAM_EMB_FILE.exists() and PROGRAM_EMB_MAP_FILE.exists():
+        try:
+            with open(PROGRAM_EMB_MAP_FILE, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model") == EMBED_MODEL:
+                old_map = meta.get("rows", {})
+                old_mat = np.load(PROGRAM_EMB_FILE, mmap_mode="r")
+        except Exception:
+            old_map, old_mat = {}, None
+
+    # 그대로 재사용 가능하면 mmap 행렬 반환
+    if old_mat is not None and len(old_map) == len(ids) and all(
+        old_map.get(pid, {}).get("row") == i and old_map[pid].get("version") == ver
+        for i, (pid, ver) in enumerate(zip(ids, versions))
+    ):
+        return old_mat
+
+    mat = np.zeros((len(ids), EMBED_DIM), dtype="float32")
+    stale = []
+    for i, (pid, ver) in enumerate(zip(ids, versions)):
+        entry = old_map.get(pid)
+        if old_mat is not None and entry and entry.get("version") == ver and entry.get("row", -1) < len(old_mat):
+            mat[i] = old_mat[entry["row"]]
+        else:
+            stale.append(i)
+
+    if stale:
+        embs = get_embeddings_batch([build_program_text(activities_local[i]) for i in stale])
+        fresh = np.vstack(embs).astype("float32")
+        fresh /= np.linalg.norm(fresh, axis=1, keepdims=True) + 1e-12
+        mat[stale] = fresh
+
+    # 임시 파일에 쓴 뒤 교체 (다른 워커가 읽는 중이어도 안전)
+    tmp_npy = PROGRAM_EMB_FILE.with_suffix(f".{os.getpid()}.tmp")
+    tmp_map = PROGRAM_EMB_MAP_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_npy, "wb") as f:
+        np.save(f, mat)
+    with open(tmp_map, "w", encoding="utf-8") as f:
+        json.dump({
+            "model": EMBED_MODEL,
+            "rows": {pid: {"row": i, "version": ver} for i, (pid, ver) in enumerate(zip(ids, versions))},
+        }, f, ensure_ascii=False)
+    os.replace(tmp_npy, PROGRAM_EMB_FILE)
+    os.replace(tmp_map, PROGRAM_EMB_MAP_FILE)
+    return np.load(PROGRAM_EMB_FILE, mmap_mode="r")
+
+def _chunk_rows_from_meta(meta: dict) -> dict:
+    """chunk_id -> 메타 에서 활동 id -> {'hash': 내용 해시, 'chunk_ids': [...]} 재구성"""
+    rows = {}
+    for cid, m in meta.items():
+        entry = rows.setdefault(str(m["id"]), {"hash": m.get("hash"), "chunk_ids": []})
+        entry["chunk_ids"].append(cid)
+    return rows
+
+def sync_chunk_index(activities_local):
+    """
+    extracurricular 행 변경분만 청크 인덱스에 반영
+    - 활동 텍스트 해시가 바뀐 행: 기존 청크 삭제 후 다시 청크/임베딩
+    - 사라진 행(is_deleted=1 포함): 청크 삭제
+    - 인덱스는 IndexIDMap2(IndexFlatIP), 메타는 chunk_id -> 청크 정보
+    - 청크가 0개인 활동은 청크 메타가 아닌 별도 필드(empty: 활동 id -> 해시)에 기록
+      → 바뀌지 않은 카탈로그면 매번 "변경됨"으로 보지 않고 파일도 다시 쓰지 않음
+    반환: (추가된 청크 수, 삭제된 청크 수)
+    """
+    index, meta, empty = _chunk_index.get_full()
+    if index is None or not isinstance(meta, dict):
+        # 최초 빌드 또는 위치 기반(list) 구버전 메타 -> 전체 재구성
+        index, meta, empty = faiss.IndexIDMap2(faiss.IndexFlatIP(EMBED_DIM)), {}, {}
+    else:
+        # 검색 중인 스냅샷은 건드리지 않도록 복사본에 반영 후 교체
+        index, meta = faiss.clone_index(index), dict(meta)
+
+    old_rows = _chunk_rows_from_meta(meta)
+    for pid, h in empty.items():
+        old_rows.setdefault(pid, {"hash": h, "chunk_ids": []})
+    current = {str(a["id"]): a for a in activities_local}
+    hashes = {pid: hashlib.md5(a["text"].encode("utf-8")).hexdigest() for pid, a in current.items()}
+
+    stale_ids, stale_rows = [], 0
+    for pid, entry in old_rows.items():
+        if pid not in current or entry["hash"] != hashes[pid]:
+            stale_ids.extend(entry["chunk_ids"])
+            stale_rows += 1
+    changed = [a for pid, a in current.items() if old_rows.get(pid, {}).get("hash") != hashes[pid]]
+    if not stale_rows and not changed:
+        return 0, 0
+
+    if stale_ids:
+        index.remove_ids(np.array(stale_ids, dtype="int64"))
+        for cid in stale_ids:
+            meta.pop(cid, None)
+    empty = {pid: h for pid, h in empty.items() if pid in current and h == hashes[pid]}
+
+    next_id = max(meta, default=-1) + 1
+    chunk_texts, new_ids = [], []
+    for act in changed:
+        chunks = chunk_text(act["text"])
+        if not chunks:
+            # 청크 없는 활동: 해시만 기록
+            empty[str(act["id"])] = hashes[str(act["id"])]
+            continue
+        for ck in chunks:
+            meta[next_id] = {"id": act["id"], "title": act["title"], "url": act["url"], "chunk": ck,
+                             "hash": hashes[str(act["id"])]}
             chunk_texts.append(ck)
-            chunk_meta.append({"id": act["id"], "title": act["title"], "url": act["url"], "chunk": ck})
+            new_ids.append(next_id)
+            next_id += 1
 
     if chunk_texts:
-        chunk_embs = np.vstack([get_embedding(ck) for ck in chunk_texts]).astype("float32")
+        chunk_embs = np.vstack(get_embeddings_batch(chunk_texts)).astype("float32")
         chunk_embs /= np.linalg.norm(chunk_embs, axis=1, keepdims=True) + 1e-12
-        index = faiss.IndexFlatIP(chunk_embs.shape[1])
-        index.add(chunk_embs)
-        faiss.write_index(index, str(FAISS_INDEX_FILE))
-        with open(CHUNK_META_FILE, "wb") as f:
-            pickle.dump(chunk_meta, f)
+        index.add_with_ids(chunk_embs, np.array(new_ids, dtype="int64"))
+
+    _chunk_index.publish(index, meta, empty)
+    print(f"[청크 인덱스 동기화] 변경 활동 {len(changed)}개, 추가 청크 {len(new_ids)}개, 삭제 청크 {len(stale_ids)}개")
+    return len(new_ids), len(stale_ids)
+
+def initialize_indexes():
+    activities_local = load_activities_from_db()
 
+    # [CHANGED STEP1] 확장된 프로그램 텍스트 기반 임베딩 (mmap 행렬)
+    program_embeddings_local = _load_program_matrix(activities_local)
+
+    # 청크 인덱스는 바뀐 행만 재청크/재임베딩 (변경 없으면 파일도 건드리지 않음)
+    sync_chunk_index(activities_local)
     return activities_local, program_embeddings_local
 
 def load_indexes():
-    if FAISS_INDEX_FILE.exists() and CHUNK_META_FILE.exists():
-        index = faiss.read_index(str(FAISS_INDEX_FILE))
-        with open(CHUNK_META_FILE, "rb") as f:
-            meta = pickle.load(f)
-        return index, meta
-    return None, None
+    # 디스크에서 매번 읽지 않고 프로세스 단위 스냅샷 반환 (파일이 바뀌면 자동 재로드)
+    return _chunk_index.get()
 
 # -----------------------------
 # 스케줄 파싱 (날짜 포함)
@@ -380,42 +549,6 @@ _KOR_WEEKDAY = {"월":0,"화":1,"수":2,"목":3,"금":4,"토":5,"일":6}
 def _weekday_of(dt: datetime) -> int:
     return dt.weekday()  # 월=0 ... 일=6
 
-def _overlap_by_weekday(schedule, slot):
-    """
-    schedule: {'start': dt, 'end': dt, 'reliable': bool}
-    slot: {'day':'월','startTime':'HH:MM','endTime':'HH:MM'}
-    """
-    if not schedule:
-        return False
-    if not schedule.get("reliable", True):
-        return False
-    try:
-        w = _KOR_WEEKDAY.get((slot.get("day") or "").strip())
-        if w is None:
-            return False
-        start_date = schedule["start"].date()
-        end_date = schedule["end"].date()
-        duration_days = (end_date - start_date).days
-        if duration_days >= SCHEDULE_RELIABLE_DAY_THRESHOLD:
-            return False
-        for d in range(duration_days + 1):
-            day_dt = start_date + timedelta(days=d)
-            if day_dt.weekday() != w:
-                continue
-            if d == 0:
-                a_start = schedule["start"].strftime("%H:%M")
-                a_end = "23:59" if duration_days > 0 else schedule["end"].strftime("%H:%M")
-            elif d == duration_days:
-                a_start = "00:00"
-                a_end = schedule["end"].strftime("%H:%M")
-            else:
-                a_start, a_end = "00:00", "23:59"
-            if _time_overlap_only(a_start, a_end, slot.get("startTime","00:00"), slot.get("endTime","00:00")):
-                return True
-        return False
-    except Exception:
-        return False
-
 SCHEDULE_PATTERNS = [
     r"(\d{4}[.\-\/]\d{2}[.\-\/]\d{2})\s+(\d{2}:\d{2})\s*~\s*(\d{4}[.\-\/]\d{2}[.\-\/]\d{2})\s+(\d{2}:\d{2})"
 ]
@@ -469,39 +602,60 @@ def parse_schedule(text: str):
             return {"start": start_dt, "end": end_dt, "reliable": True}
     return None
 
-def _overlap_dt(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
-    return max(a_start, b_start) < min(a_end, b_end)
-
-def _time_overlap_only(a_start: str, a_end: str, b_start: str, b_end: str) -> bool:
-    """날짜 정보가 없을 때(역호환): 시:분만으로 겹침 판단"""
-    fmt = "%H:%M"
-    s1, e1 = datetime.strptime(a_start, fmt), datetime.strptime(a_end, fmt)
-    s2, e2 = datetime.strptime(b_start, fmt), datetime.strptime(b_end, fmt)
-    return max(s1, s2) < min(e1, e2)
-    
-
-
 # -----------------------------
 # 글로벌 상태 (후속질의 맥락)
 # -----------------------------
-activities = []
-program_embeddings = []  # [CHANGED STEP1] 확장 텍스트 임베딩 캐시
-recent_top5_idx_title_map = {}
-recent_top5_idx_id_map = {}   # 후속 질의에 쓸 수 있는 id
-last_queried_title = None
-last_answered_program = None
+# 활동 카탈로그 스냅샷 (ActivityCatalog) — 다시 로드하면 객체째 교체
+_catalog = None
+# 후속질의 맥락(최근 Top-5, 마지막 질의 제목 등)은 사용자별 세션 상태로 관리 (session_state.py)
+_session_store = create_session_store()
+# 반복/유사 질문 응답 캐시 (response_cache.py), 카탈로그 버전이 바뀌면 자동 폐기
+_response_cache = ResponseCache()
+# /chat 요청이 스레드 풀에서 동시에 들어와도 DB 로드/인덱스 빌드는 한 번만
+_activities_lock = threading.Lock()
 
 # -----------------------------
 # 필드 추출 & 단답
 # -----------------------------
 def extract_fields(text: str) -> dict:
     out = {}
-    for k, pat in FIELD_PATTERNS.items():
-        m = re.search(pat, text)
+    for k, pat in FIELD_REGEXES.items():
+        m = pat.search(text)
         if m:
             out[k] = m.group(1).strip()
     return out
 
+def _activity_fields(act: dict) -> dict:
+    # DB 로딩 시 미리 추출한 필드 사용 (데모/더미 데이터만 즉석 추출)
+    fields = act.get("fields")
+    if fields is None:
+        fields = extract_fields(act.get("text", ""))
+    return fields
+
+class ActivityFieldTable:
+    """
+    활동별 규칙 필드의 컬럼형 테이블 (행 i == activities[i])
+    - mileage: int32 배열 (없으면 0)
+    - columns: 필드명 -> 문자열 리스트 (없으면 "")
+    """
+
+    def __init__(self, acts):
+        fields = [_activity_fields(a) for a in acts]
+        self.mileage = np.array(
+            [int(f["KUM마일리지"]) if str(f.get("KUM마일리지", "")).isdigit() else 0 for f in fields],
+            dtype=np.int32,
+        )
+        self.columns = {k: [f.get(k, "") for f in fields] for k in FIELD_PATTERNS}
+
+    def __len__(self):
+        return len(self.mileage)
+
+    def mileage_mask(self, mileage: int) -> np.ndarray:
+        return self.mileage == mileage
+
+    def row(self, idx: int) -> dict:
+        return {k: col[idx] for k, col in self.columns.items() if col[idx]}
+
 def _short_field_answer(query: str, fields: dict, act: dict = None):
     if not query:
         return None
@@ -517,33 +671,71 @@ def _short_field_answer(query: str, fields: dict, act: dict = None):
     return None
 
 
-def _ensure_activities_loaded():
-    global activities, program_embeddings
-    if not activities:
-        activities, program_embeddings = initialize_indexes()
-
-
-def _get_activity_by_id(program_id):
+class ActivityCatalog:
+    """
+    활동 카탈로그 스냅샷 (행 i는 모든 필드에서 같은 활동)
+    - activities: 활동 dict 튜플
+    - embeddings: (N, d) 정규화 행렬 (mmap)
+    - fields: ActivityFieldTable / schedules: ScheduleIndex
+    - version: (id, 버전) 지문 (응답 캐시 무효화용)
+    전역 _catalog 하나만 교체하므로, 요청마다 참조를 한 번 받아 두면 중간에 다른 카탈로그와 섞이지 않음
+    """
+    __slots__ = ("activities", "embeddings", "fields", "schedules", "version")
+
+    def __init__(self, acts, embs):
+        self.activities = tuple(acts)
+        self.embeddings = embs
+        self.fields = ActivityFieldTable(acts)
+        self.schedules = ScheduleIndex(acts)
+        self.version = hashlib.md5(
+            json.dumps([[str(a.get("id")), _program_version(a)] for a in acts], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def __bool__(self):
+        return bool(self.activities) and len(self.embeddings) > 0
+
+
+def _load_activity_state() -> ActivityCatalog:
+    global _catalog
+    acts, embs = initialize_indexes()
+    _catalog = ActivityCatalog(acts, embs)
+    return _catalog
+
+def _ensure_activities_loaded() -> ActivityCatalog:
+    """현재 카탈로그 스냅샷 (비어 있으면 로드) — 호출한 쪽은 요청이 끝날 때까지 이 참조만 사용"""
+    catalog = _catalog
+    if catalog:
+        return catalog
+    with _activities_lock:
+        # 락을 기다리는 동안 다른 스레드가 이미 로드했을 수 있음
+        catalog = _catalog
+        if not catalog:
+            catalog = _load_activity_state()
+        return catalog
+
+
+def _get_activity_by_id(program_id, acts):
     if program_id is None:
         return None
     pid = str(program_id)
-    for act in activities:
+    for act in acts:
         if str(act.get("id")) == pid:
             return act
     return None
 
 
-def _resolve_program_by_index(query: str):
+def _resolve_program_by_index(query: str, state: dict, acts):
     match = FOLLOWUP_INDEX_PATTERN.search(query or "")
     if not match:
         return None, None
     idx = int(match.group(1))
-    if not recent_top5_idx_id_map:
+    top5_ids = state.get("top5_ids") or []
+    if not top5_ids:
         return None, "최근에 추천해 드린 비교과 목록이 없습니다. 먼저 '비교과 추천해줘' 같이 요청해 주세요."
-    program_id = recent_top5_idx_id_map.get(idx)
+    program_id = top5_ids[idx - 1] if 1 <= idx <= len(top5_ids) else None
     if not program_id:
         return None, f"{idx}번 프로그램은 최근 추천 목록에서 찾을 수 없습니다. 번호를 다시 확인해 주세요."
-    act = _get_activity_by_id(program_id)
+    act = _get_activity_by_id(program_id, acts)
     if act is None:
         return None, "선택한 프로그램 정보를 찾을 수 없습니다. 다시 추천을 요청해 주세요."
     return act, None
@@ -570,7 +762,7 @@ def _tokenize_for_match(text: str):
     return [tok for tok in re.split(r"[^\w가-힣]+", normed) if tok]
 
 
-def _match_program_by_title(query_norm: str, raw_query: str):
+def _match_program_by_title(acts, query_norm: str, raw_query: str, last_queried_title: str = None):
     if not query_norm:
         return None
 
@@ -582,13 +774,13 @@ def _match_program_by_title(query_norm: str, raw_query: str):
                 return True
         return False
 
-    for act in activities:
+    for act in acts:
         if _variants_match(act.get("title", "")):
             return act
 
     query_tokens = set(_tokenize_for_match(raw_query))
     if query_tokens:
-        for act in activities:
+        for act in acts:
             title_tokens = set(_tokenize_for_match(act.get("title", "")))
             if not title_tokens:
                 continue
@@ -601,7 +793,7 @@ def _match_program_by_title(query_norm: str, raw_query: str):
     if last_queried_title:
         if _variants_match(last_queried_title):
             last_norms = set(_title_norm_variants(last_queried_title))
-            for act in activities:
+            for act in acts:
                 if set(_title_norm_variants(act.get("title", ""))) & last_norms:
                     return act
     return None
@@ -676,49 +868,81 @@ def _program_sources(act: dict):
         "url": act.get("url", "")
     }])
 
-def answer_program_question_by_title(query: str):
-    global last_queried_title, last_answered_program
-    last_answered_program = None
+def _llm_deltas(messages, stream: bool = False, **kwargs):
+    """
+    gpt-3.5-turbo 응답을 텍스트 조각으로 yield.
+    - stream=False: 완성된 응답 1개 (기존 동작과 동일)
+    - stream=True : 토큰이 도착하는 대로 (SSE 전송용)
+    """
+    if not stream:
+        resp = client.chat.completions.create(model="gpt-3.5-turbo", temperature=0, messages=messages, **kwargs)
+        yield (resp.choices[0].message.content or "").strip()
+        return
+    resp = client.chat.completions.create(model="gpt-3.5-turbo", temperature=0, messages=messages, stream=True, **kwargs)
+    started = False
+    for event in resp:
+        if not event.choices:
+            continue
+        delta = event.choices[0].delta.content or ""
+        if not started:
+            delta = delta.lstrip()  # 비스트리밍 경로의 strip()과 맞춤
+            started = bool(delta)
+        if delta:
+            yield delta
+
+
+def _prepare_program_answer(query: str, state: dict):
+    """
+    제목/번호로 특정 프로그램을 찾아 규칙 기반으로 답할 수 있으면 답변 문자열을,
+    LLM이 필요하면 (None, messages, candidate)를 반환.
+    """
+    state["last_answered_program_id"] = None
     if not query:
-        return "자료에 없음"
+        return "자료에 없음", None, None
 
-    _ensure_activities_loaded()
+    acts = _ensure_activities_loaded().activities
 
-    candidate, index_message = _resolve_program_by_index(query)
+    candidate, index_message = _resolve_program_by_index(query, state, acts)
     if index_message:
-        return index_message
+        return index_message, None, None
 
     if not candidate:
         norm_query = _normalize(query)
-        candidate = _match_program_by_title(norm_query, query)
+        candidate = _match_program_by_title(acts, norm_query, query, state.get("last_queried_title"))
 
     if not candidate:
-        return "자료에 없음"
+        return "자료에 없음", None, None
 
-    last_queried_title = candidate.get("title") or last_queried_title
+    state["last_queried_title"] = candidate.get("title") or state.get("last_queried_title")
 
-    fields = extract_fields(candidate.get("text", ""))
+    fields = _activity_fields(candidate)
     short = _short_field_answer(query, fields, candidate)
     if short:
-        last_answered_program = candidate
-        return short
+        state["last_answered_program_id"] = candidate.get("id")
+        return short, None, candidate
 
     overview = _format_program_details(candidate, fields)
     if overview:
-        last_answered_program = candidate
-        return overview
+        state["last_answered_program_id"] = candidate.get("id")
+        return overview, None, candidate
 
     prompt = f"[활동정보]\n{candidate.get('text','')}\n\n[질문]\n{query}\n\n자료에 기반해 1~2문장으로 답하세요."
-    resp = client.chat.completions.create(
-        model="gpt-3.5-turbo", temperature=0, max_tokens=150,
-        messages=[
-            {"role": "system", "content": "간단한 비교과 안내 도우미"},
-            {"role": "user", "content": prompt},
-        ],
-    )
-    answer = resp.choices[0].message.content.strip()
+    messages = [
+        {"role": "system", "content": "간단한 비교과 안내 도우미"},
+        {"role": "user", "content": prompt},
+    ]
+    return None, messages, candidate
+
+
+def answer_program_question_by_title(query: str, state: dict):
+    """state: 사용자 세션 상태 (후속질의 맥락, SessionStore.load() 또는 new_state())"""
+    answer, messages, candidate = _prepare_program_answer(query, state)
+    if messages is None:
+        return answer
+
+    answer = "".join(_llm_deltas(messages, max_tokens=150))
     if answer:
-        last_answered_program = candidate
+        state["last_answered_program_id"] = candidate.get("id")
         return answer
     return "자료에 없음"
 
@@ -726,7 +950,7 @@ def answer_program_question_by_title(query: str):
 # 추천 검색 (Top-5) - 시간표 필터 부분만 교체
 # -----------------------------
 def _format_recommendation_line(rank: int, act: dict):
-    fields = extract_fields(act.get("text", ""))
+    fields = _activity_fields(act)
     bits = []
     if fields.get("신청기간"):
         bits.append(f"신청 {fields['신청기간']}")
@@ -739,17 +963,18 @@ def _format_recommendation_line(rank: int, act: dict):
     return f"{rank}번) {title} - {detail}"
 
 
-def _convert_candidates_to_output(candidates, topk=5):
+def _convert_candidates_to_output(candidates, acts, topk=5):
+    # candidates: 점수 내림차순으로 이미 정렬된 (idx, id, title, score) 목록 (_select_topk 결과)
     if not candidates:
         return "", [], []
-    ordered = sorted(candidates, key=lambda x: x[3], reverse=True)[:topk]
+    ordered = candidates[:topk]
     friendly_lines = []
     if ordered:
         friendly_lines.append("지금 추천드릴 만한 프로그램을 정리해 봤어요:")
     ids_out = [tid for _, tid, _, _ in ordered]
     structured = []
     for display_idx, (idx, tid, title, _) in enumerate(ordered, start=1):
-        act = activities[idx]
+        act = acts[idx]
         friendly_lines.append(_format_recommendation_line(display_idx, act))
         structured.append({
             "id": tid,
@@ -797,13 +1022,143 @@ def _build_program_schedule(act: dict):
         return {"start": start_dt, "end": end_dt, "reliable": reliable}
     return parse_schedule(act.get("text"))
 
-def search_top5_programs_with_explanation(query: str, user_profile: dict):
-    global recent_top5_idx_title_map, recent_top5_idx_id_map, last_queried_title
+# -----------------------------
+# 시간표 충돌 인덱스 (정수 분 단위 구간)
+# -----------------------------
+# - 프로그램 일정은 로딩 시 1회: 절대시각(epoch 분) / 요일 기준(주 단위 분) / 시:분(하루 단위 분) 구간으로 변환
+# - 사용자 시간표는 요청당 1회: 같은 표현으로 정규화 후 정렬·병합
+# - 충돌 판단은 searchsorted 기반 벡터 연산 (겹침 기준은 기존과 동일: max(시작) < min(종료))
+MINUTES_PER_DAY = 24 * 60
+_EPOCH = datetime(1970, 1, 1)
+
+def _epoch_minute(dt: datetime) -> int:
+    return (dt - _EPOCH) // timedelta(minutes=1)
+
+def _minute_of_day(dt: datetime) -> int:
+    return dt.hour * 60 + dt.minute
+
+def _hhmm_to_minute(s: str) -> int:
+    return _minute_of_day(datetime.strptime(s, "%H:%M"))
+
+def _merge_intervals(intervals):
+    """(start, end) 목록 -> 정렬·병합된 (starts, ends) 배열 (길이 0 이하 구간은 버림)"""
+    starts, ends = [], []
+    for s, e in sorted(iv for iv in intervals if iv[0] < iv[1]):
+        if starts and s <= ends[-1]:
+            ends[-1] = max(ends[-1], e)
+        else:
+            starts.append(s)
+            ends.append(e)
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+def _overlaps_any(x: np.ndarray, y: np.ndarray, merged) -> np.ndarray:
+    """구간 배열 (x, y) 각각이 병합된 구간 중 하나와 겹치는지 (원소당 O(log S))"""
+    starts, ends = merged
+    if starts.size == 0:
+        return np.zeros(x.shape, dtype=bool)
+    i = np.searchsorted(starts, y, side="left") - 1  # y 이전에 시작하는 마지막 구간
+    hit = (i >= 0) & (ends[np.maximum(i, 0)] > x)
+    return hit & (x < y)
+
+def normalize_timetable(user_slots):
+    """
+    사용자 시간표 -> {'abs': 병합구간(epoch 분), 'week': 병합구간(주 단위 분), 'tod': 병합구간(하루 단위 분)}
+    지원 슬롯: {'start','end'} / {'startDay','startTime','endDay','endTime'} / {'day','startTime','endTime'} / {'startTime','endTime'}
+    해석할 수 없는 슬롯은 기존과 같이 무시
+    """
+    abs_iv, week_iv, tod_iv = [], [], []
+    for slot in user_slots or []:
+        try:
+            if "start" in slot and "end" in slot:
+                # 날짜 포함 슬롯: "YYYY-MM-DD HH:MM"
+                def _parse_slot_dt(s):
+                    s = s.strip().replace("/", "-").replace(".", "-")
+                    return datetime.strptime(s, "%Y-%m-%d %H:%M")
+                abs_iv.append((_epoch_minute(_parse_slot_dt(slot["start"])), _epoch_minute(_parse_slot_dt(slot["end"]))))
+            elif {"startDay","startTime","endDay","endTime"} <= set(slot.keys()):
+                # 날짜/시간 분리 슬롯
+                b_start = _parse_datetime(slot["startDay"].replace("-", ".").replace("/", "."), slot["startTime"])
+                b_end   = _parse_datetime(slot["endDay"].replace("-", ".").replace("/", "."), slot["endTime"])
+                abs_iv.append((_epoch_minute(b_start), _epoch_minute(b_end)))
+            elif {"day","startTime","endTime"} <= set(slot.keys()):
+                # 요일 기반 슬롯
+                w = _KOR_WEEKDAY.get((slot.get("day") or "").strip())
+                if w is None:
+                    continue
+                base = w * MINUTES_PER_DAY
+                week_iv.append((base + _hhmm_to_minute(slot.get("startTime","00:00")),
+                                base + _hhmm_to_minute(slot.get("endTime","00:00"))))
+            else:
+                # 날짜 없는 구형 슬롯: {'startTime':'HH:MM','endTime':'HH:MM'}
+                tod_iv.append((_hhmm_to_minute(slot.get("startTime","00:00")),
+                               _hhmm_to_minute(slot.get("endTime","00:00"))))
+        except Exception:
+            pass
+    return {"abs": _merge_intervals(abs_iv), "week": _merge_intervals(week_iv), "tod": _merge_intervals(tod_iv)}
+
+class ScheduleIndex:
+    """
+    활동 일정의 정수 구간 테이블 (행 i == activities[i])
+    - reliable: 충돌 판단에 쓸 수 있는 일정(3일 미만)이 있는지
+    - abs_*: epoch 분, tod_*: 시작/종료 시:분, week_*: 요일별 구간(최대 3일 -> (N, 3))
+    """
+    MAX_DAYS = SCHEDULE_RELIABLE_DAY_THRESHOLD
+
+    def __init__(self, acts):
+        n = len(acts)
+        self.reliable = np.zeros(n, dtype=bool)
+        self.abs_start = np.zeros(n, dtype=np.int64)
+        self.abs_end = np.zeros(n, dtype=np.int64)
+        self.tod_start = np.zeros(n, dtype=np.int64)
+        self.tod_end = np.zeros(n, dtype=np.int64)
+        self.week_start = np.zeros((n, self.MAX_DAYS), dtype=np.int64)  # 빈 칸은 (0, 0) -> 겹침 없음
+        self.week_end = np.zeros((n, self.MAX_DAYS), dtype=np.int64)
+        for i, act in enumerate(acts):
+            schedule = _build_program_schedule(act)
+            if not schedule or not schedule.get("reliable", True):
+                continue
+            start, end = schedule["start"], schedule["end"]
+            self.reliable[i] = True
+            self.abs_start[i], self.abs_end[i] = _epoch_minute(start), _epoch_minute(end)
+            self.tod_start[i], self.tod_end[i] = _minute_of_day(start), _minute_of_day(end)
+            duration_days = (end.date() - start.date()).days
+            for d in range(min(duration_days + 1, self.MAX_DAYS)):
+                if d == 0:
+                    a_start = _minute_of_day(start)
+                    a_end = MINUTES_PER_DAY - 1 if duration_days > 0 else _minute_of_day(end)
+                elif d == duration_days:
+                    a_start, a_end = 0, _minute_of_day(end)
+                else:
+                    a_start, a_end = 0, MINUTES_PER_DAY - 1
+                base = (start + timedelta(days=d)).weekday() * MINUTES_PER_DAY
+                self.week_start[i, d] = base + a_start
+                self.week_end[i, d] = base + a_end
+
+    def conflict_mask(self, timetable) -> np.ndarray:
+        """normalize_timetable 결과와 겹치는 활동 True"""
+        hit = _overlaps_any(self.abs_start, self.abs_end, timetable["abs"])
+        hit |= _overlaps_any(self.week_start, self.week_end, timetable["week"]).any(axis=1)
+        hit |= _overlaps_any(self.tod_start, self.tod_end, timetable["tod"])
+        return hit & self.reliable
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype="float32").reshape(-1)
+    return v / (np.linalg.norm(v) + 1e-12)
+
+def _select_topk(scores: np.ndarray, mask: np.ndarray, acts, topk: int = 5):
+    """mask가 True인 후보 중 점수 상위 topk를 argpartition으로 골라 내림차순 (idx, id, title, score) 반환"""
+    cand = np.flatnonzero(mask)
+    if cand.size == 0:
+        return []
+    if cand.size > topk:
+        cand = cand[np.argpartition(-scores[cand], topk - 1)[:topk]]
+    cand = cand[np.argsort(-scores[cand], kind="stable")]
+    return [(int(i), acts[i]["id"], acts[i]["title"], float(scores[i])) for i in cand]
 
-    # (지연 초기화) activities가 비었으면 초기화
-    global activities, program_embeddings
-    if not activities or not program_embeddings:
-        activities, program_embeddings = initialize_indexes()
+def search_top5_programs_with_explanation(query: str, user_profile: dict, state: dict):
+    # (지연 초기화) 카탈로그가 비었으면 초기화, 이 요청은 끝까지 같은 스냅샷 사용
+    catalog = _ensure_activities_loaded()
+    acts = catalog.activities
 
     interest_text = " ".join(user_profile.get("interests", [])) if user_profile.get("interests") else ""
     query_for_emb = query
@@ -821,71 +1176,34 @@ def search_top5_programs_with_explanation(query: str, user_profile: dict):
     if query.strip() in generic_queries:
         alpha, beta = 0.5, 0.5
 
-    scored = []
-    scored_all = []
-    for idx, act in enumerate(activities):
-        schedule = _build_program_schedule(act)  # {'start': dt, 'end': dt} 또는 None
-
-        # --- 날짜/요일 포함 겹침 체크 ---
-        has_conflict = False
-        user_slots = user_profile.get("timetable") or []
-        if schedule and schedule.get("reliable", True):
-            for slot in user_slots:
-                try:
-                    if "start" in slot and "end" in slot:
-                        # 날짜 포함 슬롯: "YYYY-MM-DD HH:MM"
-                        def _parse_slot_dt(s):
-                            s = s.strip().replace("/", "-").replace(".", "-")
-                            return datetime.strptime(s, "%Y-%m-%d %H:%M")
-                        b_start = _parse_slot_dt(slot["start"])
-                        b_end   = _parse_slot_dt(slot["end"])
-                        if _overlap_dt(schedule["start"], schedule["end"], b_start, b_end):
-                            has_conflict = True
-                            break
-                    elif {"startDay","startTime","endDay","endTime"} <= set(slot.keys()):
-                        # 날짜/시간 분리 슬롯
-                        b_start = _parse_datetime(slot["startDay"].replace("-", ".").replace("/", "."), slot["startTime"])
-                        b_end   = _parse_datetime(slot["endDay"].replace("-", ".").replace("/", "."), slot["endTime"])
-                        if _overlap_dt(schedule["start"], schedule["end"], b_start, b_end):
-                            has_conflict = True
-                            break
-                    elif {"day","startTime","endTime"} <= set(slot.keys()):
-                        # 요일 기반 슬롯
-                        if _overlap_by_weekday(schedule, slot):
-                            has_conflict = True
-                            break
-                    else:
-                        # 날짜 없는 구형 슬롯: {'startTime':'HH:MM','endTime':'HH:MM'}
-                        if _time_overlap_only(schedule["start"].strftime("%H:%M"),
-                                              schedule["end"].strftime("%H:%M"),
-                                              slot.get("startTime","00:00"),
-                                              slot.get("endTime","00:00")):
-                            has_conflict = True
-                            break
-                except Exception:
-                    pass
-        # --- 마일리지 필터 ---
-        fields = extract_fields(act["text"])
-        if mileage_filter and int(fields.get("KUM마일리지","0")) != mileage_filter:
-            continue
-
-        # --- 스코어 ---
-        prog_emb = program_embeddings[idx]
-        qsim = float(cosine_similarity(prog_emb, query_emb)[0][0])
-        isim = float(cosine_similarity(prog_emb, interest_emb)[0][0]) if interest_emb is not None else 0.0
-        score = alpha*qsim + beta*isim
-        candidate = (idx, act["id"], act["title"], score)
-        scored_all.append(candidate)
-        if not has_conflict:
-            scored.append(candidate)
-
-    reco_text, ids_out, structured = _convert_candidates_to_output(scored)
-    fallback_text, _, fallback_structured = _convert_candidates_to_output(scored_all)
+    # --- 스코어: 정규화 행렬 · (alpha*q + beta*i) 한 번의 행렬-벡터 곱 ---
+    # 임베딩 행렬 행이 L2 정규화되어 있으므로 내적 == 코사인 유사도
+    weight = alpha * _unit(query_emb)
+    if interest_emb is not None:
+        weight = weight + beta * _unit(interest_emb)
+    scores = np.asarray(catalog.embeddings, dtype="float32") @ weight
+
+    # --- 마스크: 마일리지 필터 / 시간표 충돌 ---
+    if mileage_filter:
+        mileage_ok = catalog.fields.mileage_mask(mileage_filter)
+    else:
+        mileage_ok = np.ones(len(acts), dtype=bool)
+    user_slots = user_profile.get("timetable") or []
+    if user_slots:
+        no_conflict = ~catalog.schedules.conflict_mask(normalize_timetable(user_slots))
+    else:
+        no_conflict = np.ones(len(acts), dtype=bool)
+
+    scored = _select_topk(scores, mileage_ok & no_conflict, acts)
+    scored_all = _select_topk(scores, mileage_ok, acts)
+
+    reco_text, ids_out, structured = _convert_candidates_to_output(scored, acts)
+    fallback_text, _, fallback_structured = _convert_candidates_to_output(scored_all, acts)
 
     if structured:
-        recent_top5_idx_title_map = {i+1: item["title"] for i, item in enumerate(structured)}
-        recent_top5_idx_id_map    = {i+1: item["id"] for i, item in enumerate(structured)}
-        last_queried_title = structured[0]["title"]
+        state["top5_titles"] = [item["title"] for item in structured]
+        state["top5_ids"]    = [item["id"] for item in structured]
+        state["last_queried_title"] = structured[0]["title"]
 
     return reco_text, ids_out, structured, fallback_structured, fallback_text
 
@@ -894,22 +1212,21 @@ def search_top5_programs_with_explanation(query: str, user_profile: dict):
 # -----------------------------
 def search_chunks(query: str, topk=5):
     index, meta = load_indexes()
-    if not index: return []
+    if index is None: return []
     q_emb = get_embedding(query).astype("float32")
     q_emb /= np.linalg.norm(q_emb, axis=1, keepdims=True) + 1e-12  # 쿼리도 정규화
     D, I = index.search(q_emb, topk)  # IP 점수 = 코사인 유사도와 단조 일치
-    return [meta[i] for i in I[0] if i < len(meta)]
+    return [meta[i] for i in I[0] if i in meta]  # I는 chunk_id (IndexIDMap2)
 
 def build_context(chunks): 
     return "\n\n".join(c["chunk"] for c in chunks)[:2000]
 
-def generate_answer(query, context, sources):
+def _rag_messages(query, context):
     prompt = f"질문: {query}\n\n참고자료:\n{context}\n\n위 자료만 근거로 답하세요."
-    resp = client.chat.completions.create(
-        model="gpt-3.5-turbo", temperature=0,
-        messages=[{"role":"system","content":"비교과 챗봇"},{"role":"user","content":prompt}]
-    )
-    ans = resp.choices[0].message.content.strip()
+    return [{"role":"system","content":"비교과 챗봇"},{"role":"user","content":prompt}]
+
+def generate_answer(query, context, sources):
+    ans = "".join(_llm_deltas(_rag_messages(query, context)))
     return {"answer": ans, "sources": [{"id": s["id"], "title": s["title"], "url": s["url"]} for s in sources]}
 
 # -----------------------------
@@ -919,7 +1236,7 @@ def evaluate(golden, user_profile):
     hits, mrr, ndcg, recall1, total = 0,0,0,0,0
     for g in golden:
         q, expected = g["query"], g["expected_title"]
-        _, _, recos, _, _ = search_top5_programs_with_explanation(q, user_profile)
+        _, _, recos, _, _ = search_top5_programs_with_explanation(q, user_profile, new_state())
         titles = [r["title"] for r in recos]
         total += 1
         if expected in titles: hits += 1
@@ -961,13 +1278,10 @@ def _demo_conflict_logic():
         }
     ]
 
-    for prog in dummy_programs:
+    conflicts = ScheduleIndex(dummy_programs).conflict_mask(normalize_timetable(user_slots))
+    for prog, conflict in zip(dummy_programs, conflicts):
         schedule = _build_program_schedule(prog)
-        slot = user_slots[0]
-        conflict = False
-        if schedule and schedule.get("reliable", True):
-            conflict = _overlap_by_weekday(schedule, slot)
-        print(f"[데모] {prog['title']} -> schedule={schedule}, conflict={conflict}")
+        print(f"[데모] {prog['title']} -> schedule={schedule}, conflict={bool(conflict)}")
 
 
 def _demo_followup_sequence():
@@ -983,7 +1297,7 @@ def _demo_followup_sequence():
     ]
     for idx, q in enumerate(questions, start=1):
         print(f"\n[{idx}] 질문: {q}")
-        resp = api_run(demo_profile, q)
+        resp = api_run(demo_profile, q, session_id="demo")
         print(resp.get("answer"))
 
 
@@ -991,20 +1305,129 @@ def _demo_followup_sequence():
 # FastAPI 연동용 Wrapper
 # -----------------------------
 def initialize_activities():
-    global activities, program_embeddings
-    activities, program_embeddings = initialize_indexes()
+    with _activities_lock:
+        _load_activity_state()
+
+def api_run(user_profile: dict, user_question: str, session_id=None):
+    # 사용자별 대화 상태 (기본 키: ChatRequest.id == user_profile["id"])
+    if session_id is None:
+        session_id = user_profile.get("id")
+    state = _session_store.load(session_id)
+    try:
+        return _api_run(user_profile, user_question, state)
+    finally:
+        _session_store.save(session_id, state)
+
+def _api_run(user_profile: dict, user_question: str, state: dict):
+    answer, sources = [], []
+    for kind, payload in _cached_events(user_profile, user_question, state):
+        if kind == "delta":
+            answer.append(payload)
+        else:
+            sources = payload
+    return {"answer": "".join(answer), "sources": sources}
+
+
+def api_run_stream(user_profile: dict, user_question: str, session_id=None):
+    """
+    /chat/stream 용 이벤트 생성기
+    - ("delta", 텍스트): 규칙 기반 답변/추천 목록은 한 번에, LLM 답변은 토큰 단위로
+    - ("sources", [...]): 마지막에 1번
+    """
+    if session_id is None:
+        session_id = user_profile.get("id")
+    state = _session_store.load(session_id)
+    try:
+        yield from _cached_events(user_profile, user_question, state, stream=True)
+    finally:
+        _session_store.save(session_id, state)
+
+
+def response_cache_stats():
+    return _response_cache.stats()
+
+
+# 미스 답변 저장용 (질문 임베딩을 응답 경로 밖에서 구함)
+_cache_put_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-cache")
+
+def _cache_put(question, bucket, version, value, text):
+    try:
+        vec = get_embedding(text)  # RAG 경로를 탔다면 디스크 캐시 적중
+    except Exception:
+        vec = None  # 정확 일치로만 재사용
+    _response_cache.put(question, bucket, version, value, vec)
+
+def _cached_events(user_profile: dict, user_question: str, state: dict, stream: bool = False):
+    """
+    응답 캐시를 거치는 _api_run_events
+    - 적중: 저장된 답변/출처를 바로 내보내고, 그때의 대화 상태(Top-5 등)를 세션에 복원
+    - 미스: 파이프라인을 실행하며 그대로 내보내고 끝나면 저장
+      (조회 때 벡터를 못 구했으면 임베딩은 백그라운드에서 → 미스 요청에 API 왕복 추가 없음)
+    """
+    question = _normalize(user_question)
+    if not CACHE_ENABLED or not question:
+        yield from _api_run_events(user_profile, user_question, state, stream=stream)
+        return
+
+    version = _ensure_activities_loaded().version
+    bucket = bucket_key(user_profile, state)
+    cached, vec = _response_cache.get(
+        question, bucket, version,
+        embed=lambda _q: get_embedding(user_question),
+    )
+    if cached is not None:
+        state.update({k: (list(v) if isinstance(v, list) else v) for k, v in cached["state"].items()})
+        yield "delta", cached["answer"]
+        yield "sources", cached["sources"]
+        return
+
+    answer, sources = [], []
+    for kind, payload in _api_run_events(user_profile, user_question, state, stream=stream):
+        if kind == "delta":
+            answer.append(payload)
+        else:
+            sources = payload
+        yield kind, payload
+
+    value = {
+        "answer": "".join(answer),
+        "sources": sources,
+        "state": {k: (list(v) if isinstance(v, list) else v) for k, v in state.items() if k in new_state()},
+    }
+    if vec is not None:
+        _response_cache.put(question, bucket, version, value, vec)
+    else:
+        _cache_put_pool.submit(_cache_put, question, bucket, version, value, user_question)
+
 
-def api_run(user_profile: dict, user_question: str):
+def _api_run_events(user_profile: dict, user_question: str, state: dict, stream: bool = False):
     # 필드 기반 질문이면 우선 처리
-    field_answer = answer_program_question_by_title(user_question)
-    if field_answer != "자료에 없음":
-        sources = _program_sources(last_answered_program)
-        return {"answer": field_answer, "sources": sources}
+    field_answer, llm_messages, candidate = _prepare_program_answer(user_question, state)
+    if llm_messages is not None:
+        # 규칙으로 답할 수 없는 프로그램 질문 → LLM 1~2문장 답변
+        answered = False
+        for delta in _llm_deltas(llm_messages, stream=stream, max_tokens=150):
+            if delta:
+                answered = True
+                yield "delta", delta
+        if answered:
+            state["last_answered_program_id"] = candidate.get("id")
+            yield "sources", _program_sources(candidate)
+            return
+    elif field_answer != "자료에 없음":
+        sources = _program_sources(
+            _get_activity_by_id(state.get("last_answered_program_id"), _ensure_activities_loaded().activities)
+        )
+        yield "delta", field_answer
+        yield "sources", sources
+        return
 
     # 추천 Top-5
-    reco_text, _, reco_structured, fallback_structured, fallback_text = search_top5_programs_with_explanation(user_question, user_profile)
+    reco_text, _, reco_structured, fallback_structured, fallback_text = search_top5_programs_with_explanation(user_question, user_profile, state)
     if reco_structured:
-        return {"answer": reco_text, "sources": _normalize_sources(reco_structured)}
+        yield "delta", reco_text
+        yield "sources", _normalize_sources(reco_structured)
+        return
     
     if fallback_structured:
         interests_desc = ", ".join(user_profile.get("interests", [])) if user_profile.get("interests") else "없음"
@@ -1017,19 +1440,24 @@ def api_run(user_profile: dict, user_question: str):
             notice_lines.append(f"현재 바쁜 시간: {busy_desc}")
         notice_lines.append("대신 관심사에 가까운 후보를 안내드릴게요. 실제 일정과 충돌하지 않는지 한 번만 더 확인해 주세요!")
         fallback_answer = "\n".join(notice_lines) + "\n\n" + fallback_text
-        return {"answer": fallback_answer, "sources": _normalize_sources(fallback_structured)}
+        yield "delta", fallback_answer
+        yield "sources", _normalize_sources(fallback_structured)
+        return
 
     # RAG 검색
     chunks = search_chunks(user_question, topk=5)
     if not chunks:
-        return {"answer": "조건에 맞는 자료를 찾을 수 없습니다.", "sources": []}
+        yield "delta", "조건에 맞는 자료를 찾을 수 없습니다."
+        yield "sources", []
+        return
     context = build_context(chunks)
     
     profile_hint = _build_profile_hint(user_profile)
     enriched_question = f"{user_question}\n\n[사용자 프로필]\n{profile_hint}" if profile_hint else user_question
-    rag = generate_answer(enriched_question, context, chunks)   
-    rag["sources"] = _normalize_sources(rag.get("sources")) 
-    return rag
+    for delta in _llm_deltas(_rag_messages(enriched_question, context), stream=stream):
+        yield "delta", delta
+    sources = [{"id": c["id"], "title": c["title"], "url": c["url"]} for c in chunks]
+    yield "sources", _normalize_sources(sources)
 
 if __name__ == "__main__" and os.getenv("RUN_CONFLICT_DEMO") == "1":
     _demo_conflict_logic()
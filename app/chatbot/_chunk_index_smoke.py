@@ -0,0 +1,26 @@
+# 파일: app/chatbot/_chunk_index_smoke.py
+# 사용 예: python -m app.chatbot._chunk_index_smoke
+# - publish 한 인덱스/메타를 새 ChunkIndexHolder(다른 워커, 재시작과 같은 상황)가 그대로 읽는지 확인
+import tempfile
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from app.chatbot.chunk_index import ChunkIndexHolder
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as d:
+        index_path, meta_path = Path(d) / "faiss.index", Path(d) / "chunk_meta.pkl"
+
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(4))
+        index.add_with_ids(np.eye(1, 4, dtype="float32"), np.array([0], dtype="int64"))
+        meta = {0: {"id": 1, "title": "A", "url": "", "chunk": "hello", "hash": "h1"}}
+        empty = {"2": "h2"}  # 청크 없는 활동
+
+        ChunkIndexHolder(index_path, meta_path).publish(index, meta, empty)
+
+        loaded_index, loaded_meta, loaded_empty = ChunkIndexHolder(index_path, meta_path).get_full()
+        assert loaded_index is not None, "새 holder가 publish 된 파일을 읽지 못함"
+        assert loaded_index.ntotal == 1 and loaded_meta == meta and loaded_empty == empty
+        print("[OK] publish -> fresh holder load")
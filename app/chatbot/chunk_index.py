@@ -0,0 +1,86 @@
+import os, pickle, threading, time
+from pathlib import Path
+import faiss
+
+# -----------------------------
+# 프로세스 단위 청크 인덱스 보관소
+# -----------------------------
+# - FAISS 인덱스/청크 메타를 최초 1회만 역직렬화 (가능하면 IO_FLAG_MMAP)
+# - 파일 mtime/size가 바뀌면 다음 get()에서 다시 로드 (핫 리로드)
+# - (index, meta)를 튜플 하나로 교체하므로 동시 요청이 반쯤 로드된 상태를 보지 않음
+# - 메타 파일: {"chunks": chunk_id -> 청크 정보, "empty": 청크 없는 활동 id -> 내용 해시}
+#   (구버전: chunk_id -> 청크 정보 dict 그대로)
+
+
+def _read_index(path: Path):
+    try:
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP)
+    except Exception:
+        # mmap을 지원하지 않는 인덱스 타입이면 일반 로드
+        return faiss.read_index(str(path))
+
+
+class ChunkIndexHolder:
+    def __init__(self, index_path: Path, meta_path: Path, check_interval: float = 1.0):
+        self.index_path = Path(index_path)
+        self.meta_path = Path(meta_path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = (None, None, {})
+        self._loaded_stamp = None
+        self._checked_at = float("-inf")
+
+    def _stamp(self):
+        try:
+            si, sm = os.stat(self.index_path), os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return (si.st_mtime_ns, si.st_size, sm.st_mtime_ns, sm.st_size)
+
+    def get(self):
+        """(index, meta) 또는 (None, None)"""
+        return self.get_full()[:2]
+
+    def get_full(self):
+        """(index, meta, 청크 없는 활동 해시) 또는 (None, None, {})"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            stamp = self._stamp()
+            if stamp != self._loaded_stamp:
+                self._reload(stamp)
+        return self._snapshot
+
+    def _reload(self, stamp):
+        with self._lock:
+            if stamp == self._loaded_stamp:
+                return
+            if stamp is None:
+                self._snapshot, self._loaded_stamp = (None, None, {}), None
+                return
+            try:
+                index = _read_index(self.index_path)
+                with open(self.meta_path, "rb") as f:
+                    payload = pickle.load(f)
+            except Exception:
+                return  # 쓰는 중이면 기존 스냅샷 유지, 다음 확인 때 재시도
+            if isinstance(payload, dict) and "chunks" in payload:
+                meta, empty = payload["chunks"], payload.get("empty") or {}
+            else:
+                meta, empty = payload, {}
+            if index.ntotal != len(meta):
+                return  # 인덱스/메타 중 하나만 교체된 상태
+            self._snapshot, self._loaded_stamp = (index, meta, empty), stamp
+
+    def publish(self, index, meta, empty=None):
+        """임시 파일에 쓴 뒤 os.replace로 교체하고 메모리 스냅샷도 바로 갱신"""
+        empty = empty or {}
+        with self._lock:
+            tmp_index = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_meta = self.meta_path.with_suffix(f".{os.getpid()}.tmp")
+            faiss.write_index(index, str(tmp_index))
+            with open(tmp_meta, "wb") as f:
+                pickle.dump({"chunks": meta, "empty": empty}, f)
+            os.replace(tmp_index, self.index_path)
+            os.replace(tmp_meta, self.meta_path)
+            self._snapshot, self._loaded_stamp = (index, meta, empty), self._stamp()
@@ -0,0 +1,259 @@
+import os, threading
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 로컬 개발 환경: 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+# -----------------------------
+# 추가 전용(append-only) 임베딩 저장소
+# -----------------------------
+# - 키(md5(text|model))의 첫 글자(hex)로 16개 샤드에 나눠 저장
+# - 레코드 = [16바이트 md5 digest][dim * float32], 고정 길이라 mmap 후 바로 행 단위 접근 가능
+# - 새 벡터는 샤드 파일 끝에 추가만 하고, 중복 레코드는 백그라운드 컴팩션으로 정리
+# - 여러 uvicorn 워커가 동시에 써도 되도록 샤드별 .lock 파일에 flock
+# - 키 인덱스: 정렬된 키 배열 + 행 번호(np.searchsorted)를 샤드별 .idx.npz로 저장해 두고,
+#   시작 시에는 그 뒤에 붙은 꼬리 행만 읽음 (레코드마다 파이썬 dict를 만들지 않음)
+
+SHARD_COUNT = 16
+COMPACT_MIN_ROWS = 1000      # 이보다 작은 샤드는 컴팩션하지 않음
+COMPACT_DUP_RATIO = 0.2      # 중복 레코드 비율이 이 이상이면 컴팩션
+TAIL_MERGE_ROWS = 1024       # 정렬 인덱스 밖의 꼬리 행이 이만큼 쌓이면 합치고 저장
+INDEX_CHECK_SAMPLES = 64     # 저장된 인덱스를 쓰기 전에 세그먼트와 대조할 표본 수
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """샤드별 프로세스 간 배타 잠금 (세그먼트 파일과 별개라 컴팩션 교체에도 안전)"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # close 시 flock 자동 해제
+
+
+class _Shard:
+    def __init__(self, seg_path: Path, lock_path: Path, idx_path: Path):
+        self.seg_path = seg_path
+        self.lock_path = lock_path
+        self.idx_path = idx_path
+        self.mm = None          # np.memmap (읽기 전용)
+        self.rows = 0           # 인덱싱된 행 수 (정렬 배열 + 꼬리)
+        self.ino = None
+        self.keys = np.empty(0, dtype="S16")     # 정렬된 키 (세그먼트 앞쪽 indexed 행까지, 키별 마지막 행)
+        self.key_rows = np.empty(0, dtype=np.int64)
+        self.indexed = 0
+        self.tail = {}          # 16바이트 key -> row (indexed 이후 행)
+        self.count = 0          # 고유 키 수
+        self.dups = 0
+        self.compacting = False
+
+    def reset_index(self):
+        self.rows, self.indexed, self.count, self.dups = 0, 0, 0, 0
+        self.keys, self.key_rows = np.empty(0, dtype="S16"), np.empty(0, dtype=np.int64)
+        self.tail = {}
+
+    def row_of(self, key: bytes):
+        row = self.tail.get(key)
+        if row is None and len(self.keys):
+            i = int(np.searchsorted(self.keys, key))
+            # S16 비교는 끝의 0바이트를 무시하므로 원본 바이트로 확인
+            if i < len(self.keys) and self.keys[i:i + 1].tobytes() == key:
+                row = int(self.key_rows[i])
+        return row
+
+
+class EmbeddingStore:
+    def __init__(self, root: Path, dim: int):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.dtype = np.dtype([("key", "u1", (16,)), ("vec", "<f4", (dim,))])
+        self._mutex = threading.Lock()
+        self._shards = [
+            _Shard(self.root / f"shard-{i:x}.seg", self.root / f"shard-{i:x}.lock", self.root / f"shard-{i:x}.idx.npz")
+            for i in range(SHARD_COUNT)
+        ]
+        for shard in self._shards:
+            self._refresh(shard)
+
+    def __len__(self):
+        return sum(s.count for s in self._shards)
+
+    def _shard_of(self, key: str) -> _Shard:
+        return self._shards[int(key[0], 16) % SHARD_COUNT]
+
+    # ---------- 읽기 ----------
+    def _refresh(self, shard: _Shard):
+        """
+        세그먼트 파일을 다시 mmap.
+        - inode가 바뀌었으면(최초 로드/컴팩션으로 교체) 저장된 정렬 인덱스를 불러와 그 뒤 행만 인덱싱
+        - 크기만 늘었으면(다른 워커의 append) 새로 붙은 행만 인덱싱
+        - 꼬리가 TAIL_MERGE_ROWS 이상이면 정렬 배열에 합치고 .idx.npz 갱신
+        """
+        try:
+            st = os.stat(shard.seg_path)
+        except FileNotFoundError:
+            shard.mm, shard.ino = None, None
+            shard.reset_index()
+            return
+        rows = st.st_size // self.dtype.itemsize  # 쓰다 만 꼬리 레코드는 무시
+        if st.st_ino == shard.ino and rows == shard.rows:
+            return
+        shard.mm = np.memmap(shard.seg_path, dtype=self.dtype, mode="r", shape=(rows,)) if rows else None
+        if st.st_ino != shard.ino:
+            shard.ino = st.st_ino
+            shard.reset_index()
+            self._load_index(shard, rows)
+        start, shard.rows = shard.rows, rows
+        if rows - shard.indexed >= TAIL_MERGE_ROWS:
+            self._merge_tail(shard)
+            return
+        if rows > start:
+            raw = np.ascontiguousarray(shard.mm["key"][start:rows]).tobytes()
+            for i in range(rows - start):
+                k = raw[i * 16:(i + 1) * 16]
+                if shard.row_of(k) is None:
+                    shard.count += 1
+                else:
+                    shard.dups += 1
+                shard.tail[k] = start + i
+
+    def _merge_tail(self, shard: _Shard):
+        """indexed 이후 행을 정렬 키 배열에 합침 (같은 키는 마지막 행) 후 저장"""
+        new_keys = np.ascontiguousarray(shard.mm["key"][shard.indexed:shard.rows]).view("S16").reshape(-1)
+        keys = np.concatenate([shard.keys, new_keys])
+        rows = np.concatenate([shard.key_rows, np.arange(shard.indexed, shard.rows, dtype=np.int64)])
+        order = np.argsort(keys, kind="stable")  # 같은 키 안에서는 행 번호 순서 유지
+        keys, rows = keys[order], rows[order]
+        last = np.append(keys[1:] != keys[:-1], True)
+        shard.keys, shard.key_rows = keys[last], rows[last]
+        shard.indexed, shard.tail = shard.rows, {}
+        shard.count, shard.dups = len(shard.keys), shard.rows - len(shard.keys)
+        self._save_index(shard)
+
+    def _load_index(self, shard: _Shard, rows: int):
+        """저장된 인덱스가 지금 세그먼트(inode, 행 수, 표본 키)와 맞을 때만 사용"""
+        try:
+            with np.load(shard.idx_path) as z:
+                keys, key_rows, (indexed, ino) = z["keys"], z["rows"], z["meta"]
+        except (OSError, ValueError, KeyError):
+            return
+        if int(ino) != shard.ino or int(indexed) > rows or len(keys) != len(key_rows):
+            return
+        if len(keys):
+            if int(key_rows.max()) >= int(indexed):
+                return
+            sample = np.unique(np.linspace(0, len(keys) - 1, num=min(INDEX_CHECK_SAMPLES, len(keys))).astype(np.int64))
+            on_disk = np.ascontiguousarray(shard.mm["key"][key_rows[sample]]).tobytes()
+            if on_disk != keys[sample].tobytes():
+                return
+        shard.keys, shard.key_rows = keys, key_rows
+        shard.rows = shard.indexed = int(indexed)
+        shard.count, shard.dups = len(keys), shard.indexed - len(keys)
+
+    def _save_index(self, shard: _Shard):
+        tmp_path = shard.idx_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, keys=shard.keys, rows=shard.key_rows,
+                         meta=np.array([shard.indexed, shard.ino], dtype=np.uint64))
+            os.replace(tmp_path, shard.idx_path)
+        except OSError:
+            # 인덱스 저장 실패는 다음 시작 때 꼬리를 더 읽을 뿐
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def get(self, key: str):
+        """(1, dim) float32 벡터 또는 None"""
+        shard = self._shard_of(key)
+        raw = bytes.fromhex(key)
+        with self._mutex:
+            row = shard.row_of(raw)
+            if row is None:
+                # 다른 워커가 방금 추가했을 수 있으니 파일 크기만 한 번 확인
+                self._refresh(shard)
+                row = shard.row_of(raw)
+                if row is None:
+                    return None
+            return np.array(shard.mm["vec"][row], dtype="float32").reshape(1, -1)
+
+    # ---------- 쓰기 ----------
+    def put(self, key: str, vec: np.ndarray):
+        self.put_many([(key, vec)])
+
+    def put_many(self, items):
+        """[(hex key, vec)] 를 샤드별로 묶어 한 번씩만 append (차원이 다르면 아무것도 쓰지 않고 ValueError)"""
+        by_shard = {}
+        for key, vec in items:
+            vec = np.asarray(vec, dtype="float32").reshape(-1)
+            if vec.shape[0] != self.dim:
+                raise ValueError(f"임베딩 차원 불일치: key={key}, dim={vec.shape[0]} (기대값 {self.dim})")
+            by_shard.setdefault(int(key[0], 16) % SHARD_COUNT, []).append((key, vec))
+
+        for sid, recs in by_shard.items():
+            shard = self._shards[sid]
+            buf = np.empty(len(recs), dtype=self.dtype)
+            for i, (key, vec) in enumerate(recs):
+                buf["key"][i] = np.frombuffer(bytes.fromhex(key), dtype="u1")
+                buf["vec"][i] = vec
+            self._append(shard, buf.tobytes())
+            with self._mutex:
+                self._refresh(shard)
+            self._maybe_compact(shard)
+
+    def _append(self, shard: _Shard, payload: bytes):
+        rec = self.dtype.itemsize
+        with _file_lock(shard.lock_path):
+            fd = os.open(shard.seg_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size % rec:
+                    # 이전 프로세스가 쓰다 죽은 꼬리 레코드 제거 (정렬 유지)
+                    os.ftruncate(fd, size - size % rec)
+                os.write(fd, payload)
+            finally:
+                os.close(fd)
+
+    # ---------- 컴팩션 ----------
+    def _maybe_compact(self, shard: _Shard):
+        if shard.compacting or shard.rows < COMPACT_MIN_ROWS:
+            return
+        if shard.dups < shard.rows * COMPACT_DUP_RATIO:
+            return
+        shard.compacting = True
+        threading.Thread(target=self._compact, args=(shard,), daemon=True).start()
+
+    def _compact(self, shard: _Shard):
+        """키별 마지막 레코드만 남긴 새 세그먼트로 원자적 교체"""
+        tmp_path = shard.seg_path.with_suffix(".seg.tmp")
+        try:
+            with _file_lock(shard.lock_path):
+                rows = os.path.getsize(shard.seg_path) // self.dtype.itemsize
+                data = np.fromfile(shard.seg_path, dtype=self.dtype, count=rows)
+                last = {}
+                raw = np.ascontiguousarray(data["key"]).tobytes()
+                for i in range(rows):
+                    last[raw[i * 16:(i + 1) * 16]] = i
+                keep = np.fromiter(sorted(last.values()), dtype=np.int64, count=len(last))
+                with open(tmp_path, "wb") as f:
+                    data[keep].tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, shard.seg_path)
+            with self._mutex:
+                self._refresh(shard)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        finally:
+            shard.compacting = False
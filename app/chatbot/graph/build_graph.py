@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env")
 
 import os
+import time
 from urllib.parse import quote_plus
 from sqlalchemy import create_engine, text
 from neo4j import GraphDatabase
@@ -31,106 +32,122 @@ driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
 
 # ---------- Neo4j loaders ----------
+# 행마다 tx.run 하지 않고, 파라미터 리스트를 UNWIND로 한 번에 보냄
+# 배치(GRAPH_BATCH_SIZE행)마다 트랜잭션 1번 → 왕복 수 = 배치 수, 거대한 단일 트랜잭션 없음
+GRAPH_BATCH_SIZE = int(os.getenv("GRAPH_BATCH_SIZE", "1000"))
+
+# MERGE 키에 유니크 제약(=인덱스)이 없으면 MERGE마다 라벨 전체를 스캔함
+CONSTRAINTS = [
+    "CREATE CONSTRAINT program_id IF NOT EXISTS FOR (p:Program) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT member_id IF NOT EXISTS FOR (m:Member) REQUIRE m.id IS UNIQUE",
+    "CREATE CONSTRAINT topic_name IF NOT EXISTS FOR (t:Topic) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT busyblock_id IF NOT EXISTS FOR (b:BusyBlock) REQUIRE b.id IS UNIQUE",
+]
+
+def ensure_constraints(session):
+    for q in CONSTRAINTS:
+        session.run(q).consume()
+
 def load_programs(tx, rows):
     """
     Program 노드 upsert
     - id: program_id (extracurricular.extracurricular_id)
     - program_pk: 내부 PK (extracurricular_pk_id) - 필요시 추적용
     """
-    for r in rows:
-        tx.run("""
-        MERGE (p:Program {id: $program_id})
-          ON CREATE SET p.title=$title,
-                        p.url=$url,
-                        p.description=$description,
-                        p.keywords=$keywords,
-                        p.app_start=$app_start, p.app_end=$app_end,
-                        p.act_start=$act_start, p.act_end=$act_end,
-                        p.program_pk=$program_pk,
-                        p.target_audience=$target_audience,
-                        p.kum_mileage=$kum_mileage,
-                        p.has_certificate=$has_certificate,
-                        p.selection_method=$selection_method,
-                        p.purpose=$purpose,
-                        p.benefits=$benefits,
-                        p.procedure=$procedure
-          ON MATCH  SET p.title=$title,
-                        p.url=$url,
-                        p.description=$description,
-                        p.keywords=$keywords,
-                        p.app_start=$app_start, p.app_end=$app_end,
-                        p.act_start=$act_start, p.act_end=$act_end,
-                        p.program_pk=$program_pk,
-                        p.target_audience=$target_audience,
-                        p.kum_mileage=$kum_mileage,
-                        p.has_certificate=$has_certificate,
-                        p.selection_method=$selection_method,
-                        p.purpose=$purpose,
-                        p.benefits=$benefits,
-                        p.procedure=$procedure
-        """, **r)
+    tx.run("""
+    UNWIND $rows AS row
+    MERGE (p:Program {id: row.program_id})
+    SET p.title=row.title,
+        p.url=row.url,
+        p.description=row.description,
+        p.keywords=row.keywords,
+        p.app_start=row.app_start, p.app_end=row.app_end,
+        p.act_start=row.act_start, p.act_end=row.act_end,
+        p.program_pk=row.program_pk,
+        p.target_audience=row.target_audience,
+        p.kum_mileage=row.kum_mileage,
+        p.has_certificate=row.has_certificate,
+        p.selection_method=row.selection_method,
+        p.purpose=row.purpose,
+        p.benefits=row.benefits,
+        p.procedure=row.procedure
+    """, rows=rows).consume()
 
 def load_members_and_interests(tx, rows):
-    for r in rows:
-        # Member upsert (그대로)
+    # member 행은 관심사 수만큼 반복됨 → Member upsert는 배치 안에서 1번씩만
+    members = list({r["member_id"]: r for r in rows}.values())
+    tx.run("""
+    UNWIND $rows AS row
+    MERGE (m:Member {id: row.member_id})
+    SET m.email=row.email, m.role=row.role,
+        m.academic_status=row.academic_status,
+        m.grade=row.grade, m.college=row.college, m.department=row.department,
+        m.name=row.name
+    """, rows=members).consume()
+
+    # 관심사 연결: 빈 문자열/NULL 방지
+    interests = [
+        {"member_id": r["member_id"], "interest": (r.get("interest") or "").strip()}
+        for r in rows
+        if (r.get("interest") or "").strip()
+    ]
+    if interests:
         tx.run("""
-        MERGE (m:Member {id: $member_id})
-          ON CREATE SET m.email=$email, m.role=$role,
-                        m.academic_status=$academic_status,
-                        m.grade=$grade, m.college=$college, m.department=$department,
-                        m.name=$name
-          ON MATCH  SET m.email=$email, m.role=$role,
-                        m.academic_status=$academic_status,
-                        m.grade=$grade, m.college=$college, m.department=$department,
-                        m.name=$name
-        """, **r)
-
-        # 관심사 연결: 빈 문자열/NULL 방지
-        interest = (r.get("interest") or "").strip()
-        if interest:
-            tx.run("""
-            MATCH (m:Member {id:$member_id})
-            MERGE (t:Topic {name: $interest})
-            MERGE (m)-[:INTERESTS]->(t)
-            """, member_id=r["member_id"], interest=interest)
+        UNWIND $rows AS row
+        MATCH (m:Member {id: row.member_id})
+        MERGE (t:Topic {name: row.interest})
+        MERGE (m)-[:INTERESTS]->(t)
+        """, rows=interests).consume()
 
 def load_timetable(tx, rows):
     """
     BusyBlock upsert + (Member)-[:HAS_BUSY]->(BusyBlock)
     """
-    for r in rows:
-        tx.run("""
-        MERGE (m:Member {id:$member_id})
-        MERGE (b:BusyBlock { id: $timetable_id })
-        SET b.day=$day, b.start_time=$start_time, b.end_time=$end_time,
-            b.event_name=$event_name, b.event_detail=$event_detail, b.color=$color
-        MERGE (m)-[:HAS_BUSY]->(b)
-        """, **r)
+    tx.run("""
+    UNWIND $rows AS row
+    MERGE (m:Member {id: row.member_id})
+    MERGE (b:BusyBlock {id: row.timetable_id})
+    SET b.day=row.day, b.start_time=row.start_time, b.end_time=row.end_time,
+        b.event_name=row.event_name, b.event_detail=row.event_detail, b.color=row.color
+    MERGE (m)-[:HAS_BUSY]->(b)
+    """, rows=rows).consume()
 
 def load_member_program_edges(tx, rows):
     """
     (Member)-[:HAS_SCHEDULE]->(Program)
     - schedule 테이블 중 extracurricular_id NOT NULL만
     """
-    for r in rows:
-        tx.run("""
-        MERGE (m:Member {id:$member_id})
-        MERGE (p:Program {id:$program_id})
-        MERGE (m)-[r:HAS_SCHEDULE {schedule_id:$schedule_id}]->(p)
-        SET r.start_date=$start_date, r.end_date=$end_date, r.title=$title
-        """, **r)
+    tx.run("""
+    UNWIND $rows AS row
+    MERGE (m:Member {id: row.member_id})
+    MERGE (p:Program {id: row.program_id})
+    MERGE (m)-[r:HAS_SCHEDULE {schedule_id: row.schedule_id}]->(p)
+    SET r.start_date=row.start_date, r.end_date=row.end_date, r.title=row.title
+    """, rows=rows).consume()
 
 def load_reviews(tx, rows):
     """
     (Member)-[:REVIEWED]->(Program)
     """
-    for r in rows:
-        tx.run("""
-        MERGE (m:Member {id:$member_id})
-        MERGE (p:Program {id:$program_id})
-        MERGE (m)-[rv:REVIEWED {id:$review_id}]->(p)
-        SET rv.star=$star, rv.content=$content
-        """, **r)
+    tx.run("""
+    UNWIND $rows AS row
+    MERGE (m:Member {id: row.member_id})
+    MERGE (p:Program {id: row.program_id})
+    MERGE (m)-[rv:REVIEWED {id: row.review_id}]->(p)
+    SET rv.star=row.star, rv.content=row.content
+    """, rows=rows).consume()
+
+def run_batched(session, loader, rows, batch_size=GRAPH_BATCH_SIZE):
+    """rows를 batch_size씩 나눠 배치마다 execute_write(트랜잭션 1번), 로더별 소요 시간 출력"""
+    rows = [dict(r) for r in rows]
+    t0 = time.perf_counter()
+    batches = 0
+    for i in range(0, len(rows), batch_size):
+        session.execute_write(loader, rows[i:i + batch_size])
+        batches += 1
+    elapsed = time.perf_counter() - t0
+    print(f"  {loader.__name__:<28} {len(rows):>7}행 / {batches:>4}배치 / {elapsed:6.2f}s")
+    return elapsed
 
 # ---------- MAIN ----------
 if __name__ == "__main__":
@@ -227,10 +244,14 @@ if __name__ == "__main__":
     print("✅ Neo4j OK")
 
     with driver.session() as s:
-        s.execute_write(load_programs, programs)
-        s.execute_write(load_members_and_interests, members)
-        s.execute_write(load_timetable, times)
-        s.execute_write(load_member_program_edges, scheds)
-        s.execute_write(load_reviews, reviews)
+        ensure_constraints(s)
+        print(f"적재 시작 (배치 크기 {GRAPH_BATCH_SIZE})")
+        total = 0.0
+        total += run_batched(s, load_programs, programs)
+        # 관심사 행이 배치 경계에서 갈려도 MERGE라 결과는 같음
+        total += run_batched(s, load_members_and_interests, members)
+        total += run_batched(s, load_timetable, times)
+        total += run_batched(s, load_member_program_edges, scheds)
+        total += run_batched(s, load_reviews, reviews)
 
-    print("🎉 그래프 적재 완료")
\ No newline at end of file
+    print(f"🎉 그래프 적재 완료 ({total:.2f}s)")
\ No newline at end of file
@@ -0,0 +1,153 @@
+import os, re, json, time, hashlib, threading
+from collections import OrderedDict
+import numpy as np
+
+# -----------------------------
+# 챗봇 응답 캐시 (반복 질문용)
+# -----------------------------
+# - 정확 일치 키: 정규화 질문 + 버킷
+# - 버킷: 프로필 지문(관심사 + 시간표 해시) + 대화 맥락(최근 Top-5/마지막 질의 제목)
+#   → 같은 버킷 안에서만 재사용하므로 후속질의("1번 알려줘")도 맥락이 같을 때만 적중
+# - 정확 일치가 없으면 같은 버킷의 질문 임베딩과 코사인 유사도 비교 (SIM_THRESHOLD 이상이면 적중)
+#   (비교할 후보가 있을 때만 질문을 임베딩 → 빈 캐시/버킷은 임베딩 호출 없음)
+# - TTL 만료 + 카탈로그 버전이 바뀌면 이전 버전 항목 전체 폐기
+
+CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "1") == "1"
+CACHE_TTL_SEC = int(os.getenv("CHAT_CACHE_TTL_SEC", "600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "5000"))
+CACHE_SIM_THRESHOLD = float(os.getenv("CHAT_CACHE_SIM_THRESHOLD", "0.95"))
+
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+def _digest(obj) -> str:
+    raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def bucket_key(user_profile: dict, state: dict) -> str:
+    """답변에 영향을 주는 입력(질문 제외)만 모은 지문"""
+    interests = sorted(user_profile.get("interests") or [])
+    # 슬롯 dict 전체를 해시 (ScheduleIndex가 받는 모든 형태 {day,startTime,endTime}/{start,end}/
+    # {startDay,startTime,endDay,endTime} 구분), 순서는 결과에 영향 없으므로 정렬
+    timetable = sorted(_digest(s) for s in (user_profile.get("timetable") or []))
+    context = (list(state.get("top5_ids") or []), state.get("last_queried_title"))
+    return _digest([interests, timetable, context])
+
+
+class _Entry:
+    __slots__ = ("expires", "bucket", "question", "digits", "vec", "value")
+
+    def __init__(self, expires, bucket, question, digits, vec, value):
+        self.expires = expires
+        self.bucket = bucket
+        self.question = question
+        self.digits = digits
+        self.vec = vec
+        self.value = value
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SEC,
+                 sim_threshold: float = CACHE_SIM_THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sim_threshold = sim_threshold
+        self._entries = OrderedDict()   # (bucket, question) -> _Entry
+        self._buckets = {}              # bucket -> set((bucket, question))
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    # ---------- 내부 ----------
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._buckets.get(entry.bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[entry.bucket]
+
+    def _check_version(self, catalog_version):
+        # 카탈로그(비교과 목록)가 바뀌면 이전 답변은 전부 무효
+        if catalog_version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._buckets.clear()
+            self._version = catalog_version
+
+    # ---------- 조회/저장 ----------
+    def get(self, question: str, bucket: str, catalog_version: str, embed=None):
+        """
+        question: 정규화된 질문
+        embed: question -> (1, d) 벡터 (유사 질문 조회용, 없으면 정확 일치만)
+        return: (value, vec) — value가 None이면 미스, vec은 put에 재사용 (후보가 없으면 None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(catalog_version)
+            key = (bucket, question)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires < now:
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry.value, entry.vec
+            candidates = [self._entries[k] for k in self._buckets.get(bucket, ())]
+
+        # 숫자("1번", "2번")가 다르면 표현이 비슷해도 다른 질문
+        digits = DIGITS_PATTERN.findall(question)
+        candidates = [e for e in candidates if e.expires >= now and e.digits == digits and e.vec is not None]
+        vec = None
+        if embed is not None and candidates:
+            try:
+                vec = _unit(embed(question))
+            except Exception:
+                pass  # 임베딩 실패 시 정확 일치만 사용
+            if vec is not None:
+                sims = np.vstack([e.vec for e in candidates]) @ vec.reshape(-1)
+                best = int(np.argmax(sims))
+                if sims[best] >= self.sim_threshold:
+                    with self._lock:
+                        self._stats["semantic_hits"] += 1
+                    return candidates[best].value, vec
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None, vec
+
+    def put(self, question: str, bucket: str, catalog_version: str, value, vec=None):
+        with self._lock:
+            self._check_version(catalog_version)
+            key = (bucket, question)
+            self._drop(key)
+            vec = _unit(vec) if vec is not None else None
+            self._entries[key] = _Entry(
+                time.monotonic() + self.ttl, bucket, question,
+                DIGITS_PATTERN.findall(question), vec, value,
+            )
+            self._buckets.setdefault(bucket, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["exact_hits"] + self._stats["semantic_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "catalog_version": self._version,
+            }
+
+
+def _unit(vec) -> np.ndarray:
+    vec = np.asarray(vec, dtype="float32").reshape(-1)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
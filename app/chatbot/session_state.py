@@ -0,0 +1,113 @@
+import os, json, time, random, sqlite3, threading
+from collections import OrderedDict
+from pathlib import Path
+
+# -----------------------------
+# 사용자별 대화 상태 (후속질의 맥락)
+# -----------------------------
+# - 키: ChatRequest.id (사용자 아이디)
+# - memory: 프로세스 내 LRU + TTL (기본값, 워커 1개일 때)
+# - sqlite: 같은 호스트의 여러 워커가 공유 (WAL, 키 인덱스 조회 1회 + upsert 1회)
+# - get/set만 구현하면 다른 공유 백엔드도 끼울 수 있음
+
+SESSION_BACKEND = os.getenv("CHAT_SESSION_BACKEND", "memory")
+SESSION_TTL_SEC = int(os.getenv("CHAT_SESSION_TTL_SEC", "1800"))
+SESSION_MAX_USERS = int(os.getenv("CHAT_SESSION_MAX_USERS", "10000"))
+SESSION_DB_FILE = Path(os.getenv("CHAT_SESSION_DB", "app/.cache/sessions.db"))
+
+
+def new_state() -> dict:
+    return {
+        "top5_titles": [],               # 최근 추천 Top-5 제목 (1번부터)
+        "top5_ids": [],                  # 최근 추천 Top-5 id ("1번 알려줘" 해석용)
+        "last_queried_title": None,
+        "last_answered_program_id": None,
+    }
+
+
+class InMemorySessionBackend:
+    def __init__(self, max_size: int = SESSION_MAX_USERS, ttl: int = SESSION_TTL_SEC):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (만료시각, state)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, state = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return dict(state)
+
+    def set(self, key: str, state: dict):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, dict(state))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+class SqliteSessionBackend:
+    PURGE_PROBABILITY = 0.001  # set 1000회에 1번 꼴로 만료 행 정리
+
+    def __init__(self, path: Path = SESSION_DB_FILE, ttl: int = SESSION_TTL_SEC):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS chat_session (key TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _conn(self):
+        # sqlite 커넥션은 스레드별로 1개
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        row = self._conn().execute("SELECT state, expires FROM chat_session WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, state: dict):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO chat_session (key, state, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET state = excluded.state, expires = excluded.expires",
+            (key, json.dumps(state, ensure_ascii=False, default=str), now + self.ttl),
+        )
+        if random.random() < self.PURGE_PROBABILITY:
+            conn.execute("DELETE FROM chat_session WHERE expires < ?", (now,))
+
+
+class SessionStore:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def load(self, session_id) -> dict:
+        if session_id is None:
+            return new_state()
+        state = self.backend.get(str(session_id))
+        return {**new_state(), **state} if state else new_state()
+
+    def save(self, session_id, state: dict):
+        if session_id is not None:
+            self.backend.set(str(session_id), state)
+
+
+def create_session_store() -> SessionStore:
+    if SESSION_BACKEND == "sqlite":
+        return SessionStore(SqliteSessionBackend())
+    return SessionStore(InMemorySessionBackend())
@@ -1,10 +1,17 @@
 import json
 import re
 import os
+import sys
+import codecs
+import hashlib
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Callable, Union
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,6 +28,88 @@ AMBIGUOUS_LOCATION_PATTERNS = [
 ]
 AMBIGUOUS_LOCATION_NORMALIZED = '추후 별도 공지 예정'
 
+# 정규식은 모듈 로드 시 한 번만 컴파일 (항목/줄마다 re 캐시 조회 없이 바로 사용)
+AMBIGUOUS_LOCATION_RES = [re.compile(p) for p in AMBIGUOUS_LOCATION_PATTERNS]
+LOCATION_RES = [re.compile(p) for p in (r'대면\(([^)]+)\)', r'장소[:\s]*([^\n]+)', r'위치[:\s]*([^\n]+)')]
+DATETIME_RES = [
+    re.compile(r'(\d{4})\.(\d{2})\.(\d{2})\s+(\d{2}):(\d{2}):(\d{2})'),
+    re.compile(r'(\d{4})\.(\d{2})\.(\d{2})\s+(\d{2}):(\d{2})'),
+    re.compile(r'(\d{4})\.(\d{2})\.(\d{2})'),
+]
+DATE_CHAR_TABLE = str.maketrans({'：': ':', '．': '.', '〜': '~', '～': '~'})
+
+KEYWORD_PATTERNS = {
+    '창의': ['창의', '창의력', '창의성', '창의적', '창의융합'],
+    '소통': ['소통', '커뮤니케이션', '의사소통'],
+    '리더십': ['리더십', '리더', '지도력'],
+    '문제해결': ['문제해결', '문제 해결'],
+    '융합': ['융합', '통합', '다학제'],
+    '협업': ['협업', '팀워크', '협력'],
+    'AI': ['AI', '인공지능', 'ChatGPT', '머신러닝'],
+    '데이터사이언스': ['데이터', '데이터사이언스', '빅데이터', '데이터분석'],
+    '프로그래밍': ['프로그래밍', '코딩', '파이썬', 'Python'],
+    '영상편집': ['영상편집', '다빈치', 'DaVinci'],
+    '디자인': ['디자인', '설계', '캡스톤'],
+    '진로': ['진로', '취업', '커리어'],
+    '자기탐색': ['자기탐색', '자기계발', '성찰'],
+    '글쓰기': ['글쓰기', '작문', '에세이', '논제'],
+    '토론': ['토론', '토의', '논쟁'],
+    '봉사': ['봉사', '사회봉사', '자원봉사'],
+    '인권': ['인권', '인권교육', '차별'],
+    '다문화': ['다문화', '글로벌', '국제'],
+    '온라인학습': ['온라인', '이러닝', 'e-learning'],
+    '특강': ['특강', '강의', '세미나'],
+    '워크샵': ['워크샵', '실습'],
+    '경진대회': ['경진대회', '공모전', '대회']
+}
+# (카테고리, [(패턴, 소문자 패턴), ...]) — lower()도 미리 계산
+_KEYWORD_LOOKUP = [(cat, [(pat, pat.lower()) for pat in pats]) for cat, pats in KEYWORD_PATTERNS.items()]
+
+# 파싱 단계: 프로세스 풀(PARSE_WORKERS, 0이면 현재 프로세스)에서 PARSE_CHUNK개씩 파싱
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(os.cpu_count() or 1)))
+PARSE_CHUNK = int(os.getenv('PARSE_CHUNK', '200'))
+# 크롤링 파일은 스트리밍으로 읽음 (한 번에 JSON_READ_SIZE 바이트, 메모리 = 항목 1개 + 버퍼)
+JSON_READ_SIZE = int(os.getenv('JSON_READ_SIZE', str(1 << 16)))
+# 적재 재개용 체크포인트 (파일별로 DB에 커밋된 위치까지의 바이트 오프셋)
+IMPORT_CHECKPOINT_PATH = os.getenv('IMPORT_CHECKPOINT_PATH', 'app/data/import_checkpoint.json')
+# 파싱 결과 컬럼 (청크 단위 컬럼형 배치의 키)
+PARSED_COLUMNS = [
+    'extracurricular_id', 'title', 'url', 'description',
+    'activity_start', 'activity_end', 'application_start', 'application_end',
+    'keywords', 'location'
+]
+
+# 대량 적재: 청크당 executemany 1번 + 트랜잭션 1번
+BULK_INSERT_CHUNK = int(os.getenv('BULK_INSERT_CHUNK', '500'))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '2'))
+
+INSERT_SQL = """
+INSERT INTO extracurricular (
+    extracurricular_id,
+    title, url, description,
+    activity_start, activity_end, application_start, application_end,
+    keywords, location, source_key, content_hash
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# 변경분 적재(upsert): source_key(제목+URL) 충돌 시 내용만 갱신하고 삭제 표시 해제
+# (extracurricular_id는 새 값이 있을 때만 바꿈)
+UPSERT_SQL = INSERT_SQL + """
+ON DUPLICATE KEY UPDATE
+    extracurricular_id = COALESCE(VALUES(extracurricular_id), extracurricular_id),
+    description = VALUES(description),
+    activity_start = VALUES(activity_start),
+    activity_end = VALUES(activity_end),
+    application_start = VALUES(application_start),
+    application_end = VALUES(application_end),
+    keywords = VALUES(keywords),
+    location = VALUES(location),
+    content_hash = VALUES(content_hash),
+    is_deleted = 0
+"""
+# 변경 목록(manifest) 저장 위치 — 임베딩/FAISS 재구축이 바뀐 항목만 처리하도록
+INGEST_MANIFEST_DIR = os.getenv('INGEST_MANIFEST_DIR', 'app/data/manifests')
+
 # 단일 출처 DDL (드랍/최초 생성에서 동일하게 사용)
 TABLE_DDL = """
 CREATE TABLE extracurricular (
@@ -36,17 +125,146 @@ CREATE TABLE extracurricular (
   application_end DATETIME(6),
   keywords JSON,
   location VARCHAR(255),
+  -- 변경 감지용: (제목, URL) 해시 / 파싱된 내용 해시
+  source_key CHAR(40),
+  content_hash CHAR(40),
   created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
   is_deleted TINYINT(1) NOT NULL DEFAULT 0,
   updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (extracurricular_pk_id),
+  UNIQUE KEY uk_source_key (source_key),
   KEY idx_activity_start (activity_start),
   KEY idx_application_start (application_start)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 """
 
+def source_key(title: str, url: Optional[str]) -> str:
+    """(제목, URL) 식별 키 — MySQL SHA1(CONCAT(title, CHAR(31), COALESCE(url, '')))와 같은 값"""
+    return hashlib.sha1(f"{title}\x1f{url or ''}".encode('utf-8')).hexdigest()
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """파싱된 내용의 안정적인 해시 (키워드 순서/날짜 표현과 무관)"""
+    payload = {
+        'extracurricular_id': data.get('extracurricular_id'),
+        'description': data.get('description') or '',
+        'activity_start': data.get('activity_start'),
+        'activity_end': data.get('activity_end'),
+        'application_start': data.get('application_start'),
+        'application_end': data.get('application_end'),
+        'keywords': sorted(data.get('keywords') or []),
+        'location': data.get('location'),
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=lambda v: v.isoformat())
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def iter_json_items(file_path: str, start_offset: int = 0, read_size: int = JSON_READ_SIZE):
+    """
+    크롤링 파일을 항목 단위로 스트리밍 (파일 전체를 json.load 하지 않음)
+    - JSON 배열([{...}, {...}]) 또는 NDJSON(한 줄에 항목 1개) 모두 지원
+    - (항목, 다음 항목 시작 바이트 오프셋)을 yield → 오프셋을 저장해 두면 start_offset으로 이어 읽기 가능
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(64)
+        # BOM은 건너뛰되 바이트 오프셋에는 포함 (체크포인트가 실제 파일 위치와 맞도록)
+        bom = len(codecs.BOM_UTF8) if head.startswith(codecs.BOM_UTF8) else 0
+        start_offset = max(start_offset, bom)
+        head = head[bom:].lstrip(b' \t\r\n')
+        if head[:1] != b'[':
+            # NDJSON
+            f.seek(start_offset)
+            offset = start_offset
+            for line in f:
+                offset += len(line)
+                if line.strip():
+                    yield json.loads(line), offset
+            return
+
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        f.seek(start_offset)
+        buf, offset = '', start_offset  # offset = buf[0]의 파일 내 바이트 위치
+        in_array, eof = start_offset > bom, False
+        while True:
+            i = 0
+            while i < len(buf) and buf[i] in ' \t\r\n,':
+                i += 1
+            if i:
+                offset += len(buf[:i].encode('utf-8'))
+                buf = buf[i:]
+            if buf and not in_array:
+                if buf[0] != '[':
+                    raise ValueError(f"JSON 배열 형식이 아닙니다: {file_path}")
+                buf, offset, in_array = buf[1:], offset + 1, True
+                continue
+            if buf.startswith(']'):
+                return
+            if buf:
+                try:
+                    item, end = decoder.raw_decode(buf)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    end = None  # 항목이 버퍼 경계에서 잘림
+                # 숫자는 버퍼 경계에서 잘려도 앞부분만으로 디코딩됨("4." -> 4, "12" -> 12)
+                # → 숫자 뒤에 구분자(공백 , ])가 올 때만 확정, 그 전에는 더 읽음
+                if end is not None and not eof:
+                    is_number = isinstance(item, (int, float)) and not isinstance(item, bool)
+                    if end == len(buf) or (is_number and buf[end] not in ' \t\r\n,]'):
+                        end = None
+                if end is not None:
+                    offset += len(buf[:end].encode('utf-8'))
+                    buf = buf[end:]
+                    yield item, offset
+                    continue
+            if eof:
+                return
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf += utf8.decode(chunk, final=eof)
+
+
+class ImportCheckpoint:
+    """
+    파일별 적재 위치 {경로: {offset, size, mtime}} (JSON 파일)
+    파일 크기/수정 시각이 바뀌었으면(새로 크롤링) 처음부터 다시 읽음
+    """
+
+    def __init__(self, path: str = IMPORT_CHECKPOINT_PATH):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+
+    @staticmethod
+    def _stamp(file_path: str) -> Dict[str, Any]:
+        st = os.stat(file_path)
+        return {'size': st.st_size, 'mtime': st.st_mtime}
+
+    def offset(self, file_path: str) -> int:
+        saved = self.state.get(file_path)
+        if not saved or {k: saved.get(k) for k in ('size', 'mtime')} != self._stamp(file_path):
+            return 0
+        return saved['offset']
+
+    def save(self, file_path: str, offset: int):
+        self.state[file_path] = {'offset': offset, **self._stamp(file_path)}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)  # 중간에 죽어도 체크포인트 파일이 깨지지 않음
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class ExtracurricularParser:
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Optional[Dict[str, str]] = None):
         """
         db_config 예시
         {
@@ -56,9 +274,12 @@ class ExtracurricularParser:
             'password': '1234',
             'port': 3306
         }
+        db_config가 없으면 파싱 전용 (DB 연결/테이블 준비 안 함, 파싱 워커 프로세스용)
         """
         self.db_config = db_config
-        self.setup_database()
+        self._pool = None
+        if db_config:
+            self.setup_database()
 
     # ---------------- DB ----------------
 
@@ -71,6 +292,18 @@ class ExtracurricularParser:
             print(f"MySQL 연결 오류: {e}")
             return None
 
+    def get_pooled_connection(self):
+        """커넥션 풀에서 연결 대여 (close()하면 풀로 반환) — 대량 적재에서 연결 1개를 재사용"""
+        try:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name='extracurricular', pool_size=DB_POOL_SIZE, **self.db_config
+                )
+            return self._pool.get_connection()
+        except Error as e:
+            print(f"MySQL 연결 오류: {e}")
+            return None
+
     def drop_and_recreate_table(self, force_drop=False):
         """기존 테이블 삭제 후 재생성"""
         connection = self.get_connection()
@@ -135,12 +368,37 @@ class ExtracurricularParser:
                 print("새 테이블 생성 완료")
             else:
                 print("기존 테이블이 존재합니다.")
+                self.ensure_change_columns(connection, cursor)
         except Error as e:
             print(f"테이블 생성 오류: {e}")
         finally:
             cursor.close()
             connection.close()
 
+    def ensure_change_columns(self, connection, cursor):
+        """기존 테이블에 source_key/content_hash 컬럼이 없으면 추가하고 source_key를 채움"""
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = 'extracurricular' AND column_name = 'source_key'
+        """, (self.db_config['database'],))
+        if cursor.fetchone()[0]:
+            return
+        print("변경 감지 컬럼(source_key, content_hash) 추가...")
+        cursor.execute("""
+            ALTER TABLE extracurricular
+              ADD COLUMN source_key CHAR(40) AFTER location,
+              ADD COLUMN content_hash CHAR(40) AFTER source_key,
+              ADD UNIQUE KEY uk_source_key (source_key)
+        """)
+        # 같은 (제목, URL)이 여러 행이면 가장 먼저 들어온 행만 키를 가짐 (나머지는 upsert 시 삭제 표시)
+        cursor.execute("""
+            UPDATE extracurricular e
+            JOIN (SELECT MIN(extracurricular_pk_id) AS pk FROM extracurricular GROUP BY title, url) k
+              ON e.extracurricular_pk_id = k.pk
+            SET e.source_key = SHA1(CONCAT(e.title, CHAR(31 USING utf8mb4), COALESCE(e.url, '')))
+        """)
+        connection.commit()
+
     def check_table_exists(self):
         """테이블 존재 여부 및 스키마 확인"""
         connection = self.get_connection()
@@ -189,16 +447,10 @@ class ExtracurricularParser:
         """날짜 문자열을 datetime 객체로 변환"""
         if not date_str or date_str.strip() == "":
             return None
-        s = date_str.strip()
-        s = s.replace('：', ':').replace('．', '.').replace('〜', '~').replace('～', '~')
+        s = date_str.strip().translate(DATE_CHAR_TABLE)
 
-        patterns = [
-            r'(\d{4})\.(\d{2})\.(\d{2})\s+(\d{2}):(\d{2}):(\d{2})',
-            r'(\d{4})\.(\d{2})\.(\d{2})\s+(\d{2}):(\d{2})',
-            r'(\d{4})\.(\d{2})\.(\d{2})',
-        ]
-        for p in patterns:
-            m = re.search(p, s)
+        for p in DATETIME_RES:
+            m = p.search(s)
             if m:
                 g = m.groups()
                 y, mth, d = int(g[0]), int(g[1]), int(g[2])
@@ -209,16 +461,16 @@ class ExtracurricularParser:
         return None
 
     def _is_ambiguous_location_text(self, text: str) -> bool:
-        for pat in AMBIGUOUS_LOCATION_PATTERNS:
-            if re.search(pat, text):
+        for pat in AMBIGUOUS_LOCATION_RES:
+            if pat.search(text):
                 return True
         return False
 
     def extract_location(self, text: str) -> Optional[str]:
         """텍스트에서 장소 정보 추출 + 모호한 표현 정규화"""
         # 대면 장소
-        for pattern in [r'대면\(([^)]+)\)', r'장소[:\s]*([^\n]+)', r'위치[:\s]*([^\n]+)']:
-            m = re.search(pattern, text)
+        for pattern in LOCATION_RES:
+            m = pattern.search(text)
             if m:
                 loc = m.group(1).strip()
                 if self._is_ambiguous_location_text(loc):
@@ -237,36 +489,12 @@ class ExtracurricularParser:
 
     def extract_keywords(self, text: str) -> List[str]:
         """활동목적과 제목에서 키워드 추출"""
-        keyword_patterns = {
-            '창의': ['창의', '창의력', '창의성', '창의적', '창의융합'],
-            '소통': ['소통', '커뮤니케이션', '의사소통'],
-            '리더십': ['리더십', '리더', '지도력'],
-            '문제해결': ['문제해결', '문제 해결'],
-            '융합': ['융합', '통합', '다학제'],
-            '협업': ['협업', '팀워크', '협력'],
-            'AI': ['AI', '인공지능', 'ChatGPT', '머신러닝'],
-            '데이터사이언스': ['데이터', '데이터사이언스', '빅데이터', '데이터분석'],
-            '프로그래밍': ['프로그래밍', '코딩', '파이썬', 'Python'],
-            '영상편집': ['영상편집', '다빈치', 'DaVinci'],
-            '디자인': ['디자인', '설계', '캡스톤'],
-            '진로': ['진로', '취업', '커리어'],
-            '자기탐색': ['자기탐색', '자기계발', '성찰'],
-            '글쓰기': ['글쓰기', '작문', '에세이', '논제'],
-            '토론': ['토론', '토의', '논쟁'],
-            '봉사': ['봉사', '사회봉사', '자원봉사'],
-            '인권': ['인권', '인권교육', '차별'],
-            '다문화': ['다문화', '글로벌', '국제'],
-            '온라인학습': ['온라인', '이러닝', 'e-learning'],
-            '특강': ['특강', '강의', '세미나'],
-            '워크샵': ['워크샵', '실습'],
-            '경진대회': ['경진대회', '공모전', '대회']
-        }
         extracted = set()
         lower = text.lower()
 
-        for cat, pats in keyword_patterns.items():
-            for pat in pats:
-                if pat.lower() in lower or pat in text:
+        for cat, pats in _KEYWORD_LOOKUP:
+            for pat, pat_lower in pats:
+                if pat_lower in lower or pat in text:
                     extracted.add(cat)
                     break
 
@@ -346,6 +574,23 @@ class ExtracurricularParser:
 
         return data
 
+    @staticmethod
+    def _insert_params(data: Dict[str, Any]) -> tuple:
+        return (
+            data.get('extracurricular_id'),
+            data['title'],
+            data['url'],
+            data['description'],
+            data['activity_start'],
+            data['activity_end'],
+            data['application_start'],
+            data['application_end'],
+            json.dumps(data['keywords'], ensure_ascii=False) if data['keywords'] else None,
+            data['location'],
+            source_key(data['title'], data['url']),
+            content_hash(data)
+        )
+
     def insert_data(self, data: Dict[str, Any]) -> Optional[int]:
         """새 데이터 삽입 (중복 체크 후 INSERT) -> 반환: 비교과 고유아이디(extracurricular_id)"""
         connection = self.get_connection()
@@ -353,38 +598,22 @@ class ExtracurricularParser:
             return None
         cursor = connection.cursor()
         try:
-            # 중복 체크 (제목과 URL 기준)
+            # 중복 체크 (제목과 URL -> source_key, uk_source_key와 같이 삭제 표시된 행 포함)
             cursor.execute("""
-                SELECT extracurricular_id FROM extracurricular 
-                WHERE title = %s AND url = %s AND is_deleted = 0
-            """, (data['title'], data['url']))
+                SELECT extracurricular_id, is_deleted FROM extracurricular
+                WHERE source_key = %s
+            """, (source_key(data['title'], data['url']),))
             
             existing = cursor.fetchone()
             if existing:
-                print(f"중복 데이터 스킵: {data['title']} (extracurricular_id: {existing[0] or 'NULL'})")
+                if existing[1]:
+                    print(f"삭제 표시된 데이터 스킵 (--upsert로 복구): {data['title']} (extracurricular_id: {existing[0] or 'NULL'})")
+                else:
+                    print(f"중복 데이터 스킵: {data['title']} (extracurricular_id: {existing[0] or 'NULL'})")
                 return existing[0]
 
             # 1) 우선 레코드 생성 (extracurricular_id는 주어지면 포함, 아니면 NULL)
-            sql = """
-            INSERT INTO extracurricular (
-                extracurricular_id,
-                title, url, description,
-                activity_start, activity_end, application_start, application_end,
-                keywords, location
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(sql, (
-                data.get('extracurricular_id'),
-                data['title'],
-                data['url'],
-                data['description'],
-                data['activity_start'],
-                data['activity_end'],
-                data['application_start'],
-                data['application_end'],
-                json.dumps(data['keywords'], ensure_ascii=False) if data['keywords'] else None,
-                data['location']
-            ))
+            cursor.execute(INSERT_SQL, self._insert_params(data))
             connection.commit()
 
             # 방금 생성된 PK
@@ -413,19 +642,383 @@ class ExtracurricularParser:
             cursor.close()
             connection.close()
 
-    def load_json_file(self, file_path: str) -> List[Dict[str, str]]:
-        """JSON 파일 로드"""
+    # -------------- 대량 적재 --------------
+
+    def load_existing_keys(self, cursor) -> Dict[str, Optional[int]]:
+        """
+        기존 source_key -> extracurricular_id 를 한 번에 읽어 메모리에서 중복 체크
+        - uk_source_key가 삭제 표시된 행까지 막으므로 is_deleted = 1 행도 포함 (복구는 --upsert)
+        """
+        cursor.execute("SELECT source_key, extracurricular_id FROM extracurricular")
+        return {key: ext_id for key, ext_id in cursor.fetchall()}
+
+    def _write_rows(self, connection, cursor, sql: str, rows: List[Dict[str, Any]]):
+        """
+        트랜잭션을 열고 executemany(다중 VALUES 1문장)로 청크를 씀 — 커밋은 호출하는 쪽에서
+        - 청크가 실패하면 롤백 후 행마다 SAVEPOINT로 다시 넣어 실패한 행만 골라냄
+        return: (저장된 행 리스트, [{'title', 'error'}, ...], 첫 AUTO_INCREMENT 값)
+        """
+        errors = []
+        try:
+            connection.start_transaction()
+            cursor.executemany(sql, [self._insert_params(d) for d in rows])
+            return rows, errors, cursor.lastrowid
+        except Error as e:
+            connection.rollback()
+            print(f"청크 INSERT 실패, 행 단위로 재시도: {e}")
+        connection.start_transaction()
+        first_pk, saved = None, []
+        for d in rows:
+            cursor.execute("SAVEPOINT row_sp")
+            try:
+                cursor.execute(sql, self._insert_params(d))
+                first_pk = first_pk or cursor.lastrowid
+                saved.append(d)
+            except Error as row_error:
+                cursor.execute("ROLLBACK TO SAVEPOINT row_sp")
+                errors.append({'title': d['title'], 'error': str(row_error)})
+        return saved, errors, first_pk
+
+    def _insert_chunk(self, connection, cursor, rows: List[Dict[str, Any]], keys: Dict[str, Optional[int]]):
+        """
+        청크 1개를 트랜잭션 1번으로 적재
+        - executemany 후, 고유아이디가 없는 행은 UPDATE 1번으로 PK 값을 채움
+        return: (저장된 행 수, [{'title', 'error'}, ...])
+        """
+        saved, errors, first_pk = self._write_rows(connection, cursor, INSERT_SQL, rows)
+        try:
+            if saved:
+                # 이번 청크에서 생긴 행(PK >= 첫 PK) 중 고유아이디가 비어 있는 행을 한 번에 채움
+                cursor.execute("""
+                    UPDATE extracurricular
+                    SET extracurricular_id = extracurricular_pk_id
+                    WHERE extracurricular_id IS NULL AND extracurricular_pk_id >= %s
+                """, (first_pk,))
+                cursor.execute("""
+                    SELECT source_key, extracurricular_id FROM extracurricular
+                    WHERE extracurricular_pk_id >= %s
+                """, (first_pk,))
+                for key, ext_id in cursor.fetchall():
+                    keys[key] = ext_id
+            connection.commit()
+        except Error as e:
+            connection.rollback()
+            return 0, [{'title': d['title'], 'error': str(e)} for d in rows]
+        return len(saved), errors
+
+    def bulk_insert(self, items: Iterable[Dict[str, Any]], chunk_size: int = BULK_INSERT_CHUNK,
+                    on_commit=None) -> Dict[str, Any]:
+        """
+        대량 적재 모드 (insert_data를 행마다 호출하는 대신)
+        - 풀에서 연결 1개만 사용, 기존 키는 처음에 한 번 읽어 메모리에서 중복 체크
+        - chunk_size개씩 executemany + 트랜잭션 1번
+        - 항목에 '_checkpoint'(파일, 오프셋)가 있으면 청크 커밋 후 파일별 마지막 위치로 on_commit(파일, 오프셋) 호출
+          (title이 없는 항목은 위치 표시용으로만 사용)
+        return: {'inserted', 'skipped', 'failed', 'errors': [{'title', 'error'}, ...]}
+        """
+        result = {'inserted': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+        connection = self.get_pooled_connection()
+        if not connection:
+            result['errors'].append({'title': None, 'error': 'DB 연결 실패'})
+            return result
+        cursor = connection.cursor()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"파일 로드 완료: {file_path} ({len(data)}개 항목)")
-                return data
+            keys = self.load_existing_keys(cursor)
+            connection.commit()  # SELECT로 열린 트랜잭션 종료 (청크마다 start_transaction)
+            chunk = []
+            checkpoints = {}  # 파일 -> 지금까지 읽은 마지막 위치 (아직 커밋 전)
+            hold = {'checkpoint': False}  # 실패한 행이 있는 청크가 생기면 이후로는 위치를 넘기지 않음
+
+            def flush():
+                inserted, errors = self._insert_chunk(connection, cursor, chunk, keys) if chunk else (0, [])
+                result['inserted'] += inserted
+                result['failed'] += len(errors)
+                result['errors'].extend(errors)
+                if chunk:
+                    print(f"청크 저장: {inserted}/{len(chunk)}개 (누적 {result['inserted']}개)")
+                # 청크에 실패한 행이 하나라도 있으면(행 단위 재시도로 일부만 저장된 경우 포함)
+                # 이번 실행에서는 위치를 더 넘기지 않음 — 넘기면 실패한 행을 재개 시 다시 시도하지 못함
+                # (재개 시 이미 저장된 행은 중복으로 스킵)
+                if chunk and errors and not hold['checkpoint']:
+                    hold['checkpoint'] = True
+                    print(f"청크 저장 실패 {len(errors)}개: 이후 체크포인트를 갱신하지 않습니다 (--resume 시 이 위치부터 다시 시도)")
+                if on_commit and not hold['checkpoint']:
+                    for file_path, offset in checkpoints.items():
+                        on_commit(file_path, offset)
+                checkpoints.clear()
+                chunk.clear()
+
+            pending_keys = set()  # 같은 적재 안에서 중복된 항목
+            for data in items:
+                if '_checkpoint' in data:
+                    file_path, offset = data['_checkpoint']
+                    checkpoints[file_path] = offset
+                if data.get('title') is None:
+                    continue
+                key = source_key(data['title'], data['url'])
+                if key in keys or key in pending_keys:
+                    result['skipped'] += 1
+                    continue
+                pending_keys.add(key)
+                chunk.append(data)
+                if len(chunk) >= chunk_size:
+                    flush()
+            flush()
+        except Error as e:
+            print(f"대량 적재 오류: {e}")
+            result['errors'].append({'title': None, 'error': str(e)})
+        finally:
+            cursor.close()
+            connection.close()
+
+        print(f"대량 적재 완료 - 저장 {result['inserted']}개, 중복 스킵 {result['skipped']}개, 실패 {result['failed']}개")
+        for err in result['errors']:
+            print(f"  저장 실패: {err['title']} ({err['error']})")
+        return result
+
+    # -------------- 변경분 적재 (upsert) --------------
+
+    def load_change_state(self, cursor):
+        """
+        기존 행의 변경 감지 정보를 한 번에 읽음
+        return: ({source_key: {pk, id, title, url, hash, deleted}}, [source_key가 없는 살아있는 행, ...])
+        """
+        cursor.execute("""
+            SELECT extracurricular_pk_id, extracurricular_id, title, url, source_key, content_hash, is_deleted
+            FROM extracurricular
+        """)
+        state, unkeyed = {}, []
+        for pk, ext_id, title, url, key, h, deleted in cursor.fetchall():
+            row = {'pk': pk, 'id': ext_id, 'title': title, 'url': url, 'hash': h, 'deleted': bool(deleted)}
+            if key:
+                state[key] = row
+            elif not deleted:
+                unkeyed.append(row)
+        return state, unkeyed
+
+    def _upsert_chunk(self, connection, cursor, rows: List[Dict[str, Any]], manifest: Dict[str, Any]):
+        """청크 1개를 ON DUPLICATE KEY UPDATE로 쓰고, 새 행의 고유아이디를 채운 뒤 manifest에 기록"""
+        saved, errors, _ = self._write_rows(connection, cursor, UPSERT_SQL, rows)
+        manifest['failed'].extend(errors)
+        if not saved:
+            connection.rollback()
+            return
+        keys = [d['_source_key'] for d in saved]
+        marks = ', '.join(['%s'] * len(keys))
+        try:
+            cursor.execute(f"""
+                UPDATE extracurricular
+                SET extracurricular_id = extracurricular_pk_id
+                WHERE extracurricular_id IS NULL AND source_key IN ({marks})
+            """, keys)
+            cursor.execute(f"SELECT source_key, extracurricular_id FROM extracurricular WHERE source_key IN ({marks})", keys)
+            ids = dict(cursor.fetchall())
+            connection.commit()
+        except Error as e:
+            connection.rollback()
+            manifest['failed'].extend({'title': d['title'], 'error': str(e)} for d in saved)
+            return
+        for d in saved:
+            manifest[d['_change']].append(
+                {'extracurricular_id': ids.get(d['_source_key']), 'title': d['title'], 'url': d['url']}
+            )
+
+    def upsert_items(self, items: Iterable[Dict[str, Any]], chunk_size: int = BULK_INSERT_CHUNK,
+                     sweep: Union[bool, Callable[[], bool]] = True) -> Dict[str, Any]:
+        """
+        변경분 적재 모드 (재크롤링용, 테이블을 지우지 않음)
+        - 항목마다 content_hash를 계산해 기존 값과 같으면 건너뜀, 새 항목/바뀐 항목만 청크 단위 upsert
+        - sweep=True면 이번 크롤링에 없는 기존 행은 is_deleted = 1 (크롤링 전체를 읽었을 때만 사용)
+          sweep이 함수면 항목을 모두 소비한 뒤 호출해 결정 (파일을 끝까지 읽었는지는 읽은 뒤에야 알 수 있음)
+        - 변경 목록(added/updated/deleted)을 INGEST_MANIFEST_DIR에 JSON으로 저장
+        return: manifest (저장 경로는 manifest['path'])
+        """
+        manifest = {
+            'run_at': datetime.now().isoformat(timespec='seconds'),
+            'added': [], 'updated': [], 'deleted': [], 'unchanged': 0, 'failed': [],
+        }
+        connection = self.get_pooled_connection()
+        if not connection:
+            manifest['failed'].append({'title': None, 'error': 'DB 연결 실패'})
+            return manifest
+        cursor = connection.cursor()
+        try:
+            existing, unkeyed = self.load_change_state(cursor)
+            connection.commit()  # SELECT로 열린 트랜잭션 종료
+            seen, chunk = set(), []
+            for data in items:
+                if data.get('title') is None:
+                    continue
+                key = source_key(data['title'], data['url'])
+                if key in seen:  # 같은 크롤링 안의 중복은 처음 것만
+                    continue
+                seen.add(key)
+                old = existing.get(key)
+                if old and not old['deleted'] and old['hash'] == content_hash(data):
+                    manifest['unchanged'] += 1
+                    continue
+                chunk.append({**data, '_source_key': key,
+                              '_change': 'updated' if old and not old['deleted'] else 'added'})
+                if len(chunk) >= chunk_size:
+                    self._upsert_chunk(connection, cursor, chunk, manifest)
+                    chunk = []
+            if chunk:
+                self._upsert_chunk(connection, cursor, chunk, manifest)
+
+            # 크롤링이 비어 있으면(파일 누락 등) 전체 삭제 표시를 막음
+            if callable(sweep):
+                sweep = sweep()
+            if sweep and seen:
+                gone = [row for key, row in existing.items() if key not in seen and not row['deleted']] + unkeyed
+                if gone:
+                    connection.start_transaction()
+                    for i in range(0, len(gone), chunk_size):
+                        part = [row['pk'] for row in gone[i:i + chunk_size]]
+                        cursor.execute(
+                            f"UPDATE extracurricular SET is_deleted = 1 "
+                            f"WHERE extracurricular_pk_id IN ({', '.join(['%s'] * len(part))})",
+                            part,
+                        )
+                    connection.commit()
+                    manifest['deleted'] = [
+                        {'extracurricular_id': row['id'], 'title': row['title'], 'url': row['url']} for row in gone
+                    ]
+        except Error as e:
+            print(f"변경분 적재 오류: {e}")
+            connection.rollback()
+            manifest['failed'].append({'title': None, 'error': str(e)})
+        finally:
+            cursor.close()
+            connection.close()
+
+        os.makedirs(INGEST_MANIFEST_DIR, exist_ok=True)
+        path = os.path.join(INGEST_MANIFEST_DIR, f"extracurricular_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        manifest['path'] = path
+        print(f"변경분 적재 완료 - 추가 {len(manifest['added'])}개, 변경 {len(manifest['updated'])}개, "
+              f"삭제 {len(manifest['deleted'])}개, 그대로 {manifest['unchanged']}개, 실패 {len(manifest['failed'])}개")
+        print(f"변경 목록: {path}")
+        return manifest
+
+    def load_json_file(self, file_path: str, start_offset: int = 0, failed: Optional[List[str]] = None):
+        """
+        JSON 파일을 항목 단위로 스트리밍 -> (항목, 다음 오프셋) yield
+        읽다가 오류가 나면 거기서 멈추고, failed 리스트가 있으면 파일 경로를 추가 (끝까지 못 읽음)
+        """
+        count = 0
+        try:
+            for item, offset in iter_json_items(file_path, start_offset):
+                count += 1
+                yield item, offset
         except Exception as e:
             print(f"파일 로드 중 오류 발생 {file_path}: {e}")
-            return []
+            if failed is not None:
+                failed.append(file_path)
+            return
+        print(f"파일 읽기 완료: {file_path} ({count}개 항목{f', {start_offset}바이트부터' if start_offset else ''})")
+
+    def parse_files(self, file_paths: List[str], workers: int = PARSE_WORKERS,
+                    chunk_size: int = PARSE_CHUNK, checkpoint: Optional[ImportCheckpoint] = None,
+                    failed: Optional[List[str]] = None) -> Iterable[Dict[str, Any]]:
+        """
+        파싱 단계 (적재와 분리): 모든 파일의 항목을 스트리밍으로 읽어 chunk_size개씩 프로세스 풀에서 파싱
+        - 워커는 청크마다 컬럼형 배치({컬럼: [값, ...]})를 돌려주고, 여기서 행으로 풀어 순서대로 yield
+        - 소비하는 쪽(bulk_insert)이 단일 writer로 DB에 쓰는 동안 다음 청크 파싱이 계속 진행됨
+        - 동시에 파싱 중인 청크는 워커 수 x 2개까지 (파일 크기와 무관하게 메모리 일정)
+        - checkpoint가 있으면 파일별 저장 위치부터 읽고, 행마다 '_checkpoint'(파일, 다음 항목 오프셋)를 붙임
+        - failed 리스트가 있으면 끝까지 읽지 못한 파일(없는 파일, 읽기 오류, 파싱 오류 항목이 있는 파일)을 추가
+        """
+        failed = [] if failed is None else failed
+
+        def sources():
+            for p in file_paths:
+                if not os.path.exists(p):
+                    failed.append(p)
+                    continue
+                start = checkpoint.offset(p) if checkpoint else 0
+                for item, offset in self.load_json_file(p, start, failed):
+                    yield item.get('text', ''), (p, offset)
+
+        def chunks():
+            # 청크는 파일 경계를 넘지 않음 (청크 위치 = 한 파일 안의 오프셋)
+            for _, part_iter in itertools.groupby(sources(), key=lambda x: x[1][0]):
+                while True:
+                    part = list(itertools.islice(part_iter, chunk_size))
+                    if not part:
+                        break
+                    yield [text for text, _ in part], [position for _, position in part]
+
+        total, skipped, errors = 0, 0, 0
+        executor = None
+        if workers > 0:
+            # fork 시 부모의 커넥션/스레드 상태가 복제되지 않도록 spawn
+            executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        in_flight = deque()
+        try:
+            for texts, positions in itertools.chain(chunks(), [(None, None)]):
+                if texts is not None:
+                    total += len(texts)
+                    if executor is None:
+                        in_flight.append((_parse_texts(texts), positions))
+                    else:
+                        in_flight.append((executor.submit(_parse_texts, texts), positions))
+                # 입력이 끝났으면 남은 청크를 모두, 아니면 한도를 넘은 만큼만 순서대로 꺼냄
+                while in_flight and (texts is None or len(in_flight) > max(1, workers * 2)):
+                    batch, chunk_positions = in_flight.popleft()
+                    batch = batch if executor is None else batch.result()
+                    skipped += batch['skipped']
+                    errors += len(batch['errors'])
+                    for err in batch['errors']:
+                        print(f"데이터 처리 중 오류: {err}")
+                    if batch['errors']:
+                        failed.append(chunk_positions[0][0])  # 청크는 한 파일 안에서만 만들어짐
+                    for index, row in zip(batch['index'], _rows_from_batch(batch)):
+                        row['_checkpoint'] = chunk_positions[index]
+                        yield row
+                    if not batch['index'] or batch['index'][-1] != len(chunk_positions) - 1:
+                        # 청크 끝 항목이 파싱에서 빠졌어도 위치는 전달
+                        yield {'_checkpoint': chunk_positions[-1]}
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        print(f"파싱 완료: {total}개 중 제목 없음 {skipped}개, 오류 {errors}개")
+
+    def process_multiple_files(self, file_paths: List[str], bulk: bool = False, resume: bool = False,
+                               upsert: bool = False):
+        """
+        여러 JSON 파일 처리 (INSERT)
+        bulk=True면 파싱(프로세스 풀, parse_files)과 적재(단일 writer, bulk_insert)를 분리해 처리
+        - 커밋된 청크마다 파일별 위치를 체크포인트에 저장
+        - resume=True면 체크포인트 위치부터 이어서 적재 (False면 체크포인트를 지우고 처음부터)
+        upsert=True면 변경분 적재(upsert_items) — 삭제 표시는 설정된 모든 파일을 끝까지 읽었을 때만
+        """
+        if upsert:
+            for p in file_paths:
+                if not os.path.exists(p):
+                    print(f"파일을 찾을 수 없습니다: {p}")
+            incomplete = []
+
+            def read_all():
+                if incomplete:
+                    print(f"끝까지 읽지 못한 파일이 있어 삭제 표시를 건너뜀: {sorted(set(incomplete))}")
+                return not incomplete
+
+            manifest = self.upsert_items(self.parse_files(file_paths, failed=incomplete), sweep=read_all)
+            return len(manifest['added']) + len(manifest['updated'])
+
+        if bulk:
+            for p in file_paths:
+                if not os.path.exists(p):
+                    print(f"파일을 찾을 수 없습니다: {p}")
+            checkpoint = ImportCheckpoint()
+            if not resume:
+                checkpoint.clear()
+            result = self.bulk_insert(self.parse_files(file_paths, checkpoint=checkpoint),
+                                      on_commit=checkpoint.save)
+            print(f"\n=== 전체 처리 완료: 총 {result['inserted']}개 항목 ===")
+            return result['inserted']
 
-    def process_multiple_files(self, file_paths: List[str]):
-        """여러 JSON 파일 처리 (INSERT)"""
         total_processed = 0
         for file_path in file_paths:
             if not os.path.exists(file_path):
@@ -433,29 +1026,27 @@ class ExtracurricularParser:
                 continue
 
             print(f"\n=== {file_path} 처리 시작 ===")
-            data = self.load_json_file(file_path)
-            if data:
-                processed_count = 0
-                for item in data:
-                    try:
-                        # item 구조가 {"text": "..."} 라고 가정
-                        parsed_data = self.parse_single_item(item['text'])
-                        if parsed_data['title']:
-                            ext_id = self.insert_data(parsed_data)
-                            if ext_id is not None:
-                                keywords_str = ', '.join(parsed_data['keywords']) if parsed_data['keywords'] else '없음'
-                                print(f"  키워드: {keywords_str}")
-                                print(f"  위치: {parsed_data['location'] or '미기재'}")
-                                processed_count += 1
-                            else:
-                                print(f"저장 실패: {parsed_data['title']}")
+            processed_count = 0
+            for item, _ in self.load_json_file(file_path):
+                try:
+                    # item 구조가 {"text": "..."} 라고 가정
+                    parsed_data = self.parse_single_item(item['text'])
+                    if parsed_data['title']:
+                        ext_id = self.insert_data(parsed_data)
+                        if ext_id is not None:
+                            keywords_str = ', '.join(parsed_data['keywords']) if parsed_data['keywords'] else '없음'
+                            print(f"  키워드: {keywords_str}")
+                            print(f"  위치: {parsed_data['location'] or '미기재'}")
+                            processed_count += 1
                         else:
-                            print(f"제목이 없는 데이터 스킵: {item['text'][:50]}...")
-                    except Exception as e:
-                        print(f"데이터 처리 중 오류: {e}")
-                        print(f"문제 데이터: {item['text'][:120]}...")
-                print(f"{file_path}에서 {processed_count}개 항목 처리 완료")
-                total_processed += processed_count
+                            print(f"저장 실패: {parsed_data['title']}")
+                    else:
+                        print(f"제목이 없는 데이터 스킵: {item['text'][:50]}...")
+                except Exception as e:
+                    print(f"데이터 처리 중 오류: {e}")
+                    print(f"문제 데이터: {item['text'][:120]}...")
+            print(f"{file_path}에서 {processed_count}개 항목 처리 완료")
+            total_processed += processed_count
         print(f"\n=== 전체 처리 완료: 총 {total_processed}개 항목 ===")
         return total_processed
 
@@ -489,6 +1080,40 @@ class ExtracurricularParser:
             cursor.close()
             connection.close()
 
+# -------------------- 파싱 워커 --------------------
+
+_worker_parser = None
+
+
+def _parse_texts(texts: List[str]) -> Dict[str, Any]:
+    """프로세스 풀 워커: 항목 텍스트 청크 -> 컬럼형 배치"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = ExtracurricularParser()  # 파싱 전용 (DB 연결 없음)
+    batch = {col: [] for col in PARSED_COLUMNS}
+    batch['index'] = []  # 청크 안에서 살아남은 항목의 순번
+    batch['skipped'], batch['errors'] = 0, []
+    for i, text in enumerate(texts):
+        try:
+            data = _worker_parser.parse_single_item(text)
+        except Exception as e:
+            batch['errors'].append(f"{e} / 문제 데이터: {text[:120]}...")
+            continue
+        if not data['title']:
+            batch['skipped'] += 1
+            continue
+        for col in PARSED_COLUMNS:
+            batch[col].append(data[col])
+        batch['index'].append(i)
+    return batch
+
+
+def _rows_from_batch(batch: Dict[str, Any]):
+    columns = [batch[col] for col in PARSED_COLUMNS]
+    for values in zip(*columns):
+        yield dict(zip(PARSED_COLUMNS, values))
+
+
 # -------------------- 실행 스크립트 --------------------
 
 if __name__ == "__main__":
@@ -502,10 +1127,18 @@ if __name__ == "__main__":
     }
 
     parser = ExtracurricularParser(db_config)
+    # python app/data/data_save.py --bulk          : 대량 적재 모드
+    # python app/data/data_save.py --bulk --resume : 중단된 대량 적재를 체크포인트부터 이어서 (테이블 유지)
+    # python app/data/data_save.py --upsert        : 재크롤링 변경분만 반영 + 사라진 항목 삭제 표시 (테이블 유지)
+    bulk = '--bulk' in sys.argv
+    resume = bulk and '--resume' in sys.argv
+    upsert = '--upsert' in sys.argv
+    keep_table = resume or upsert
 
-    print("=== 기존 테이블 삭제 후 재생성 ===")
+    if not keep_table:
+        print("=== 기존 테이블 삭제 후 재생성 ===")
     # 강제로 테이블 삭제 후 재생성하려면 force_drop=True
-    if parser.drop_and_recreate_table(force_drop=True):  # 또는 force_drop=False로 사용자 확인
+    if keep_table or parser.drop_and_recreate_table(force_drop=True):  # 또는 force_drop=False로 사용자 확인
         
         print("\n=== JSON 파일 처리 시작 ===")
         file_paths = [
@@ -515,7 +1148,8 @@ if __name__ == "__main__":
 
         existing_files = [p for p in file_paths if os.path.exists(p)]
         if existing_files:
-            parser.process_multiple_files(existing_files)
+            # 설정된 파일 목록을 그대로 넘김 (upsert는 빠진 파일이 있으면 삭제 표시를 하지 않음)
+            parser.process_multiple_files(file_paths, bulk=bulk, resume=resume, upsert=upsert)
             print("\n=== 최종 결과 확인 ===")
             parser.check_duplicate_prevention()  # 중복 확인
         else:
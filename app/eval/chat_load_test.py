@@ -0,0 +1,77 @@
+import argparse, asyncio, time
+from itertools import cycle
+from statistics import median
+
+import httpx
+
+# -----------------------------
+# /chat 동시성 부하 테스트
+# -----------------------------
+# 사용 예: python -m app.eval.chat_load_test --url http://localhost:8000 --users 1,8,32 --requests 5
+# - 동시 사용자 수(N)별로 N개 클라이언트가 각각 --requests 번 /chat 호출
+# - 처리량(req/s), 지연 p50/p95/max, 503(SERVER_BUSY) 건수를 출력
+
+QUESTIONS = ["비교과 추천해줘", "1번 알려줘", "AI 관련 비교과 뭐 있어?", "신청기간 알려줘"]
+
+
+def _p95(xs):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * 0.95))] if xs else 0.0
+
+
+async def _client(http, url, user_id, n_requests, latencies, statuses):
+    for i in range(n_requests):
+        q = QUESTIONS[i % len(QUESTIONS)]
+        t0 = time.perf_counter()
+        try:
+            r = await http.post(f"{url}/chat", json={"id": user_id, "question": q})
+            statuses.append(r.status_code)
+        except httpx.HTTPError:
+            statuses.append(-1)
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run_level(url, concurrency, n_requests, user_ids, timeout):
+    latencies, statuses = [], []
+    ids = cycle(user_ids)
+    async with httpx.AsyncClient(timeout=timeout) as http:
+        t0 = time.perf_counter()
+        await asyncio.gather(*[
+            _client(http, url, next(ids), n_requests, latencies, statuses)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - t0
+
+    ok = sum(1 for s in statuses if s == 200)
+    busy = sum(1 for s in statuses if s == 503)
+    print(
+        f"users={concurrency:<4} | requests={len(statuses):<5} | ok={ok:<5} | busy={busy:<4} | "
+        f"rps={len(statuses) / elapsed:6.2f} | p50={median(latencies) * 1000:7.0f} ms | "
+        f"p95={_p95(latencies) * 1000:7.0f} ms | max={max(latencies) * 1000:7.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat 동시성 부하 테스트")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", default="1,8,32", help="동시 사용자 수 목록 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=5, help="사용자당 요청 수")
+    parser.add_argument("--ids", default=None, help="사용할 사용자 id 목록 (기본: users.json 전체)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    if args.ids:
+        user_ids = [int(x) for x in args.ids.split(",")]
+    else:
+        from app.services.user_service import load_all_users
+        user_ids = [int(uid) for uid in load_all_users()]
+    if not user_ids:
+        raise SystemExit("등록된 사용자가 없습니다. --ids 로 지정해 주세요.")
+
+    print("=== /chat Load Test ===")
+    for concurrency in (int(x) for x in args.users.split(",")):
+        asyncio.run(run_level(args.url, concurrency, args.requests, user_ids, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
@@ -172,6 +172,7 @@ from app.chatbot.agent_rag_chatbot import (
     resolve_followup_question,
     answer_program_question_by_title,
 )
+from app.chatbot.session_state import new_state
 from app.services.user_service import load_user_profile
 
 
@@ -255,12 +256,14 @@ def run_retrieval(sample, user_profile):
 # ------------ Field runner ------------
 def run_field(sample, user_profile):
     # 컨텍스트 세팅(상위 추천 한 번 호출해서 last_queried_title 잡기)
+    # 같은 state를 후속 질문까지 넘겨야 맥락이 이어짐
     from app.chatbot.agent_rag_chatbot import search_top5_programs_with_explanation
-    _ = search_top5_programs_with_explanation(sample["context_query"], user_profile)
+    state = new_state()
+    _ = search_top5_programs_with_explanation(sample["context_query"], user_profile, state)
 
     t0 = time.perf_counter()
     query = resolve_followup_question(sample["query_after"])
-    answer = answer_program_question_by_title(query)  # 규칙기반 단답 우선
+    answer = answer_program_question_by_title(query, state)  # 규칙기반 단답 우선
     latency = time.perf_counter() - t0
 
     field = sample["field"]
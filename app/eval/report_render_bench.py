@@ -0,0 +1,109 @@
+import argparse, time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.models.activity import ActivityStats, UserReport
+from app.services import pdf_service
+from app.services.generator.insight_generator import generate_insights, generate_recommendations
+
+# -----------------------------
+# PDF 리포트 렌더링 벤치마크
+# -----------------------------
+# 사용 예: python -m app.eval.report_render_bench --reports 50
+# - 기존 방식: 리포트마다 폰트 등록 + 스타일 생성 + matplotlib PNG 차트
+# - 렌더 1회 방식: 폰트/스타일은 프로세스당 1번, 차트는 ReportLab 벡터 도형
+# - 리포트당 평균 렌더 시간(ms)과 PDF 크기(KB)를 비교
+# - 통계는 가짜 활동 행(시작/종료 시각)에서 ActivityService.calculate_user_stats와 같은 모양으로 계산
+#   (activity_service는 import 시 DB 스키마를 읽으므로 여기서는 같은 집계만 재현)
+
+WEEKDAY_NAMES = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+
+
+def sample_activity_rows(i: int):
+    """사용자 i의 (activity_start, activity_end) 목록 — 0~17개, 2~4월, 요일/시간대 분산"""
+    rows = []
+    for j in range(i % 18):
+        start = datetime(2025, 2 + j % 3, 1 + (i + j * 5) % 28, 9 + (i + j) % 10)
+        rows.append((start, start + timedelta(hours=1 + j % 3)))
+    return rows
+
+
+def sample_stats(user_id: int, rows) -> dict:
+    """calculate_user_stats 반환 dict와 같은 키/값 형태"""
+    if not rows:
+        return {"user_id": user_id, "total_activities": 0, "total_hours": 0.0,
+                "monthly_trend": [], "time_pattern": {}}
+    monthly = {}
+    for start, end in rows:
+        m = monthly.setdefault(start.strftime('%Y-%m'), {"activities": 0, "hours": 0.0})
+        m["activities"] += 1
+        m["hours"] += (end - start).total_seconds() / 3600.0
+    weekday = Counter(start.weekday() for start, _ in rows).most_common(1)[0][0]
+    return {
+        "user_id": user_id,
+        "total_activities": len(rows),
+        "total_hours": round(sum((end - start).total_seconds() / 3600.0 for start, end in rows), 2),
+        "monthly_trend": [
+            {"month": month, "activities": m["activities"], "hours": round(m["hours"], 2)}
+            for month, m in sorted(monthly.items())
+        ],
+        "time_pattern": {
+            "most_active_hour": Counter(start.hour for start, _ in rows).most_common(1)[0][0],
+            "most_active_weekday": weekday,
+            "most_active_weekday_name": WEEKDAY_NAMES[weekday],
+        },
+    }
+
+
+def sample_report(i: int) -> UserReport:
+    stats = sample_stats(i, sample_activity_rows(i))
+    return UserReport(
+        user_id=i,
+        user_name=f"사용자{i}",
+        start_date=datetime(2025, 2, 1),
+        end_date=datetime(2025, 4, 30),
+        stats=ActivityStats(**stats),
+        insights=generate_insights(stats),
+        recommendations=generate_recommendations(stats),
+        feedback_message="꾸준히 참여하고 있습니다.\n관심 분야의 심화 프로그램에도 도전해 보세요.",  # LLM 피드백 대신 고정 문구
+    )
+
+
+def legacy_render(report: UserReport) -> bytes:
+    # 기존 코드 경로 재현: 호출마다 폰트 등록/스타일 생성
+    pdf_service.register_korean_fonts()
+    pdf_service._report_styles.cache_clear()
+    return pdf_service.create_report_pdf_bytes(report, chart_mode="png")
+
+
+def render_once(report: UserReport) -> bytes:
+    return pdf_service.create_report_pdf_bytes(report, chart_mode="vector")
+
+
+def run(label, render, reports):
+    render(reports[0])  # 워밍업 (import, 최초 폰트 로드)
+    sizes = []
+    t0 = time.perf_counter()
+    for report in reports:
+        sizes.append(len(render(report)))
+    elapsed = time.perf_counter() - t0
+    print(
+        f"{label:<24} | {elapsed * 1000 / len(reports):7.1f} ms/report | "
+        f"avg {sum(sizes) / len(sizes) / 1024:6.1f} KB | max {max(sizes) / 1024:6.1f} KB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 리포트 렌더링 벤치마크")
+    parser.add_argument("--reports", type=int, default=50)
+    args = parser.parse_args()
+
+    reports = [sample_report(i) for i in range(args.reports)]
+    font_registered, _ = pdf_service.ensure_korean_fonts()
+    print(f"=== Report Render Bench (reports={args.reports}, 한글 폰트={'O' if font_registered else 'X'}) ===")
+    run("기존 (폰트 재등록 + PNG)", legacy_render, reports)
+    run("렌더 1회 (벡터 차트)", render_once, reports)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse, socketserver, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.send_service import SMTPConnectionPool, build_pdf_message
+
+# -----------------------------
+# 로컬 SMTP 싱크 + 메일 전송 벤치마크
+# -----------------------------
+# 사용 예: python -m app.eval.smtp_bench --messages 200 --latency 0.05 --throttle-every 50
+# - LocalSMTPSink: 메일을 받기만 하는 최소 SMTP 서버 (aiosmtpd 없이 동작, STARTTLS 없음, AUTH는 무조건 성공)
+#   · --latency: 연결(인사)과 AUTH 응답마다 지연을 넣어 TLS/인증 왕복 비용을 흉내
+#   · --throttle-every N: N번째 메일마다 451 응답 (4xx 스로틀링 → 백오프 재시도 확인용)
+# - 메일마다 새 연결(기존 방식) vs 커넥션 풀 전송 시간을 비교
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        sink = self.server.sink
+        time.sleep(sink.latency)
+        self._reply("220 local-sink ESMTP")
+        in_data = False
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self._reply(sink.accept())
+                continue
+            cmd = line.split(" ", 1)[0].upper()
+            if cmd in ("EHLO", "HELO"):
+                self._reply("250-local-sink")
+                self._reply("250 AUTH PLAIN LOGIN")
+            elif cmd == "AUTH":
+                time.sleep(sink.latency)
+                self._reply("235 2.7.0 Authentication successful")
+            elif cmd == "DATA":
+                in_data = True
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif cmd == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self._reply("250 OK")
+
+
+class LocalSMTPSink:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, throttle_every=0):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.received = 0
+        self.connections = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        sink = self
+
+        class _Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+            def process_request(self, request, client_address):
+                with sink._lock:
+                    sink.connections += 1
+                super().process_request(request, client_address)
+
+        self.server = _Server((host, port), _SMTPHandler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address
+
+    def accept(self) -> str:
+        with self._lock:
+            self._count += 1
+            if self.throttle_every and self._count % self.throttle_every == 0:
+                return "451 4.7.1 Rate limited, try again later"
+            self.received += 1
+            return "250 OK queued"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run(label, sink, n_messages, concurrency, max_messages_per_conn, rate, pdf_bytes):
+    pool = SMTPConnectionPool(
+        sink.host, sink.port, "bench", "bench", starttls=False, size=concurrency,
+        max_messages_per_conn=max_messages_per_conn, rate_per_sec=rate, max_retries=3,
+    )
+    received0, conns0 = sink.received, sink.connections
+    t0 = time.perf_counter()
+
+    def send(i):
+        msg = build_pdf_message("bench@local", f"user{i}@local", f"리포트 {i}", "본문", pdf_bytes, f"report_{i}.pdf")
+        pool.send(msg)
+
+    with ThreadPoolExecutor(concurrency) as ex:
+        list(ex.map(send, range(n_messages)))
+    elapsed = time.perf_counter() - t0
+    pool.close()
+    print(
+        f"{label:<22} | sent={sink.received - received0:<5} | connections={sink.connections - conns0:<5} | "
+        f"retries={pool.stats['retries']:<3} | {elapsed:6.2f} s | {n_messages / elapsed:7.1f} msg/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP 커넥션 풀 벤치마크 (로컬 싱크)")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="연결/AUTH 응답 지연(초)")
+    parser.add_argument("--throttle-every", type=int, default=0, help="N번째 메일마다 451 응답")
+    parser.add_argument("--rate", type=float, default=0, help="초당 전송 제한 (0이면 없음)")
+    parser.add_argument("--pdf-kb", type=int, default=100, help="첨부 PDF 크기(KB)")
+    args = parser.parse_args()
+
+    pdf_bytes = b"%PDF-1.4\n" + b"0" * (args.pdf_kb * 1024)
+    print("=== SMTP Bench ===")
+    with LocalSMTPSink(latency=args.latency, throttle_every=args.throttle_every) as sink:
+        run("메일마다 새 연결", sink, args.messages, args.concurrency, 1, args.rate, pdf_bytes)
+        run("커넥션 풀", sink, args.messages, args.concurrency, 100, args.rate, pdf_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable
 from collections import defaultdict, Counter
+import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.automap import automap_base
 from sqlalchemy.orm import sessionmaker
@@ -11,6 +12,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+ACTIVITY_QUERY_CHUNK = 1000  # IN (...) 한 번에 넣는 id 개수
+WEEKDAY_NAMES = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+
 # Automap 설정
 Base = automap_base()
 Base.prepare(autoload_with=engine)
@@ -20,6 +24,7 @@ SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 class ActivityService:
     def __init__(self, db: Session):
         self.db = db
+        self._activity_cache: Dict[int, list] = {}  # extracurricular_id -> [(pk, start, end), ...]
     
     def calculate_user_stats(self, user_id: int, activity_id_list: List[int]) -> Dict:
         try:
@@ -60,8 +65,7 @@ class ActivityService:
             )
             
             activities = query.all()
-            for a in activities:
-                print(f"[{a.extracurricular_pk_id}] {a.title}")
+            logger.debug(f"활동 조회: {len(activities)}건")
             
             return activities
             
@@ -69,6 +73,153 @@ class ActivityService:
             logger.error(f"활동 조회 오류: {e}")
             raise AppException(ErrorCode.ACTIVITY_LOAD_FAILED)
     
+    # ---------- 여러 사용자 일괄 통계 ----------
+    def get_activities_by_ids(self, activity_ids: Iterable[int]) -> Dict[int, list]:
+        """
+        필요한 활동만 id 합집합으로 한 번에 조회 (이미 조회한 id는 캐시 사용)
+        return: extracurricular_id -> [(pk_id, activity_start, activity_end), ...]
+        """
+        missing = sorted({int(i) for i in activity_ids} - self._activity_cache.keys())
+        try:
+            for i in range(0, len(missing), ACTIVITY_QUERY_CHUNK):
+                chunk = missing[i:i + ACTIVITY_QUERY_CHUNK]
+                rows = self.db.query(
+                    Extracurricular.extracurricular_pk_id,
+                    Extracurricular.extracurricular_id,
+                    Extracurricular.activity_start,
+                    Extracurricular.activity_end,
+                ).filter(
+                    Extracurricular.extracurricular_id.in_(chunk),
+                    Extracurricular.is_deleted == 0  # 삭제되지 않은 활동만
+                ).all()
+                for activity_id in chunk:
+                    self._activity_cache.setdefault(activity_id, [])
+                for pk_id, activity_id, start, end in rows:
+                    self._activity_cache[activity_id].append((pk_id, start, end))
+        except Exception as e:
+            logger.error(f"활동 일괄 조회 오류: {e}")
+            raise AppException(ErrorCode.ACTIVITY_LOAD_FAILED)
+        return self._activity_cache
+
+    def calculate_bulk_user_stats(self, user_activity_map: Dict[int, List[int]]) -> Dict[int, Dict]:
+        """
+        calculate_user_stats를 여러 사용자에 대해 한 번에 계산 (결과 dict 형태 동일)
+        - DB는 전체 활동 id 합집합으로 1번만 조회
+        - (사용자, 활동) 쌍을 numpy 배열로 펼쳐 bincount/unique로 집계
+        """
+        try:
+            all_ids = {int(aid) for ids in user_activity_map.values() for aid in ids}
+            cache = self.get_activities_by_ids(all_ids)
+
+            # 행 순서는 pk 순 (단건 조회 결과 순서와 같게 → 최빈값 동률 처리도 동일)
+            rows = sorted((row for aid in all_ids for row in cache[aid]), key=lambda r: r[0])
+            pos_of_pk = {row[0]: pos for pos, row in enumerate(rows)}
+            rows_by_aid = {aid: [pos_of_pk[row[0]] for row in cache[aid]] for aid in all_ids}
+
+            user_ids = list(user_activity_map.keys())
+            pair_user, pair_pos = [], []
+            for u, uid in enumerate(user_ids):
+                positions = sorted(p for aid in {int(a) for a in user_activity_map[uid]} for p in rows_by_aid[aid])
+                pair_user.extend([u] * len(positions))
+                pair_pos.extend(positions)
+            pair_user = np.asarray(pair_user, dtype=np.int64)
+            pair_pos = np.asarray(pair_pos, dtype=np.int64)
+            n_users = len(user_ids)
+
+            # 활동(행)별 값은 1번만 계산
+            has_start = np.array([r[1] is not None for r in rows], dtype=bool)
+            hours = np.array([self._duration_hours(r[1], r[2]) for r in rows], dtype=np.float64)
+            month = np.array([r[1].year * 12 + r[1].month - 1 if r[1] else -1 for r in rows], dtype=np.int64)
+            hour = np.array([r[1].hour if r[1] else -1 for r in rows], dtype=np.int64)
+            weekday = np.array([r[1].weekday() if r[1] else -1 for r in rows], dtype=np.int64)
+
+            total_activities = np.bincount(pair_user, minlength=n_users)
+            total_hours = np.bincount(pair_user, weights=hours[pair_pos], minlength=n_users)
+
+            # 시작 시각이 있는 쌍만 월별/시간 패턴 집계
+            started = has_start[pair_pos]
+            s_user, s_pos = pair_user[started], pair_pos[started]
+            monthly = self._group_monthly(s_user, month[s_pos], hours[s_pos], n_users)
+            top_hour = self._group_mode(s_user, hour[s_pos], n_users)
+            top_weekday = self._group_mode(s_user, weekday[s_pos], n_users)
+
+            result = {}
+            for u, uid in enumerate(user_ids):
+                if total_activities[u] == 0:
+                    result[uid] = {
+                        "user_id": uid,
+                        "total_activities": 0,
+                        "total_hours": 0.0,
+                        "monthly_trend": [],
+                        "time_pattern": {}
+                    }
+                    continue
+                has_weekday = top_weekday[u] >= 0
+                result[uid] = {
+                    "user_id": uid,
+                    "total_activities": int(total_activities[u]),
+                    "total_hours": round(float(total_hours[u]), 2),
+                    "monthly_trend": monthly[u],
+                    "time_pattern": {
+                        "most_active_hour": int(max(top_hour[u], 0)),
+                        "most_active_weekday": int(max(top_weekday[u], 0)),
+                        "most_active_weekday_name": WEEKDAY_NAMES[top_weekday[u]] if has_weekday else "없음"
+                    }
+                }
+            return result
+
+        except AppException:
+            raise
+        except Exception as e:
+            logger.error(f"일괄 통계 계산 오류: {e}")
+            raise AppException(ErrorCode.DATA_ACCESS_ERROR)
+
+    @staticmethod
+    def _duration_hours(start, end) -> float:
+        if not start or not end:
+            return 0.0
+        try:
+            return (end - start).total_seconds() / 3600.0
+        except Exception:
+            return 0.0
+
+    @staticmethod
+    def _group_monthly(users: np.ndarray, months: np.ndarray, hours: np.ndarray, n_users: int) -> List[List[Dict]]:
+        out = [[] for _ in range(n_users)]
+        if users.size == 0:
+            return out
+        # (사용자, 월) 키로 묶기 — unique 결과가 사용자→월 순으로 정렬됨
+        keys = users * (months.max() + 1) + months
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=hours)
+        span = months.max() + 1
+        for key, cnt, hrs in zip(uniq, counts, sums):
+            u, m = divmod(int(key), int(span))
+            out[u].append({
+                "month": f"{m // 12:04d}-{m % 12 + 1:02d}",
+                "activities": int(cnt),
+                "hours": round(float(hrs), 2)
+            })
+        return out
+
+    @staticmethod
+    def _group_mode(users: np.ndarray, values: np.ndarray, n_users: int) -> np.ndarray:
+        """사용자별 최빈값 (동률이면 먼저 나온 값 — Counter.most_common과 동일), 없으면 -1"""
+        out = np.full(n_users, -1, dtype=np.int64)
+        if users.size == 0:
+            return out
+        span = int(values.max()) + 1
+        keys = users * span + values
+        uniq, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        group_user = uniq // span
+        # 사용자 오름차순, 빈도 내림차순, 첫 등장 오름차순
+        order = np.lexsort((first, -counts, group_user))
+        group_user = group_user[order]
+        head = np.r_[True, group_user[1:] != group_user[:-1]]
+        out[group_user[head]] = (uniq[order] % span)[head]
+        return out
+
     def _calculate_duration_hours(self, activity) -> float:
         """활동 지속 시간을 시간 단위로 계산"""
         if not activity.activity_start or not activity.activity_end:
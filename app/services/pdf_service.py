@@ -1,8 +1,11 @@
 from datetime import datetime
+from functools import lru_cache
 from app.models.activity import UserReport
 import io
 import os
+import time
 import logging
+import threading
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
@@ -11,11 +14,19 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.graphics.shapes import Drawing, Rect, Circle, Wedge, String
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 
 logger = logging.getLogger(__name__)
 
+# vector: ReportLab 도형으로 직접 그림 (기본, matplotlib/PNG 없음)
+# png: 기존 matplotlib 차트를 PNG로 삽입
+REPORT_CHART_MODE = os.getenv("REPORT_CHART_MODE", "vector")
+
+_font_lock = threading.Lock()
+_font_state = None  # (등록 성공 여부, 폰트 경로) — 프로세스당 1번만 등록
+
 def register_korean_fonts():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     base_path = os.path.join(current_dir, '..', 'utils', 'format', 'fonts')
@@ -65,19 +76,20 @@ def register_korean_fonts():
         logger.error(f"폰트 등록 실패: {e}")
         return False, None
 
+def ensure_korean_fonts():
+    """register_korean_fonts()를 프로세스당 1번만 실행하고 결과를 재사용"""
+    global _font_state
+    if _font_state is None:
+        with _font_lock:
+            if _font_state is None:
+                _font_state = register_korean_fonts()
+    return _font_state
+
 def generate_activity_bar_chart_buffer(stats, font_path=None) -> io.BytesIO:
     total_activities = getattr(stats, 'total_activities', 0)
     total_hours = getattr(stats, 'total_hours', 0.0)
 
-    # 폰트 설정
-    if font_path and os.path.exists(font_path):
-        try:
-            font_prop = fm.FontProperties(fname=font_path)
-            plt.rcParams['font.family'] = font_prop.get_name()
-            plt.rcParams['axes.unicode_minus'] = False
-        except Exception as e:
-            logger.warning(f"차트 폰트 설정 실패: {e}")
-
+    # 폰트는 ensure_korean_fonts()에서 rcParams에 한 번만 설정됨
     # 1x2 서브플롯 생성 (좌우 배치)
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 3.5))
     fig.patch.set_facecolor('#f8fafc')
@@ -160,56 +172,157 @@ ACCENT_COLOR = colors.HexColor('#3b82f6')
 BG_LIGHT = colors.HexColor('#f7f7f9')
 BORDER_COLOR = colors.HexColor('#e5e7eb')
 
-def create_report_pdf_bytes(report: UserReport) -> bytes:
-    font_registered, font_path = register_korean_fonts()
+MAX_ACTIVITIES_GOAL = 15  # 차트의 목표 활동 수
+
+def _blend(hex_color: str, alpha: float, background: str = '#f8fafc'):
+    # 반투명 대신 배경과 미리 섞은 단색 (PDF 투명도 그룹 없이 같은 색감)
+    fg, bg = colors.HexColor(hex_color), colors.HexColor(background)
+    return colors.Color(
+        bg.red + (fg.red - bg.red) * alpha,
+        bg.green + (fg.green - bg.green) * alpha,
+        bg.blue + (fg.blue - bg.blue) * alpha,
+    )
+
+@lru_cache(maxsize=1)
+def _report_styles():
+    """폰트 등록 + ParagraphStyle/TableStyle 생성은 프로세스당 1번"""
+    font_registered, font_path = ensure_korean_fonts()
     font_name = 'NotoSansKR-Regular' if font_registered else 'Helvetica'
     font_name_bold = 'NotoSansKR-Bold' if font_registered else 'Helvetica-Bold'
+
+    styles = getSampleStyleSheet()
+    return {
+        "font_name": font_name,
+        "font_name_bold": font_name_bold,
+        "font_path": font_path,
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            spaceAfter=15,
+            alignment=TA_CENTER,
+            textColor=HEADER_COLOR,
+            fontName=font_name_bold
+        ),
+        "subtitle": ParagraphStyle(
+            'Subtitle', parent=styles['Normal'], fontSize=11,
+            alignment=TA_CENTER, spaceAfter=25, fontName=font_name,
+            textColor=HEADER_COLOR
+        ),
+        "header": ParagraphStyle(
+            'Header',
+            parent=styles['Heading2'],
+            fontSize=15,
+            spaceAfter=10,
+            spaceBefore=25,
+            textColor=ACCENT_COLOR,
+            fontName=font_name_bold
+        ),
+        "normal": ParagraphStyle(
+            'Normal',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=6,
+            leading=16,
+            alignment=TA_LEFT,
+            fontName=font_name
+        ),
+        "bold": ParagraphStyle(
+            'Bold',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=6,
+            leading=16,
+            alignment=TA_LEFT,
+            fontName=font_name_bold
+        ),
+        "footer": ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#6b7280'),
+            fontName=font_name
+        ),
+        "center": TableStyle([('ALIGN', (0,0), (-1,-1), 'CENTER')]),
+        "stats_table": TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), BG_LIGHT),
+            ('TEXTCOLOR', (0, 0), (-1, -1), HEADER_COLOR),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), font_name_bold),
+            ('FONTNAME', (1, 0), (1, -1), font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('LINEBELOW', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+    }
+
+def build_activity_chart_drawing(stats, font_name: str, font_name_bold: str,
+                                 width: float = 15*cm, height: float = 6*cm) -> Drawing:
+    """
+    generate_activity_bar_chart_buffer와 같은 구성(활동 수 도넛 게이지 + 활동 시간 카드 2개)을
+    ReportLab 벡터 도형으로 그림 — matplotlib figure 생성/PNG 래스터화 없이 PDF에 직접 기록
+    """
+    total_activities = getattr(stats, 'total_activities', 0)
+    total_hours = getattr(stats, 'total_hours', 0.0)
+    avg_hours = total_hours / total_activities if total_activities > 0 else 0
+
+    title_color = colors.HexColor('#1f2937')
+    label_color = colors.HexColor('#6b7280')
+    d = Drawing(width, height)
+    d.add(Rect(0, 0, width, height, fillColor=colors.HexColor('#f8fafc'), strokeColor=None))
+
+    # === 왼쪽: 활동 수 원형 게이지 ===
+    cx, cy = width * 0.25, height * 0.44
+    outer, inner = height * 0.34, height * 0.20
+    d.add(String(cx, height - 18, '활동 참여도', fontName=font_name_bold, fontSize=12,
+                 fillColor=title_color, textAnchor='middle'))
+    d.add(Circle(cx, cy, outer, fillColor=colors.HexColor('#e5e7eb'), strokeColor=None))
+    ratio = min(total_activities / MAX_ACTIVITIES_GOAL, 1.0)
+    if ratio >= 1.0:
+        d.add(Circle(cx, cy, outer, fillColor=colors.HexColor('#6366f1'), strokeColor=None))
+    elif ratio > 0:
+        # 12시 방향에서 시계 방향으로 채움
+        d.add(Wedge(cx, cy, outer, 90 - 360 * ratio, 90,
+                    fillColor=colors.HexColor('#6366f1'), strokeColor=None))
+    d.add(Circle(cx, cy, inner, fillColor=colors.HexColor('#f8fafc'), strokeColor=None))
+    d.add(String(cx, cy + 2, f'{total_activities}', fontName=font_name_bold, fontSize=20,
+                 fillColor=title_color, textAnchor='middle'))
+    d.add(String(cx, cy - 12, '총 활동 수', fontName=font_name, fontSize=8,
+                 fillColor=label_color, textAnchor='middle'))
+    d.add(String(cx, cy - outer - 14, f'(목표: {MAX_ACTIVITIES_GOAL}개)', fontName=font_name, fontSize=8,
+                 fillColor=colors.HexColor('#9ca3af'), textAnchor='middle'))
+
+    # === 오른쪽: 통계 카드 ===
+    x0, card_w = width * 0.55, width * 0.40
+    card_h = height * 0.30
+    mid = x0 + card_w / 2
+    d.add(String(mid, height - 18, '활동 시간 분석', fontName=font_name_bold, fontSize=12,
+                 fillColor=title_color, textAnchor='middle'))
+    cards = [
+        (height * 0.50, f'{total_hours:.1f}시간', '총 활동 시간', '#10b981'),
+        (height * 0.12, f'{avg_hours:.1f}시간', '평균 활동 시간', '#f59e0b'),
+    ]
+    for y, value, label, color in cards:
+        d.add(Rect(x0, y, card_w, card_h, rx=6, ry=6, fillColor=_blend(color, 0.15), strokeColor=None))
+        d.add(String(mid, y + card_h * 0.52, value, fontName=font_name_bold, fontSize=16,
+                     fillColor=colors.HexColor(color), textAnchor='middle'))
+        d.add(String(mid, y + card_h * 0.18, label, fontName=font_name, fontSize=9,
+                     fillColor=label_color, textAnchor='middle'))
+    return d
+
+def create_report_pdf_bytes(report: UserReport, chart_mode: str = None) -> bytes:
+    st = _report_styles()
+    font_name, font_name_bold = st["font_name"], st["font_name_bold"]
+    title_style, header_style, normal_style = st["title"], st["header"], st["normal"]
+    chart_mode = chart_mode or REPORT_CHART_MODE
     
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, 
                           topMargin=2.5*cm, bottomMargin=2*cm)
-    
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Title'],
-        fontSize=24,
-        spaceAfter=15,
-        alignment=TA_CENTER,
-        textColor=HEADER_COLOR,
-        fontName=font_name_bold
-    )
-    
-    header_style = ParagraphStyle(
-        'Header',
-        parent=styles['Heading2'],
-        fontSize=15,
-        spaceAfter=10,
-        spaceBefore=25,
-        textColor=ACCENT_COLOR,
-        fontName=font_name_bold
-    )
-    
-    normal_style = ParagraphStyle(
-        'Normal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        leading=16,
-        alignment=TA_LEFT,
-        fontName=font_name 
-    )
-    
-    bold_style = ParagraphStyle(
-        'Bold',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        leading=16,
-        alignment=TA_LEFT,
-        fontName=font_name_bold
-    )
 
     story = []
     
@@ -217,9 +330,7 @@ def create_report_pdf_bytes(report: UserReport) -> bytes:
     story.append(Paragraph("비교과 활동 리포트", title_style))
     story.append(Paragraph(
         f"사용자: {report.user_name} | 리포트 기간: {report.start_date.strftime('%Y-%m-%d')} ~ {report.end_date.strftime('%Y-%m-%d')}", 
-        ParagraphStyle('Subtitle', parent=styles['Normal'], fontSize=11, 
-                      alignment=TA_CENTER, spaceAfter=25, fontName=font_name, 
-                      textColor=HEADER_COLOR)
+        st["subtitle"]
     ))
     
     # 활동 통계 차트
@@ -227,12 +338,14 @@ def create_report_pdf_bytes(report: UserReport) -> bytes:
     story.append(Spacer(1, 0.3*cm))
     
     try:
-        chart_buffer = generate_activity_bar_chart_buffer(report.stats, font_path)
-        # 이미지 크기를 페이지에 맞게 제한
-        img = Image(chart_buffer, width=15*cm, height=6*cm)
+        if chart_mode == "png":
+            chart_buffer = generate_activity_bar_chart_buffer(report.stats, st["font_path"])
+            # 이미지 크기를 페이지에 맞게 제한
+            chart = Image(chart_buffer, width=15*cm, height=6*cm)
+        else:
+            chart = build_activity_chart_drawing(report.stats, font_name, font_name_bold)
         # 중앙 정렬
-        story.append(Table([[img]], colWidths=[15*cm], 
-                          style=TableStyle([('ALIGN', (0,0), (-1,-1), 'CENTER')])))
+        story.append(Table([[chart]], colWidths=[15*cm], style=st["center"]))
         story.append(Spacer(1, 0.8*cm))
     except Exception as e:
         logger.error(f"시각화 생성 실패: {e}")
@@ -253,19 +366,7 @@ def create_report_pdf_bytes(report: UserReport) -> bytes:
     ]
     
     stats_table = Table(stats_data, colWidths=[5*cm, 10*cm])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), BG_LIGHT),
-        ('TEXTCOLOR', (0, 0), (-1, -1), HEADER_COLOR),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), font_name_bold),
-        ('FONTNAME', (1, 0), (1, -1), font_name),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('LINEBELOW', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    stats_table.setStyle(st["stats_table"])
     
     story.append(stats_table)
     story.append(Spacer(1, 0.8*cm))
@@ -306,21 +407,22 @@ def create_report_pdf_bytes(report: UserReport) -> bytes:
     story.append(Spacer(1, 1.5*cm))
     created_str = report.created_at.strftime('%Y-%m-%d %H:%M') if hasattr(report, 'created_at') and report.created_at else datetime.now().strftime('%Y-%m-%d %H:%M')
 
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#6b7280'),
-        fontName=font_name
-    )
     story.append(Paragraph(f"리포트 생성 일시: {created_str} | © 건국대학교 비교과센터", 
-                          footer_style))
+                          st["footer"]))
     
     doc.build(story)
     buffer.seek(0)
     return buffer.getvalue()
 
+def render_report_timed(report: UserReport, chart_mode: str = None):
+    """
+    리포트 렌더 프로세스 풀 진입점: (PDF bytes, 렌더 시간 초)
+    - spawn 워커가 이 모듈만 import 하도록 pdf_service에 둠 (report_service를 import하면 DB/LLM/SMTP까지 로드)
+    """
+    started = time.perf_counter()
+    pdf_bytes = create_report_pdf_bytes(report, chart_mode)
+    return pdf_bytes, time.perf_counter() - started
+
 def get_activity_level(count: int) -> str:
     """활동 수준 판단 - 유니코드 심볼 사용"""
     if count == 0:
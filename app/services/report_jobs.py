@@ -0,0 +1,283 @@
+import os, json, time, uuid, socket, sqlite3, threading, logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.services.report_service import generate_reports_for_users, ReportProgress, STAGES
+from app.utils.app_exception import AppException
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# 리포트 작업 큐 + 로컬 작업 저장소
+# -----------------------------
+# - /report는 작업을 저장만 하고 job_id를 바로 반환, 실제 처리는 백그라운드 러너 스레드
+# - 사용자별 상태(pending/sent/failed)를 SQLite(WAL)에 기록
+#   → 워커가 재시작되면 pending 사용자만 이어서 처리 (이미 보낸 사용자에게 다시 보내지 않음)
+# - 작업 소유권은 임대(lease) 방식: 러너가 주기적으로 heartbeat, 오래 끊긴 작업은 다른 워커가 가져감
+
+REPORT_JOB_DB = Path(os.getenv("REPORT_JOB_DB", "app/data/report_jobs.db"))
+REPORT_JOB_LEASE_SEC = int(os.getenv("REPORT_JOB_LEASE_SEC", "300"))  # heartbeat가 이보다 오래 없으면 버려진 작업
+REPORT_JOB_POLL_SEC = int(os.getenv("REPORT_JOB_POLL_SEC", "10"))     # 새 작업/버려진 작업 확인 주기
+
+JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED = "queued", "running", "completed", "failed"
+USER_PENDING, USER_SENT, USER_FAILED = "pending", "sent", "failed"
+
+
+def _merge_stages(base: Dict, current: Dict) -> Dict:
+    # 재시작 전 실행분(base) + 이번 실행분(current) 누적
+    merged = {}
+    for stage in STAGES:
+        b, c = base.get(stage, {}), current.get(stage, {})
+        merged[stage] = {
+            "running": c.get("running", 0),
+            "done": b.get("done", 0) + c.get("done", 0),
+            "failed": b.get("failed", 0) + c.get("failed", 0),
+            "seconds": round(b.get("seconds", 0.0) + c.get("seconds", 0.0), 3),
+        }
+    return merged
+
+
+class ReportJobStore:
+    def __init__(self, path: Path = REPORT_JOB_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_job ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, start_date TEXT, end_date TEXT,"
+            " stages TEXT NOT NULL DEFAULT '{}', message TEXT, owner TEXT, heartbeat REAL,"
+            " created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_job_user ("
+            " job_id TEXT NOT NULL, user_id INTEGER NOT NULL, activities TEXT NOT NULL,"
+            " status TEXT NOT NULL, error TEXT, PRIMARY KEY (job_id, user_id))"
+        )
+
+    def _conn(self):
+        # sqlite 커넥션은 스레드별로 1개
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- 생성/조회 ----------
+    def create(self, user_activity_map: Dict[int, List[int]], start_date: datetime, end_date: datetime) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat(timespec="seconds")
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO report_job (job_id, status, start_date, end_date, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, start_date.isoformat(), end_date.isoformat(), now, now),
+            )
+            conn.executemany(
+                "INSERT INTO report_job_user (job_id, user_id, activities, status) VALUES (?, ?, ?, ?)",
+                [(job_id, int(uid), json.dumps(acts), USER_PENDING) for uid, acts in user_activity_map.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT status, start_date, end_date, stages, message, created_at, updated_at "
+            "FROM report_job WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        counts = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM report_job_user WHERE job_id = ? GROUP BY status", (job_id,)
+        ).fetchall())
+        failed_users = [
+            {"user_id": uid, "error": error}
+            for uid, error in conn.execute(
+                "SELECT user_id, error FROM report_job_user WHERE job_id = ? AND status = ?", (job_id, USER_FAILED)
+            )
+        ]
+        status, start_date, end_date, stages, message, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "start_date": start_date,
+            "end_date": end_date,
+            "total": sum(counts.values()),
+            "done": counts.get(USER_SENT, 0),
+            "failed": counts.get(USER_FAILED, 0),
+            "remaining": counts.get(USER_PENDING, 0),
+            "stages": json.loads(stages),
+            "failed_users": failed_users,
+            "message": message,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def pending_users(self, job_id: str) -> Dict[int, List[int]]:
+        rows = self._conn().execute(
+            "SELECT user_id, activities FROM report_job_user WHERE job_id = ? AND status = ?", (job_id, USER_PENDING)
+        ).fetchall()
+        return {uid: json.loads(acts) for uid, acts in rows}
+
+    # ---------- 러너 ----------
+    def claim_next(self, owner: str, lease_sec: int = REPORT_JOB_LEASE_SEC) -> Optional[Dict]:
+        """대기 중이거나 heartbeat가 끊긴 작업 1개를 원자적으로 가져옴"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT job_id, start_date, end_date, stages FROM report_job "
+                "WHERE status = ? OR (status = ? AND heartbeat < ?) ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, JOB_RUNNING, now - lease_sec),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE report_job SET status = ?, owner = ?, heartbeat = ?, updated_at = ? WHERE job_id = ?",
+                (JOB_RUNNING, owner, now, datetime.now().isoformat(timespec="seconds"), row[0]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job_id, start_date, end_date, stages = row
+        return {
+            "job_id": job_id,
+            "start_date": datetime.fromisoformat(start_date),
+            "end_date": datetime.fromisoformat(end_date),
+            "stages": json.loads(stages),
+        }
+
+    def heartbeat(self, job_id: str, owner: str, stages: Optional[Dict] = None):
+        now = datetime.now().isoformat(timespec="seconds")
+        if stages is None:
+            self._conn().execute(
+                "UPDATE report_job SET heartbeat = ?, updated_at = ? WHERE job_id = ? AND owner = ?",
+                (time.time(), now, job_id, owner),
+            )
+        else:
+            self._conn().execute(
+                "UPDATE report_job SET heartbeat = ?, stages = ?, updated_at = ? WHERE job_id = ? AND owner = ?",
+                (time.time(), json.dumps(stages), now, job_id, owner),
+            )
+
+    def mark_user(self, job_id: str, user_id: int, ok: bool, error: Optional[str] = None):
+        self._conn().execute(
+            "UPDATE report_job_user SET status = ?, error = ? WHERE job_id = ? AND user_id = ?",
+            (USER_SENT if ok else USER_FAILED, error, job_id, int(user_id)),
+        )
+
+    def finish(self, job_id: str, status: str, message: str, stages: Dict):
+        self._conn().execute(
+            "UPDATE report_job SET status = ?, message = ?, stages = ?, updated_at = ? WHERE job_id = ?",
+            (status, message, json.dumps(stages), datetime.now().isoformat(timespec="seconds"), job_id),
+        )
+
+
+class ReportJobRunner:
+    """프로세스당 1개의 백그라운드 스레드가 작업을 하나씩 가져와 리포트 파이프라인으로 처리"""
+
+    def __init__(self, store: ReportJobStore):
+        self.store = store
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="report-job-runner", daemon=True)
+                self._thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            try:
+                job = self.store.claim_next(self.owner)
+            except Exception as e:
+                logger.error(f"리포트 작업 조회 실패: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(REPORT_JOB_POLL_SEC)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict):
+        job_id = job["job_id"]
+        base_stages = job["stages"]
+        progress = ReportProgress()
+        stages = lambda: _merge_stages(base_stages, progress.snapshot()["stages"])
+
+        # 사용자 완료 사이 간격이 길어도 임대가 끊기지 않도록 별도 heartbeat
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(max(1, REPORT_JOB_LEASE_SEC // 3)):
+                try:
+                    self.store.heartbeat(job_id, self.owner, stages())
+                except Exception as e:
+                    logger.warning(f"리포트 작업 heartbeat 실패: job_id={job_id}, error={e}")
+
+        beater = threading.Thread(target=beat, name=f"report-job-heartbeat-{job_id[:8]}", daemon=True)
+        beater.start()
+
+        def on_user_done(user_id, ok, error):
+            self.store.mark_user(job_id, user_id, ok, error)
+            self.store.heartbeat(job_id, self.owner, stages())
+
+        pending = self.store.pending_users(job_id)
+        logger.info(f"리포트 작업 시작: job_id={job_id}, 남은 사용자 {len(pending)}명")
+        try:
+            if pending:
+                message, _ = generate_reports_for_users(
+                    pending, job["start_date"], job["end_date"], progress, on_user_done
+                )
+            else:
+                message = "처리할 사용자가 없습니다"
+            self.store.finish(job_id, JOB_COMPLETED, message, stages())
+        except Exception as e:
+            logger.error(f"리포트 작업 실패: job_id={job_id}, error={e}", exc_info=True)
+            message = e.error.message if isinstance(e, AppException) else str(e)
+            self.store.finish(job_id, JOB_FAILED, message, stages())
+        finally:
+            stop.set()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_report_job_runner() -> ReportJobRunner:
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = ReportJobRunner(ReportJobStore())
+    return _runner
+
+
+def submit_report_job(user_activity_map: Dict[int, List[int]], start_date: datetime, end_date: datetime) -> str:
+    runner = get_report_job_runner()
+    job_id = runner.store.create(user_activity_map, start_date, end_date)
+    runner.start()
+    runner.notify()
+    return job_id
+
+
+def get_report_job(job_id: str) -> Optional[Dict]:
+    return get_report_job_runner().store.get(job_id)
@@ -1,8 +1,13 @@
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Callable
 from pathlib import Path
+import os
+import time
 import logging
+import threading
+import multiprocessing
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from sqlalchemy.orm import Session
 from app.services.generator.insight_generator import generate_insights, generate_recommendations
@@ -11,13 +16,22 @@ from app.models.activity import UserReport
 from app.utils.constants.error_codes import ErrorCode
 from app.utils.app_exception import AppException
 from app.services.activity_service import get_activity_service, SessionLocal 
-from app.services.pdf_service import create_report_pdf_bytes    
+from app.services.pdf_service import render_report_timed
 from app.services.send_service import send_email_with_pdf_attachment
-from app.services.user_service import load_all_users
+from app.services.user_service import load_user_profile
 from app.utils.format.report_format import REPORT_DIR, EMAIL_SUBJECT_TEMPLATE, EMAIL_BODY_TEMPLATE
 
 logger = logging.getLogger(__name__)
 
+# 단계별 동시성 한도 (리포트 파이프라인)
+REPORT_STATS_BATCH = int(os.getenv("REPORT_STATS_BATCH", "500"))          # 활동 통계를 한 번에 조회/계산하는 사용자 수
+REPORT_LLM_CONCURRENCY = int(os.getenv("REPORT_LLM_CONCURRENCY", "8"))    # 피드백 LLM 동시 요청
+REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", str(os.cpu_count() or 2)))  # PDF/차트 프로세스 (0이면 스레드 1개)
+REPORT_SEND_CONCURRENCY = int(os.getenv("REPORT_SEND_CONCURRENCY", "4"))  # 메일 동시 전송
+REPORT_MAX_IN_FLIGHT = int(os.getenv("REPORT_MAX_IN_FLIGHT", "64"))       # 동시에 파이프라인에 올라가 있는 사용자 수 (PDF 메모리 상한)
+
+STAGES = ("stats", "feedback", "render", "send")
+
 @contextmanager
 def get_db_session():
     db = SessionLocal()
@@ -47,25 +61,7 @@ def generate_user_report(
             activity_id_list=activity_id_list
         )
 
-        # 인사이트 & 추천 생성
-        insights = generate_insights(stats)
-        recommendations = generate_recommendations(stats)
-
-        # LLM 피드백 생성
-        feedback_message = generate_feedback(stats, insights, recommendations)
-
-        # UserReport 객체 생성
-        report = UserReport(
-            user_id=user_id,
-            user_name=user_name,
-            start_date=start_date,
-            end_date=end_date,
-            stats=stats,
-            insights=insights,
-            recommendations=recommendations,
-            feedback_message=feedback_message,
-        )
-        
+        report = _build_report(stats, user_id, user_name, start_date, end_date)
         logger.info(f"리포트 생성 성공: user_id={user_id}, activities={len(activity_id_list)}")
         return report
 
@@ -77,6 +73,33 @@ def generate_user_report(
         raise AppException(ErrorCode.REPORT_GENERATION_FAILED)
 
 
+def _build_report(
+    stats: Dict,
+    user_id: int,
+    user_name: str,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> UserReport:
+    # 인사이트 & 추천 생성
+    insights = generate_insights(stats)
+    recommendations = generate_recommendations(stats)
+
+    # LLM 피드백 생성
+    feedback_message = generate_feedback(stats, insights, recommendations)
+
+    # UserReport 객체 생성
+    return UserReport(
+        user_id=user_id,
+        user_name=user_name,
+        start_date=start_date,
+        end_date=end_date,
+        stats=stats,
+        insights=insights,
+        recommendations=recommendations,
+        feedback_message=feedback_message,
+    )
+
+
 def _generate_filename(user_name: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> str:
     if not start_date or not end_date:
         return f"report_user_{user_name}_no_date.pdf"
@@ -86,129 +109,286 @@ def _generate_filename(user_name: str, start_date: Optional[datetime], end_date:
     return f"report_user_{safe_name}_{start_date:%Y%m%d}-{end_date:%Y%m%d}.pdf"
 
 
-def _process_single_user(
-    user: dict, 
-    user_activity_map: Dict[int, List[int]], 
-    start_date: Optional[datetime], 
-    end_date: Optional[datetime],
-    db: Session
-) -> Tuple[bool, Optional[str]]:
-    user_id = user.get("id")
-    user_name = user.get("name", f"User_{user_id}")
-    user_email = user.get("email")
-    
-    if not user_id:
-        return False, "사용자 ID가 없음"
-    
-    if not user_email:
-        logger.warning(f"사용자 이메일이 없음: user_id={user_id}")
-        return False, "이메일 주소가 없음"
+class ReportProgress:
+    """단계별 진행 카운터 (스레드 안전). seconds는 단계별 실제 실행 시간 합계, snapshot()은 진행 조회용 dict"""
 
-    try:
-        activity_id_list = user_activity_map.get(user_id, [])
-        
-        # 리포트 생성
-        report = generate_user_report(
-            db=db,
-            user_id=user_id,
-            user_name=user_name,
-            activity_id_list=activity_id_list,
-            start_date=start_date,
-            end_date=end_date,
-        )
+    def __init__(self, total: int = 0):
+        self._lock = threading.Lock()
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.stages = {
+            stage: {"running": 0, "done": 0, "failed": 0, "seconds": 0.0}
+            for stage in STAGES
+        }
 
-        # PDF 생성
-        pdf_bytes = create_report_pdf_bytes(report)
-        
-        # 파일 저장
-        # out_dir = Path(REPORT_DIR)
-        # out_dir.mkdir(parents=True, exist_ok=True)
-        filename = _generate_filename(user_name, start_date, end_date)
-        # pdf_path = out_dir / filename
-        # pdf_path.write_bytes(pdf_bytes)
-        
-        # logger.info(f"PDF 저장 완료: {pdf_path}")
-
-        # 이메일 전송
-        email_subject = EMAIL_SUBJECT_TEMPLATE.format(user_name=user_name)
-        email_body = EMAIL_BODY_TEMPLATE.format(
-            user_name=user_name,
-            start_date=start_date.strftime('%Y-%m-%d') if start_date else '시작일 미정',
-            end_date=end_date.strftime('%Y-%m-%d') if end_date else '종료일 미정'
-        )
-        
-        email_sent = send_email_with_pdf_attachment(
-            to_email=user_email,
-            subject=email_subject,
-            body=email_body,
-            pdf_bytes=pdf_bytes,
-            filename=filename
-        )
+    def stage_started(self, stage: str):
+        with self._lock:
+            self.stages[stage]["running"] += 1
 
-        if not email_sent:
-            logger.warning(f"이메일 전송 실패: user_id={user_id}")
-            return False, "이메일 전송 실패"
+    def stage_finished(self, stage: str, seconds: float, ok: bool):
+        with self._lock:
+            counters = self.stages[stage]
+            counters["running"] -= 1
+            counters["done" if ok else "failed"] += 1
+            counters["seconds"] += seconds
 
-        return True, None
+    def stage_batch(self, stage: str, count: int, seconds: float, ok: bool):
+        # 여러 사용자를 한 번에 처리하는 단계(stats)용
+        with self._lock:
+            counters = self.stages[stage]
+            counters["done" if ok else "failed"] += count
+            counters["seconds"] += seconds
 
-    except Exception as e:
-        error_msg = f"사용자 처리 중 오류: {str(e)}"
-        logger.error(f"user_id={user_id}, error={error_msg}", exc_info=True)
-        return False, error_msg
+    def user_finished(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "done": self.done,
+                "failed": self.failed,
+                "remaining": self.total - self.done - self.failed,
+                "stages": {
+                    stage: {**c, "seconds": round(c["seconds"], 3)}
+                    for stage, c in self.stages.items()
+                },
+            }
+
+
+def _timed(fn, *args):
+    # 큐 대기 시간을 빼고 실제 실행 시간만 재기 위해 워커 안에서 측정
+    # (스레드 풀 전용, 렌더 프로세스 풀은 pdf_service.render_report_timed 사용)
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _load_bulk_stats(user_activity_map: Dict[int, List[int]]) -> Dict[int, Dict]:
+    # 배치 내 사용자들의 활동 id 합집합을 한 번에 조회해 통계 계산
+    with get_db_session() as db:
+        return get_activity_service(db).calculate_bulk_user_stats(user_activity_map)
+
+
+def _send_report(user: dict, pdf_bytes: bytes, start_date: Optional[datetime], end_date: Optional[datetime]) -> bool:
+    user_name = user.get("name", f"User_{user.get('id')}")
+    filename = _generate_filename(user_name, start_date, end_date)
+
+    # 이메일 전송
+    email_subject = EMAIL_SUBJECT_TEMPLATE.format(user_name=user_name)
+    email_body = EMAIL_BODY_TEMPLATE.format(
+        user_name=user_name,
+        start_date=start_date.strftime('%Y-%m-%d') if start_date else '시작일 미정',
+        end_date=end_date.strftime('%Y-%m-%d') if end_date else '종료일 미정'
+    )
+    return send_email_with_pdf_attachment(
+        to_email=user["email"],
+        subject=email_subject,
+        body=email_body,
+        pdf_bytes=pdf_bytes,
+        filename=filename
+    )
+
+
+class ReportPipeline:
+    """
+    사용자별 리포트를 단계별 풀에 흘려보내는 파이프라인
+      stats(DB, REPORT_STATS_BATCH명씩 일괄) → feedback(LLM, 스레드) → render(PDF/차트, 프로세스) → send(SMTP, 스레드)
+    - 한 사용자의 단계가 끝나면 다음 단계 풀에 바로 제출 → 서로 다른 사용자의 단계가 겹쳐서 진행
+    - matplotlib은 스레드 안전하지 않고 렌더링은 CPU 작업이라 render만 프로세스 풀
+    - REPORT_MAX_IN_FLIGHT로 동시에 처리 중인 사용자 수를 제한 (렌더링된 PDF가 쌓이지 않도록)
+    """
+
+    def __init__(self, start_date: Optional[datetime], end_date: Optional[datetime], progress: ReportProgress,
+                 on_user_done: Optional[Callable[[int, bool, Optional[str]], None]] = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.progress = progress
+        self.on_user_done = on_user_done
+        self.failed_users: List[int] = []
+        self._failed_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(REPORT_MAX_IN_FLIGHT)
+        self._pending = 0
+        self._all_done = threading.Condition()
+
+        self.llm_pool = ThreadPoolExecutor(REPORT_LLM_CONCURRENCY, thread_name_prefix="report-llm")
+        if REPORT_RENDER_WORKERS > 0:
+            # fork 시 부모의 스레드/락 상태가 복제되지 않도록 spawn
+            self.render_pool = ProcessPoolExecutor(REPORT_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.render_pool = ThreadPoolExecutor(1, thread_name_prefix="report-render")
+        self.send_pool = ThreadPoolExecutor(REPORT_SEND_CONCURRENCY, thread_name_prefix="report-send")
+
+    # ---------- 단계 연결 ----------
+    def _submit(self, stage: str, pool, fn, args, on_success, user: dict, timed: bool = False):
+        # timed=True: fn이 직접 (결과, 실행 시간)을 반환 (프로세스 풀용 진입점)
+        self.progress.stage_started(stage)
+        future = pool.submit(fn, *args) if timed else pool.submit(_timed, fn, *args)
+
+        def _done(f):
+            error = f.exception()
+            if error is not None:
+                self.progress.stage_finished(stage, 0.0, ok=False)
+                self._finish(user, False, f"{stage} 단계 실패: {error}")
+                return
+            result, elapsed = f.result()
+            self.progress.stage_finished(stage, elapsed, ok=True)
+            try:
+                on_success(result)
+            except Exception as e:
+                self._finish(user, False, f"{stage} 이후 처리 실패: {e}")
+
+        future.add_done_callback(_done)
+
+    def _finish(self, user: dict, ok: bool, error_msg: Optional[str] = None):
+        user_id = user.get("id")
+        if not ok:
+            logger.error(f"사용자 처리 실패: user_id={user_id}, reason={error_msg}")
+            with self._failed_lock:
+                self.failed_users.append(user_id)
+        self.progress.user_finished(ok)
+        if self.on_user_done:
+            try:
+                self.on_user_done(user_id, ok, error_msg)
+            except Exception as e:
+                logger.error(f"진행 상황 기록 실패: user_id={user_id}, error={e}")
+        self._slots.release()
+        with self._all_done:
+            self._pending -= 1
+            self._all_done.notify_all()
+
+    def submit_user(self, user: dict, stats: Dict):
+        """통계가 계산된 사용자를 feedback 단계부터 흘려보냄"""
+        self._slots.acquire()
+        with self._all_done:
+            self._pending += 1
+
+        user_id = user.get("id")
+        user_name = user.get("name", f"User_{user_id}")
+
+        def after_sent(email_sent: bool):
+            if not email_sent:
+                logger.warning(f"이메일 전송 실패: user_id={user_id}")
+                self._finish(user, False, "이메일 전송 실패")
+            else:
+                self._finish(user, True)
+
+        def after_render(pdf_bytes: bytes):
+            self._submit("send", self.send_pool, _send_report,
+                         (user, pdf_bytes, self.start_date, self.end_date), after_sent, user)
+
+        def after_feedback(report: UserReport):
+            self._submit("render", self.render_pool, render_report_timed, (report,), after_render, user, timed=True)
+
+        self._submit("feedback", self.llm_pool, _build_report,
+                     (stats, user_id, user_name, self.start_date, self.end_date), after_feedback, user)
+
+    def wait(self):
+        with self._all_done:
+            while self._pending:
+                self._all_done.wait()
+
+    def shutdown(self):
+        for pool in (self.llm_pool, self.render_pool, self.send_pool):
+            pool.shutdown(wait=True)
 
 
 def generate_reports_for_users(
     user_activity_map: Dict[int, List[int]],
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    progress: Optional[ReportProgress] = None,
+    on_user_done: Optional[Callable[[int, bool, Optional[str]], None]] = None,
 ) -> Tuple[str, List[int]]:
-    success_count = 0
+    """on_user_done(user_id, ok, error): 사용자 1명 처리가 끝날 때마다 호출 (리포트 작업 진행 기록용)"""
     failed_users: List[int] = []
+    progress = progress or ReportProgress()
+
+    def skip(user_id, reason):
+        failed_users.append(user_id)
+        progress.user_finished(False)
+        # id가 없는 사용자는 작업 저장소에 기록할 수 없음 (ReportPipeline._finish와 같이 콜백 오류는 격리)
+        if on_user_done and user_id is not None:
+            try:
+                on_user_done(user_id, False, reason)
+            except Exception as e:
+                logger.error(f"진행 상황 기록 실패: user_id={user_id}, error={e}")
     
     if not user_activity_map:
         logger.warning("처리할 사용자가 없습니다")
         return "처리할 사용자가 없습니다", []
 
     try:
-        with get_db_session() as db:
-            # 사용자 데이터 로딩
-            target_user_ids = set(user_activity_map.keys())
-            user_dict = load_all_users()
-            
-            # 필요한 사용자만 필터링
-            user_payloads = [
-                user for user in user_dict.values() 
-                if user.get("id") in target_user_ids
-            ]
-            
-            if not user_payloads:
-                logger.warning(f"유효한 사용자를 찾을 수 없습니다: {target_user_ids}")
-                return "유효한 사용자를 찾을 수 없습니다", list(target_user_ids)
-
-            logger.info(f"리포트 생성 시작: {len(user_payloads)}명 처리 예정")
-
-            # 각 사용자별 처리
-            for user in user_payloads:
-                user_id = user.get("id")
-                success, error_msg = _process_single_user(
-                    user, user_activity_map, start_date, end_date, db
-                )
-                
-                if success:
-                    success_count += 1
-                else:
-                    failed_users.append(user_id)
-                    logger.error(f"사용자 처리 실패: user_id={user_id}, reason={error_msg}")
+        # 필요한 사용자만 id로 조회
+        target_user_ids = set(user_activity_map.keys())
+        profiles = {uid: load_user_profile(uid) for uid in target_user_ids}
+        # 프로필이 없는 사용자도 실패로 기록되므로 전체 수에 포함
+        progress.total = len(profiles)
+
+        user_payloads = []
+        for uid, p in profiles.items():
+            if not p:
+                skip(uid, "사용자 정보가 없음")
+            elif not p.get("id"):
+                # 조회에 쓴 id로 기록 (작업 저장소의 사용자 행이 pending으로 남지 않도록)
+                logger.warning(f"프로필에 사용자 ID가 없음: user_id={uid}")
+                skip(uid, "사용자 ID가 없음")
+            else:
+                user_payloads.append(p)
+
+        if not user_payloads:
+            logger.warning(f"유효한 사용자를 찾을 수 없습니다: {target_user_ids}")
+            return "유효한 사용자를 찾을 수 없습니다", list(target_user_ids)
+
+        logger.info(f"리포트 생성 시작: {len(user_payloads)}명 처리 예정")
+
+        eligible = []
+        for user in user_payloads:
+            user_id = user.get("id")
+            if not user.get("email"):
+                logger.warning(f"사용자 이메일이 없음: user_id={user_id}")
+                skip(user_id, "이메일 주소가 없음")
+                continue
+            eligible.append(user)
+
+        pipeline = ReportPipeline(start_date, end_date, progress, on_user_done)
+        try:
+            for i in range(0, len(eligible), REPORT_STATS_BATCH):
+                batch = eligible[i:i + REPORT_STATS_BATCH]
+                try:
+                    stats_by_user, elapsed = _timed(
+                        _load_bulk_stats, {u["id"]: user_activity_map.get(u["id"], []) for u in batch}
+                    )
+                except Exception as e:
+                    progress.stage_batch("stats", len(batch), 0.0, ok=False)
+                    for user in batch:
+                        logger.error(f"사용자 처리 실패: user_id={user['id']}, reason=stats 단계 실패: {e}")
+                        skip(user["id"], f"stats 단계 실패: {e}")
+                    continue
+                progress.stage_batch("stats", len(batch), elapsed, ok=True)
+                # 다음 배치 통계는 앞 배치가 파이프라인을 도는 동안 계산됨 (REPORT_MAX_IN_FLIGHT에서 대기)
+                for user in batch:
+                    pipeline.submit_user(user, stats_by_user[user["id"]])
+            pipeline.wait()
+        finally:
+            pipeline.shutdown()
+        failed_users.extend(pipeline.failed_users)
 
         # 결과 메시지 생성
+        success_count = progress.done
         result_message = f"월간 리포트 생성 완료: 성공 {success_count}명"
         if failed_users:
             failed_str = ", ".join(str(uid) for uid in failed_users)
             result_message += f", 실패 {len(failed_users)}명 (user_ids: {failed_str})"
             
-        logger.info(result_message)
+        logger.info(f"{result_message} | 단계별: {progress.snapshot()['stages']}")
         return result_message, failed_users
 
     except Exception as e:
         logger.error(f"배치 처리 중 치명적 오류: {e}", exc_info=True)
-        raise AppException(ErrorCode.REPORT_GENERATION_FAILED)
\ No newline at end of file
+        raise AppException(ErrorCode.REPORT_GENERATION_FAILED)
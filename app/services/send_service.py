@@ -1,6 +1,12 @@
 import os
+import time
+import queue
+import atexit
+import random
 import logging
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
@@ -9,19 +15,218 @@ from dotenv import load_dotenv
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-def send_email_with_pdf_attachment(to_email, subject, body, pdf_bytes, filename):
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
+# -----------------------------
+# SMTP 커넥션 풀
+# -----------------------------
+# - 로그인까지 마친 연결을 최대 SMTP_POOL_SIZE개 유지하고 여러 메일을 같은 연결로 전송
+#   (메일마다 TCP + STARTTLS + AUTH 왕복을 반복하지 않음)
+# - 연결당 SMTP_MAX_MESSAGES_PER_CONN통 보내면 새로 연결 (서버별 세션당 전송 제한 대응)
+# - 오래 쉬었던 연결은 NOOP으로 확인 후 사용, 끊겼으면 재연결
+# - 4xx(일시적 거절/스로틀링)와 연결 끊김은 지수 백오프 후 재시도, 5xx는 즉시 실패
+# - 토큰 버킷으로 초당 전송 수 제한 (SMTP_RATE_PER_SEC, 0이면 제한 없음)
 
-    if not all([smtp_user, smtp_password, smtp_server, smtp_port]):
-        logger.warning("[환경변수 오류] SMTP 설정을 확인하세요.")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "3"))
+SMTP_MAX_MESSAGES_PER_CONN = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONN", "100"))
+SMTP_IDLE_CHECK_SEC = float(os.getenv("SMTP_IDLE_CHECK_SEC", "30"))
+SMTP_RATE_PER_SEC = float(os.getenv("SMTP_RATE_PER_SEC", "5"))
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+SMTP_TIMEOUT_SEC = float(os.getenv("SMTP_TIMEOUT_SEC", "30"))
+
+
+class RateLimiter:
+    """토큰 버킷: 평균 rate/초, 순간 최대 burst개"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+def _is_transient(exc: Exception) -> bool:
+    """재시도할 만한 오류인지 (연결 끊김/타임아웃, 4xx 응답)"""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPException):  # SMTPException도 OSError 하위 클래스
         return False
+    return isinstance(exc, OSError)  # 연결 거부/리셋, 타임아웃
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = None,
+        password: str = None,
+        starttls: bool = True,
+        size: int = SMTP_POOL_SIZE,
+        max_messages_per_conn: int = SMTP_MAX_MESSAGES_PER_CONN,
+        idle_check_sec: float = SMTP_IDLE_CHECK_SEC,
+        rate_per_sec: float = SMTP_RATE_PER_SEC,
+        max_retries: int = SMTP_MAX_RETRIES,
+        timeout: float = SMTP_TIMEOUT_SEC,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.max_messages_per_conn = max_messages_per_conn
+        self.idle_check_sec = idle_check_sec
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate_per_sec, burst=size)
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()  # 최근에 쓴 연결부터 재사용
+        self.stats = {"connects": 0, "sent": 0, "retries": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
 
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._count("connects")
+        return _PooledConnection(smtp)
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - conn.last_used < self.idle_check_sec:
+                return conn
+            # 오래 쉬었던 연결은 서버가 이미 끊었을 수 있음
+            try:
+                if conn.smtp.noop()[0] == 250:
+                    return conn
+            except Exception:
+                pass
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except Exception:
+            # 오류가 난 연결은 상태를 알 수 없으니 버림
+            if conn is not None:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                conn.last_used = time.monotonic()
+                if conn.sent >= self.max_messages_per_conn:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+            self._slots.release()
+
+    def send(self, message):
+        """실패하면 마지막 예외를 그대로 raise"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with self.connection() as conn:
+                    conn.smtp.send_message(message)
+                    conn.sent += 1
+                self._count("sent")
+                return
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient(e):
+                    self._count("failed")
+                    raise
+                self._count("retries")
+                delay = min(30.0, 2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"[메일 재시도] {attempt + 1}/{self.max_retries}, {delay:.1f}초 후: {e}")
+                time.sleep(delay)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """환경변수 기준 공용 풀 (설정이 없으면 None)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                smtp_user = os.getenv("SMTP_USER")
+                smtp_password = os.getenv("SMTP_PASSWORD")
+                smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+                smtp_port = int(os.getenv("SMTP_PORT", 587))
+                if not all([smtp_user, smtp_password, smtp_server, smtp_port]):
+                    return None
+                _pool = SMTPConnectionPool(
+                    smtp_server, smtp_port, smtp_user, smtp_password,
+                    starttls=os.getenv("SMTP_STARTTLS", "1") == "1",
+                )
+                atexit.register(_pool.close)
+    return _pool
+
+
+def build_pdf_message(from_email, to_email, subject, body, pdf_bytes, filename):
     # 이메일 메시지 생성
     message = MIMEMultipart()
-    message['From'] = smtp_user
+    message['From'] = from_email
     message['To'] = to_email
     message['Subject'] = subject
     message.attach(MIMEText(body, 'plain'))
@@ -30,13 +235,18 @@ def send_email_with_pdf_attachment(to_email, subject, body, pdf_bytes, filename)
     attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
     attachment.add_header('Content-Disposition', 'attachment', filename=filename)
     message.attach(attachment)
+    return message
+
+
+def send_email_with_pdf_attachment(to_email, subject, body, pdf_bytes, filename):
+    pool = get_smtp_pool()
+    if pool is None:
+        logger.warning("[환경변수 오류] SMTP 설정을 확인하세요.")
+        return False
 
+    message = build_pdf_message(pool.user, to_email, subject, body, pdf_bytes, filename)
     try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.send_message(message)
-        server.quit()
+        pool.send(message)
         logger.info(f"[메일 전송 완료] {to_email}에게 {filename} 전송")
         return True
     except Exception as e:
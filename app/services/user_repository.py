@@ -0,0 +1,176 @@
+import os, json, sqlite3, threading
+from collections import OrderedDict
+from pathlib import Path
+
+# -----------------------------
+# 사용자 프로필 저장소
+# -----------------------------
+# - SQLite(WAL) 테이블 1개: id(PK) -> 프로필 JSON
+#   → 조회/저장이 사용자 수와 무관하게 키 인덱스 1회 (users.json 전체 읽기/쓰기 제거)
+#   → 저장은 트랜잭션 단위라 워커 여러 개가 동시에 써도 파일이 깨지지 않음
+# - 앞단에 프로세스 내 LRU, 다른 커넥션(워커)의 커밋은 PRAGMA data_version으로 감지해 LRU 비움
+# - 최초 실행 시 DB가 비어 있고 users.json이 있으면 한 번에 가져옴
+
+USER_DB_PATH = Path(os.getenv("USER_DB_PATH", "app/data/users.db"))
+USER_JSON_PATH = Path(os.getenv("USER_JSON_PATH", "app/data/users.json"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+
+class UserRepository:
+    def __init__(self, path: Path = USER_DB_PATH, cache_size: int = USER_CACHE_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # user_id(str) -> profile
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, profile TEXT NOT NULL)"
+        )
+
+    def _conn(self):
+        # sqlite 커넥션은 스레드별로 1개
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.data_version = None
+        return conn
+
+    def _sync_cache(self, conn):
+        # 다른 커넥션이 커밋했으면 data_version이 바뀜 → 오래된 LRU 항목 폐기
+        # data_version은 커넥션마다 따로 세는 값이라 커넥션끼리 비교할 수 없음
+        # → 새 커넥션(새 스레드)의 첫 확인 때도 비움 (그 전에 다른 프로세스가 쓴 변경을 알 수 없으므로)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._local.data_version:
+            with self._cache_lock:
+                self._cache.clear()
+            self._local.data_version = version
+
+    def _remember(self, user_id: str, profile: dict):
+        with self._cache_lock:
+            self._cache[user_id] = profile
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ---------- 조회 ----------
+    def get(self, user_id) -> dict | None:
+        user_id = str(user_id)
+        conn = self._conn()
+        self._sync_cache(conn)
+        with self._cache_lock:
+            profile = self._cache.get(user_id)
+            if profile is not None:
+                self._cache.move_to_end(user_id)
+                return profile
+        row = conn.execute("SELECT profile FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        profile = json.loads(row[0])
+        self._remember(user_id, profile)
+        return profile
+
+    def all(self) -> dict:
+        """{id: profile} (등록 순서)"""
+        rows = self._conn().execute("SELECT id, profile FROM users ORDER BY rowid").fetchall()
+        return {user_id: json.loads(profile) for user_id, profile in rows}
+
+    def page(self, after: int = 0, limit: int = 100, fields=None):
+        """
+        커서(rowid) 기반 페이지 조회 — OFFSET 없이 PK 범위 스캔이라 뒤쪽 페이지도 같은 비용
+        return: ([profile, ...], next_cursor 또는 None)
+        """
+        rows = self._conn().execute(
+            "SELECT rowid, profile FROM users WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after, limit + 1),
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        profiles = [_project(json.loads(profile), fields) for _, profile in rows]
+        return profiles, (rows[-1][0] if has_more else None)
+
+    def iter_all(self, fields=None, batch_size: int = 1000):
+        """전체 사용자를 batch_size씩 끊어 읽으며 하나씩 yield (메모리 일정)"""
+        cursor = 0
+        while True:
+            profiles, cursor = self.page(cursor, batch_size, fields)
+            yield from profiles
+            if cursor is None:
+                return
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    # ---------- 저장 ----------
+    def put(self, profile: dict):
+        self.put_many([profile])
+
+    def put_many(self, profiles):
+        """여러 프로필을 트랜잭션 1번으로 upsert (중간에 실패하면 전부 롤백)"""
+        rows = [(str(p["id"]), json.dumps(p, ensure_ascii=False)) for p in profiles]
+        if not rows:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO users (id, profile) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET profile = excluded.profile",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # 내 커밋은 내 커넥션의 data_version을 바꾸지 않으므로 LRU를 직접 갱신
+        for (user_id, _), profile in zip(rows, profiles):
+            self._remember(user_id, dict(profile))
+        return len(rows)
+
+    def import_json(self, path: Path = USER_JSON_PATH) -> int:
+        """기존 users.json({id: profile})을 한 번에 가져오기"""
+        path = Path(path)
+        if not path.exists():
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                users = json.load(f) or {}
+            except json.JSONDecodeError:
+                return 0
+        profiles = [{**p, "id": p.get("id", user_id)} for user_id, p in users.items()]
+        return self.put_many(profiles)
+
+
+def _project(profile: dict, fields=None) -> dict:
+    if not fields:
+        return profile
+    return {k: profile.get(k) for k in fields}
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_user_repository() -> UserRepository:
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                repo = UserRepository()
+                if repo.count() == 0:
+                    imported = repo.import_json()
+                    if imported:
+                        print(f"[users] {USER_JSON_PATH} → {USER_DB_PATH} {imported}명 가져옴")
+                _repository = repo
+    return _repository
+
+
+if __name__ == "__main__":
+    # 사용 예: python -m app.services.user_repository app/data/users.json
+    import sys
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else USER_JSON_PATH
+    n = UserRepository().import_json(src)
+    print(f"[users] {src} → {USER_DB_PATH} {n}명 가져옴")
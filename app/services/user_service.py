@@ -1,40 +1,36 @@
-import os
-import json
+from app.services.user_repository import get_user_repository
 
-USER_TABLE_PATH = "app/data/users.json"
+# 프로필은 user_repository(SQLite + LRU)에 저장
+# 기존 app/data/users.json은 최초 실행 시 자동으로 가져옴
 
-def save_user_profile(profile_data: dict):
-    user_id = str(profile_data["id"])
-    users = {}
 
-    if os.path.exists(USER_TABLE_PATH):
-        with open(USER_TABLE_PATH, "r", encoding="utf-8") as f:
-            try:
-                users = json.load(f)
-            except json.JSONDecodeError:
-                users = {}
+def save_user_profile(profile_data: dict):
+    get_user_repository().put(profile_data)
 
-    users[user_id] = profile_data
 
-    with open(USER_TABLE_PATH, "w", encoding="utf-8") as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+def save_user_profiles(profiles: list[dict]) -> int:
+    # 여러 명을 트랜잭션 1번으로 저장
+    return get_user_repository().put_many(profiles)
 
 
 def load_user_profile(user_id: str) -> dict | None:
-    if not os.path.exists(USER_TABLE_PATH):
-        return None
     try:
-        with open(USER_TABLE_PATH, "r", encoding="utf-8") as f:
-            users = json.load(f)
-        return users.get(str(user_id))
+        return get_user_repository().get(user_id)
     except Exception:
         return None
-    
+
+def load_users_page(cursor: int = 0, limit: int = 100, fields=None):
+    # (프로필 리스트, 다음 커서) — 다음 커서가 None이면 마지막 페이지
+    return get_user_repository().page(cursor, limit, fields)
+
+
+def iter_users(fields=None, batch_size: int = 1000):
+    # 전체 사용자를 일정 메모리로 순회 (리포트 배치, NDJSON 내보내기)
+    return get_user_repository().iter_all(fields, batch_size)
+
+
 def load_all_users() -> dict:
-    if not os.path.exists(USER_TABLE_PATH):
-        return {}
     try:
-        with open(USER_TABLE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
+        return get_user_repository().all()
     except Exception:
-        return {}
\ No newline at end of file
+        return {}
@@ -3,6 +3,8 @@ from enum import Enum
 class ErrorCode(Enum):
     VALIDATION_ERROR = ("VALIDATION_ERROR", "요청 데이터가 유효하지 않습니다.", 422)
     INTERNAL_SERVER_ERROR = ("INTERNAL_SERVER_ERROR", "서버 내부 오류가 발생했습니다.", 500)
+    SERVER_BUSY = ("SERVER_BUSY", "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해 주세요.", 503)
+    BULK_REQUEST_TOO_LARGE = ("BULK_REQUEST_TOO_LARGE", "한 번에 등록할 수 있는 사용자 수를 초과했습니다.", 413)
     USER_PROFILE_MISSING = ("USER_PROFILE_MISSING", "사용자 정보가 없습니다. 먼저 입력해 주세요.", 400)
     NO_RELEVANT_DOCUMENT = ("NO_RELEVANT_DOCUMENT", "관련 정보를 찾지 못했습니다.", 404)
     NOT_FOUND_OPENAI_API_KEY = ("NOT_FOUND_OPENAI_API_KEY", "OPEN_API_KEY를 찾을 수 없습니다. .env 파일을 확인해주세요.", 400)
@@ -16,6 +18,7 @@ class ErrorCode(Enum):
     FILE_READ_ERROR = ("FILE_READ_ERROR", "파일 읽기에 실패했습니다.", 500)
     DATA_ACCESS_ERROR = ("DATA_ACCESS_ERROR", "데이터 접근 중 오류가 발생했습니다.", 500)
     REPORT_GENERATION_FAILED = ("REPORT_GENERATION_FAILED", "리포트 생성 중 오류가 발생했습니다.", 500)
+    REPORT_JOB_NOT_FOUND = ("REPORT_JOB_NOT_FOUND", "해당 리포트 작업을 찾을 수 없습니다.", 404)
 
     def __init__(self, code: str, message: str, http_status: int):
         self._code = code
@@ -1,10 +1,14 @@
 class Message:
     USER_REGISTER_SUCCESS = "사용자 정보가 성공적으로 저장되었습니다."
+    USER_BULK_REGISTER_SUCCESS = "사용자 일괄 등록을 처리했습니다."
     USER_QUERY_SUCCESS = "사용자 정보가 성공적으로 조회되었습니다."
     CHAT_RESPONSE_SUCCESS = "사용자 정보를 반영해 성공적으로 응답했습니다."
+    CHAT_CACHE_STATS_SUCCESS = "응답 캐시 현황을 조회했습니다."
     
     USER_ADD_ACTIVITY_SUCCESS = "활동이 성공적으로 등록되었습니다."
     ACTIVITY_SAVE_SUCCESS = "활동이 성공적으로 등록되었습니다."
     ACTIVITY_LIST_SUCCESS = "활동 목록을 조회했습니다."
 
-    USERS_REPORT_SUCCESS = "사용자의 리포트가 성공적으로 발송되었습니다."
\ No newline at end of file
+    USERS_REPORT_SUCCESS = "사용자의 리포트가 성공적으로 발송되었습니다."
+    REPORT_JOB_ACCEPTED = "리포트 작업이 등록되었습니다. 진행 상황은 /report/{job_id}에서 확인할 수 있습니다."
+    REPORT_JOB_QUERY_SUCCESS = "리포트 작업 진행 상황을 조회했습니다."
\ No newline at end of file
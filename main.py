@@ -1,9 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Query
+from pydantic import ValidationError
 from app.models.user import UserProfile, ChatRequest
-from app.services.user_service import save_user_profile, load_user_profile, load_all_users
-from app.chatbot.Agent_Rag_Chatbot import api_run, initialize_activities, activities
+from app.services.user_service import save_user_profile, save_user_profiles, load_user_profile, load_users_page, iter_users
+from app.chatbot.Agent_Rag_Chatbot import api_run, api_run_stream, response_cache_stats
 #from app.chatbot.Agent_Rag_Chatbot import run_query, initialize_activities, activities
-from app.services.report_service import generate_reports_for_users
+from app.services.report_jobs import submit_report_job, get_report_job, get_report_job_runner
 from app.utils.constants.message import Message
 from app.models.response.base_response import response, BaseResponse
 from app.models.request.report_request import ReportRequest
@@ -12,9 +13,14 @@ from app.utils.app_exception import AppException
 from fastapi.exceptions import RequestValidationError
 from app.utils.exception_handler import app_exception_handler, generic_exception_handler, validation_exception_handler
 from datetime import datetime
-import os, glob
+import os, glob, json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from fastapi.staticfiles import StaticFiles   
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.models.response.base_response import error_response
 
 app = FastAPI()
 
@@ -26,6 +32,17 @@ REPORT_DIR = os.getenv("REPORT_DIR", "reports")
 os.makedirs(REPORT_DIR, exist_ok=True)
 app.mount("/reports", StaticFiles(directory=REPORT_DIR, html=False), name="reports")
 
+# 챗봇 파이프라인(OpenAI/FAISS/MySQL 동기 호출)은 이벤트 루프 밖의 전용 스레드 풀에서 실행
+CHAT_MAX_WORKERS = int(os.getenv("CHAT_MAX_WORKERS", "8"))     # 동시에 실행하는 /chat 요청 수
+CHAT_MAX_PENDING = int(os.getenv("CHAT_MAX_PENDING", "32"))    # 실행 + 대기 요청 상한 (초과 시 503)
+chat_executor = ThreadPoolExecutor(max_workers=CHAT_MAX_WORKERS, thread_name_prefix="chat")
+chat_slots = asyncio.Semaphore(CHAT_MAX_PENDING)
+
+@app.on_event("startup")
+def start_report_job_runner():
+    # 재시작 전에 끝나지 않은 리포트 작업(pending 사용자)을 이어서 처리
+    get_report_job_runner().start()
+
 # @app.get("/error-test") - 에러 핸들러 테스트용(해봄)
 # def test_error():
 #     raise AppException(ErrorCode.USER_PROFILE_MISSING)
@@ -48,25 +65,146 @@ async def register_user(profile: UserProfile):
             }
         )
 
+REGISTER_BULK_MAX_ITEMS = int(os.getenv("REGISTER_BULK_MAX_ITEMS", "100000"))
+
+
+def _parse_bulk_profiles(body: bytes, content_type: str):
+    """JSON 배열 또는 NDJSON(한 줄에 프로필 1개) → 항목 리스트 (줄 단위 파싱 오류는 항목 오류로)"""
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                items.append(e)
+        return items
+    data = json.loads(body)
+    if isinstance(data, dict):
+        data = data.get("users")
+    if not isinstance(data, list):
+        raise ValueError("JSON 배열이 아닙니다.")
+    return data
+
+
+def _register_bulk(items: list):
+    """한 번에 검증 → 유효한 프로필만 트랜잭션 1번으로 저장 → 항목별 결과"""
+    results, valid = [], {}
+    for i, item in enumerate(items):
+        if isinstance(item, json.JSONDecodeError):
+            results.append({"index": i, "id": None, "status": "error", "error": f"JSON 파싱 실패: {item.msg}"})
+            continue
+        try:
+            profile = UserProfile.model_validate(item).model_dump()
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            item_id = item.get("id") if isinstance(item, dict) else None
+            results.append({"index": i, "id": item_id, "status": "error", "error": errors})
+            continue
+        # 같은 id가 여러 번 오면 마지막 항목으로 저장
+        valid[profile["id"]] = profile
+        results.append({"index": i, "id": profile["id"], "status": "ok", "error": None})
+
+    save_user_profiles(list(valid.values()))
+    saved = sum(1 for r in results if r["status"] == "ok")
+    return {"total": len(results), "saved": saved, "failed": len(results) - saved, "results": results}
+
+
+@app.post("/register/bulk", response_model=BaseResponse,
+    summary="사용자 일괄 등록",
+    description="UserProfile 배열(application/json) 또는 한 줄에 하나씩인 NDJSON(application/x-ndjson)을 받아 "
+                "한 번에 검증하고 유효한 항목을 단일 트랜잭션으로 저장합니다. 항목별 결과(index, id, status, error)를 반환합니다.",
+    tags=["사용자 정보"],
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/UserProfile"}}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+    responses={
+        413: {"model": BaseResponse, "description": ErrorCode.BULK_REQUEST_TOO_LARGE.message},
+        422: {"model": BaseResponse, "description": ErrorCode.VALIDATION_ERROR.message},
+        500: {"model": BaseResponse, "description": ErrorCode.INTERNAL_SERVER_ERROR.message}
+    })
+async def register_users_bulk(request: Request):
+    body = await request.body()
+    try:
+        items = _parse_bulk_profiles(body, request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError):
+        raise AppException(ErrorCode.VALIDATION_ERROR)
+    if len(items) > REGISTER_BULK_MAX_ITEMS:
+        raise AppException(ErrorCode.BULK_REQUEST_TOO_LARGE)
+
+    # 검증 + 저장은 CPU/디스크 작업이라 이벤트 루프 밖에서
+    result = await asyncio.get_running_loop().run_in_executor(None, _register_bulk, items)
+    return response(
+        message=Message.USER_BULK_REGISTER_SUCCESS,
+        data=result
+    )
+
+USERS_PAGE_MAX = int(os.getenv("USERS_PAGE_MAX", "1000"))
+
+
+def _parse_user_fields(fields: str | None):
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    if not names or any(n not in UserProfile.model_fields for n in names):
+        raise AppException(ErrorCode.VALIDATION_ERROR)
+    # 응답의 users는 id를 키로 쓰므로 id는 항상 포함
+    return names if "id" in names else ["id"] + names
+
+
+def _users_ndjson(fields):
+    for profile in iter_users(fields):
+        yield json.dumps(profile, ensure_ascii=False) + "\n"
+
+
 @app.get("/users", response_model=BaseResponse,
     summary="전체 사용자 조회",
-    description="등록된 모든 사용자 정보를 조회합니다.",
+    description="등록된 사용자 정보를 커서 기반 페이지로 조회합니다. "
+                "응답의 next_cursor를 다음 요청의 cursor로 넘기면 다음 페이지를 받고, null이면 마지막 페이지입니다. "
+                "fields=id,name,email 처럼 필요한 필드만 받을 수 있고, format=ndjson이면 전체 사용자를 한 줄에 한 명씩 스트리밍합니다.",
     tags=["사용자 정보"],
     responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        422: {"model": BaseResponse, "description": ErrorCode.VALIDATION_ERROR.message},
         500: {"model": BaseResponse, "description": ErrorCode.INTERNAL_SERVER_ERROR.message}
     })
-async def get_all_users():
+async def get_all_users(
+    cursor: int = Query(0, ge=0, description="이전 응답의 next_cursor (처음이면 생략)"),
+    limit: int = Query(100, ge=1, description=f"페이지 크기 (최대 {USERS_PAGE_MAX})"),
+    fields: str | None = Query(None, description="쉼표로 구분한 필드 목록 (예: id,name,email)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json(페이지) 또는 ndjson(전체 스트리밍)"),
+):
+    field_names = _parse_user_fields(fields)
+    if format == "ndjson":
+        return StreamingResponse(_users_ndjson(field_names), media_type="application/x-ndjson")
+
     try:
-        users_data = load_all_users()
-        return response(
-            message=Message.USER_QUERY_SUCCESS,
-            data={
-                "users": users_data,
-                "count": len(users_data)
-            }
+        users, next_cursor = await asyncio.get_running_loop().run_in_executor(
+            None, load_users_page, cursor, min(limit, USERS_PAGE_MAX), field_names
         )
     except Exception as e:
         raise AppException(ErrorCode.INTERNAL_SERVER_ERROR)
+    return response(
+        message=Message.USER_QUERY_SUCCESS,
+        data={
+            "users": {str(u.get("id")): u for u in users},
+            "count": len(users),
+            "next_cursor": next_cursor
+        }
+    )
+
+
+def _run_chat(user_id: int, user_question: str):
+    user_profile = load_user_profile(user_id)
+    if not user_profile:
+        raise AppException(ErrorCode.USER_PROFILE_MISSING)
+
+    # JSON의 경우 아래 실행
+    #result = run_query(user_profile, user_question)
+    # DB의 경우 아래 실행 (활동/인덱스는 최초 호출 시 한 번만 로드)
+    return api_run(user_profile, user_question, session_id=user_id)
 
 
 @app.post("/chat", response_model=BaseResponse,
@@ -77,25 +215,17 @@ async def get_all_users():
         400: {"model": BaseResponse, "description": ErrorCode.USER_PROFILE_MISSING.message},
         404: {"model": BaseResponse, "description": ErrorCode.NO_RELEVANT_DOCUMENT.message},
         422: {"model": BaseResponse, "description": ErrorCode.VALIDATION_ERROR.message},
-        500: {"model": BaseResponse, "description": ErrorCode.INTERNAL_SERVER_ERROR.message}
+        500: {"model": BaseResponse, "description": ErrorCode.INTERNAL_SERVER_ERROR.message},
+        503: {"model": BaseResponse, "description": ErrorCode.SERVER_BUSY.message}
     })
 async def chat_with_bot(request: ChatRequest):
-    user_id = request.id
-    user_question = request.question
-
-    user_profile = load_user_profile(user_id)
-    if not user_profile:
-        raise AppException(ErrorCode.USER_PROFILE_MISSING)
-
-    if not activities:
-        initialize_activities()
-
+    # 대기열이 가득 차면 바로 거절 (느린 LLM 응답이 요청을 무한정 쌓지 않도록)
+    if chat_slots.locked():
+        raise AppException(ErrorCode.SERVER_BUSY)
 
-    
-    # JSON의 경우 아래 실행
-    #result = run_query(user_profile, user_question)
-    # DB의 경우 아래 실행
-    result = api_run(user_profile, user_question)
+    async with chat_slots:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(chat_executor, _run_chat, request.id, request.question)
     
     return response(
         message=Message.CHAT_RESPONSE_SUCCESS,
@@ -108,11 +238,105 @@ async def chat_with_bot(request: ChatRequest):
         data = result
     )
 
+def _close_quietly(events):
+    # 실행 중인 next()가 끝난 뒤에만 호출됨 → 생성기 finally(세션 상태 저장)가 여기서 실행
+    try:
+        events.close()
+    except Exception as e:
+        print(f"[chat/stream] 스트림 정리 실패: {e}")
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@app.post("/chat/stream",
+    summary="챗봇과 대화 요청 (스트리밍)",
+    description="/chat과 같은 답변을 Server-Sent Events로 전송합니다. "
+                "delta 이벤트(답변 조각)가 순서대로 오고, 마지막에 sources 이벤트와 done 이벤트가 옵니다.",
+    tags=["챗봇 통신"],
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        400: {"model": BaseResponse, "description": ErrorCode.USER_PROFILE_MISSING.message},
+        422: {"model": BaseResponse, "description": ErrorCode.VALIDATION_ERROR.message},
+        503: {"model": BaseResponse, "description": ErrorCode.SERVER_BUSY.message}
+    })
+async def chat_with_bot_stream(request: ChatRequest):
+    # 확인과 획득 사이에 await가 없으므로 한 번에 처리됨 (가득 차면 기다리지 않고 바로 503)
+    if chat_slots.locked():
+        raise AppException(ErrorCode.SERVER_BUSY)
+    await chat_slots.acquire()
+
+    released = False
+
+    def release_slot():
+        # 스트림 finally와 응답 후 백그라운드 작업 중 먼저 오는 쪽에서 1번만 반환
+        # (스트림이 시작되기 전에 연결이 끊기면 생성기 finally가 실행되지 않음)
+        nonlocal released
+        if not released:
+            released = True
+            chat_slots.release()
+
+    try:
+        loop = asyncio.get_running_loop()
+        # 프로필 누락은 스트림 시작 전에 일반 에러 응답으로
+        user_profile = await loop.run_in_executor(chat_executor, load_user_profile, request.id)
+        if not user_profile:
+            raise AppException(ErrorCode.USER_PROFILE_MISSING)
+    except BaseException:
+        release_slot()
+        raise
+
+    async def event_stream():
+        events = api_run_stream(user_profile, request.question, session_id=request.id)
+        done = object()
+        pending = None  # 워커에서 실행 중인 next(events)
+        try:
+            while True:
+                # 생성기의 각 단계(검색, LLM 토큰 대기)도 챗봇 스레드 풀에서 실행
+                pending = chat_executor.submit(next, events, done)
+                item = await asyncio.wrap_future(pending)
+                if item is done:
+                    break
+                kind, payload = item
+                yield _sse(kind, {"text": payload} if kind == "delta" else {"sources": payload})
+            yield _sse("done", {"message": Message.CHAT_RESPONSE_SUCCESS})
+        except Exception as e:
+            error = e.error if isinstance(e, AppException) else ErrorCode.INTERNAL_SERVER_ERROR
+            _, body = error_response(error)
+            yield _sse("error", body)
+        finally:
+            # 클라이언트가 끊겨도 세션 상태 저장(생성기 finally)은 워커 스레드에서 마무리
+            # 실행 중인 next()가 있으면 끝난 뒤에 close (실행 중인 생성기는 close할 수 없음)
+            if pending is None:
+                chat_executor.submit(_close_quietly, events)
+            else:
+                pending.add_done_callback(lambda _: chat_executor.submit(_close_quietly, events))
+            release_slot()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_slot),
+    )
+
+@app.get("/chat/cache", response_model=BaseResponse,
+    summary="챗봇 응답 캐시 현황",
+    description="응답 캐시의 적중(정확/유사)·미스 횟수, 적중률, 항목 수를 조회합니다.",
+    tags=["챗봇 통신"])
+async def get_chat_cache_stats():
+    return response(
+        message=Message.CHAT_CACHE_STATS_SUCCESS,
+        data=response_cache_stats()
+    )
+
 @app.post(
     "/report",
     response_model=BaseResponse,
     summary="리포트 생성",
-    description="사용자들에 대한 리포트를 생성해 알림을 전송합니다.",
+    description="사용자들에 대한 리포트 생성/메일 발송 작업을 등록하고 job_id를 바로 반환합니다. "
+                "진행 상황은 GET /report/{job_id}로 조회합니다.",
     tags=["리포트 전송"],
     responses={
         400: {"model": BaseResponse, "description": ErrorCode.INVALID_ACTIVITY_DATE_DATA.message},
@@ -147,24 +371,39 @@ async def create_report(request: ReportRequest):
 
 
     try:
-        msg, failed = generate_reports_for_users(
-            user_activity_map=user_activity_map,
-            start_date=start_date,
-            end_date=end_date,
+        # 작업만 저장하고 바로 반환, 처리는 백그라운드 러너가 담당
+        job_id = await asyncio.get_running_loop().run_in_executor(
+            None, submit_report_job, user_activity_map, start_date, end_date
         )
-    except AppException:
-        raise
     except Exception:
         raise AppException(ErrorCode.REPORT_GENERATION_FAILED)
 
-    if failed:
-        raise AppException(ErrorCode.REPORT_GENERATION_FAILED)
-
     return response(
-        message=Message.CHAT_RESPONSE_SUCCESS,
+        message=Message.REPORT_JOB_ACCEPTED,
         data={
-            "detail": msg,
-            "failed": failed
+            "job_id": job_id,
+            "status": "queued",
+            "total": len(user_activity_map)
         }
     )
 
+
+@app.get(
+    "/report/{job_id}",
+    response_model=BaseResponse,
+    summary="리포트 작업 진행 상황",
+    description="리포트 작업의 상태(queued/running/completed/failed), 완료/실패/남은 사용자 수, 단계별 처리 시간을 조회합니다.",
+    tags=["리포트 전송"],
+    responses={
+        404: {"model": BaseResponse, "description": ErrorCode.REPORT_JOB_NOT_FOUND.message},
+    },
+)
+async def get_report_status(job_id: str):
+    job = await asyncio.get_running_loop().run_in_executor(None, get_report_job, job_id)
+    if job is None:
+        raise AppException(ErrorCode.REPORT_JOB_NOT_FOUND)
+    return response(
+        message=Message.REPORT_JOB_QUERY_SUCCESS,
+        data=job
+    )
+